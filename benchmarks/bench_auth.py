@@ -0,0 +1,60 @@
+"""Token 验证延迟微基准
+
+测量 HashedTokenVerifier 在 token 数量从 10 增长到 1M 时的单次验证延迟，
+分别统计命中（有效token）与未命中（无效token）两种情况，以及经过
+CachedTokenVerifier 缓存后的命中延迟。
+
+运行：python benchmarks/bench_auth.py [--max-tokens 1000000] [--iterations 20000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastmcp.server.auth import TokenVerifier
+
+from src.auth import BearerToken, CachedTokenVerifier, HashedTokenVerifier
+
+
+SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+async def measure(verifier: TokenVerifier, tokens: list, iterations: int) -> float:
+    """返回平均每次验证耗时（微秒）"""
+    count = len(tokens)
+    start = time.perf_counter()
+    for i in range(iterations):
+        await verifier.verify_token(tokens[i % count])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def main(max_tokens: int, iterations: int):
+    print(f"{'tokens':>10} {'build (s)':>10} {'hit (us)':>10} {'miss (us)':>10} {'cached (us)':>12}")
+    for size in SIZES:
+        if size > max_tokens:
+            break
+        tokens = [f"token-{i:08d}-secret" for i in range(size)]
+        start = time.perf_counter()
+        verifier = HashedTokenVerifier(BearerToken(t, scopes=["read"]) for t in tokens)
+        build = time.perf_counter() - start
+
+        hits = tokens[:: max(1, size // 1000)]
+        misses = [f"invalid-{i:08d}" for i in range(1000)]
+        hit = await measure(verifier, hits, iterations)
+        miss = await measure(verifier, misses, iterations)
+        cached_verifier = CachedTokenVerifier(verifier)
+        await measure(cached_verifier, hits, len(hits))
+        cached = await measure(cached_verifier, hits, iterations)
+        print(f"{size:>10} {build:>10.3f} {hit:>10.2f} {miss:>10.2f} {cached:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Token verification microbenchmark")
+    parser.add_argument("--max-tokens", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.max_tokens, args.iterations))
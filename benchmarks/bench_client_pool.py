@@ -0,0 +1,95 @@
+"""客户端连接池基准
+
+模拟编排器逐个执行代理任务（每个任务调用一次工具），对比每个任务的延迟：
+
+- fresh: 每个任务新建连接与会话（与 examples 原来的写法相同：连接、initialize、调用、关闭）
+- pooled: 所有任务共用 ClientPool 中已初始化的会话与 keep-alive 连接
+
+以及并发任务下的吞吐（任务/秒）。服务器以子进程运行 main.py。
+
+运行：python benchmarks/bench_client_pool.py [--transports http sse] [--tasks 200] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamable_http_client
+from mcp.shared._httpx_utils import create_mcp_http_client
+
+from bench_transports import TOKEN, HTTPServer
+from src.client_pool import ClientPool
+
+HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+
+
+async def fresh_task(url: str, sse: bool):
+    """新建连接与会话执行一次调用"""
+    if sse:
+        transport = sse_client(url, headers=HEADERS)
+    else:
+        transport = streamable_http_client(url, http_client=create_mcp_http_client(headers=HEADERS))
+    async with transport as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            return await session.call_tool("add", {"a": 1, "b": 2})
+
+
+async def run(url: str, sse: bool, tasks: int, concurrency: int):
+    async def latencies(call) -> list:
+        values = []
+        for _ in range(tasks):
+            start = time.perf_counter()
+            await call()
+            values.append((time.perf_counter() - start) * 1000)
+        return values
+
+    async def throughput(call) -> float:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def task():
+            async with semaphore:
+                await call()
+
+        start = time.perf_counter()
+        await asyncio.gather(*[task() for _ in range(tasks)])
+        return tasks / (time.perf_counter() - start)
+
+    fresh = lambda: fresh_task(url, sse)
+    results = {"fresh": (await latencies(fresh), await throughput(fresh))}
+    async with ClientPool(token=TOKEN) as pool:
+        pooled = lambda: pool.call_tool(url, "add", {"a": 1, "b": 2})
+        results["pooled"] = (await latencies(pooled), await throughput(pooled))
+    return results
+
+
+def main(args):
+    print(f"{'transport':>9} {'client':>7} {'p50 ms':>8} {'p99 ms':>8} {'tasks/s':>9}")
+    for transport in args.transports:
+        server = HTTPServer(transport, workers=1)
+        server.start()
+        try:
+            path = "/mcp/sse" if transport == "sse" else "/mcp"
+            url = f"http://127.0.0.1:{server.port}{path}"
+            results = asyncio.run(run(url, transport == "sse", args.tasks, args.concurrency))
+        finally:
+            server.stop()
+        for name, (values, rate) in results.items():
+            values.sort()
+            p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+            print(f"{transport:>9} {name:>7} {statistics.median(values):>8.2f} {p99:>8.2f} {rate:>9.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Client connection pool benchmark")
+    parser.add_argument("--transports", nargs="+", choices=["http", "sse"], default=["http", "sse"])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    main(parser.parse_args())
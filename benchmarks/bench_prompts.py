@@ -0,0 +1,113 @@
+"""提示词渲染基准
+
+对比 analyze_code 的三种实现在不同 code 大小下的渲染耗时与峰值内存：
+
+- fstring: 原先的 f-string 实现
+- compiled: 预编译模板（每次使用新的参数，不命中缓存）
+- cached: 预编译模板，重复参数命中渲染缓存
+
+并测量经过 FastMCP（进程内客户端 get_prompt）的端到端耗时。
+峰值内存用 tracemalloc 单独测量，不计入耗时。
+
+运行：python benchmarks/bench_prompts.py [--sizes 1024 1048576 8388608] [--iterations 50]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastmcp import Client
+
+from src.server import mcp
+from src.templates import templates
+
+
+def analyze_code_fstring(code: str, language: str = "python") -> str:
+    return f"""Please analyze the following {language} code and provide feedback:
+
+```{language}
+{code}
+```
+
+Consider:
+1. Code structure and readability
+2. Potential bugs or issues
+3. Performance considerations
+4. Best practices
+"""
+
+
+def make_inputs(size: int, count: int):
+    """count 份不同的输入（首字符不同，避免命中缓存）"""
+    body = "x = 1\n" * (size // 6)
+    return [f"# {i}\n{body}" for i in range(count)]
+
+
+def measure(render: Callable[[str], str], inputs) -> float:
+    """平均每次渲染耗时（毫秒）"""
+    start = time.perf_counter()
+    for code in inputs:
+        render(code)
+    return (time.perf_counter() - start) / len(inputs) * 1000
+
+
+def peak_memory(render: Callable[[str], str], code: str) -> float:
+    """单次渲染的峰值内存增量（MB），不含输入本身"""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    render(code)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return (peak - base) / 1024 / 1024
+
+
+async def measure_end_to_end(inputs) -> float:
+    async with Client(mcp) as client:
+        await client.get_prompt("analyze_code", {"code": "warmup"})
+        start = time.perf_counter()
+        for code in inputs:
+            await client.get_prompt("analyze_code", {"code": code})
+        return (time.perf_counter() - start) / len(inputs) * 1000
+
+
+def main(args):
+    template = templates["analyze_code"] if "analyze_code" in templates else None
+    if template is None:
+        from src import prompts  # noqa: F401 懒加载时先导入提示词模块
+        template = templates["analyze_code"]
+
+    def compiled(code):
+        return template.render_uncached({"code": code, "language": "python"})
+
+    def cached(code):
+        return template.render({"code": code, "language": "python"})
+
+    print(f"{'size':>10} {'impl':>9} {'render ms':>10} {'peak MB':>9}")
+    for size in args.sizes:
+        inputs = make_inputs(size, args.iterations)
+        repeated = [inputs[0]] * args.iterations
+        cached(inputs[0])
+        for name, render, data in (
+            ("fstring", analyze_code_fstring, inputs),
+            ("compiled", compiled, inputs),
+            ("cached", cached, repeated),
+        ):
+            ms = measure(render, data)
+            peak = peak_memory(render, data[0])
+            print(f"{size:>10} {name:>9} {ms:>10.3f} {peak:>9.2f}")
+        e2e = asyncio.run(measure_end_to_end(inputs[: max(1, args.iterations // 5)]))
+        print(f"{size:>10} {'get_prompt':>9} {e2e:>10.3f} {'':>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt rendering benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1024, 1024 * 1024, 8 * 1024 * 1024])
+    parser.add_argument("--iterations", type=int, default=50)
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+"""资源解析基准
+
+注册 N 个资源模板（data{i}://{table}/{id}、files{i}://{path*} 等），测量：
+
+- register: 注册全部模板的耗时（安装 ResourceIndex 后，版本混用检查按标识查找）
+- linear: FastMCP 本地provider原有的逐个模板匹配
+- index: ResourceIndex 的前缀树查找（不使用解析缓存）
+- cached: ResourceIndex 重复URI命中解析缓存
+- read: 经过 FastMCP（进程内客户端 read_resource）的端到端耗时
+
+运行：python benchmarks/bench_resources.py [--counts 10 1000 10000 50000] [--iterations 2000]
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastmcp import Client, FastMCP
+
+from src.routing import ResourceIndex
+
+
+def build(count: int):
+    server = FastMCP("bench-resources")
+    index = ResourceIndex(server._local_provider).install()
+    start = time.perf_counter()
+    for i in range(count):
+        if i % 4 == 3:
+            server.resource(f"files{i}://{{path*}}", name=f"files{i}")(lambda path: path)
+        else:
+            server.resource(f"data{i}://{{table}}/{{id}}", name=f"data{i}")(lambda table, id: f"{table}/{id}")
+    return server, index, time.perf_counter() - start
+
+
+def uris(count: int, iterations: int):
+    rng = random.Random(0)
+    result = []
+    for _ in range(iterations):
+        i = rng.randrange(count)
+        result.append(f"files{i}://a/b/c" if i % 4 == 3 else f"data{i}://users/{rng.randrange(1000)}")
+    return result
+
+
+async def per_lookup(lookup, targets) -> float:
+    """平均每次查找耗时（微秒）"""
+    start = time.perf_counter()
+    for uri in targets:
+        assert await lookup(uri) is not None
+    return (time.perf_counter() - start) / len(targets) * 1e6
+
+
+async def run(count: int, iterations: int):
+    server, index, register = build(count)
+    provider = server._local_provider
+    targets = uris(count, iterations)
+    linear_targets = targets[: max(20, iterations // max(1, count // 100))]
+
+    linear = await per_lookup(lambda uri: type(provider)._get_resource_template(provider, uri), linear_targets)
+
+    index.maxsize = 0
+    start = time.perf_counter()
+    await index.get_resource_template(targets[0])
+    build_ms = (time.perf_counter() - start) * 1000
+    indexed = await per_lookup(index.get_resource_template, targets)
+
+    index.maxsize = len(targets)
+    await per_lookup(index.get_resource_template, targets)
+    cached = await per_lookup(index.get_resource_template, targets)
+
+    async with Client(server) as client:
+        reads = targets[:200]
+        start = time.perf_counter()
+        for uri in reads:
+            await client.read_resource_mcp(uri)
+        read = (time.perf_counter() - start) / len(reads) * 1e6
+    return register, linear, build_ms, indexed, cached, read
+
+
+def main(args):
+    print(
+        f"{'templates':>10} {'register s':>10} {'linear us':>10} {'build ms':>9} "
+        f"{'index us':>9} {'cached us':>10} {'read us':>9}"
+    )
+    for count in args.counts:
+        register, linear, build_ms, indexed, cached, read = asyncio.run(run(count, args.iterations))
+        print(
+            f"{count:>10} {register:>10.2f} {linear:>10.1f} {build_ms:>9.1f} "
+            f"{indexed:>9.1f} {cached:>10.1f} {read:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resource template resolution benchmark")
+    parser.add_argument("--counts", nargs="+", type=int, default=[10, 1000, 10000, 50000])
+    parser.add_argument("--iterations", type=int, default=2000)
+    main(parser.parse_args())
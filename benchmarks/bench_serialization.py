@@ -0,0 +1,99 @@
+"""输出序列化基准
+
+对比每次调用把工具返回值转为 ToolResult 的耗时：
+
+- fastmcp: FastMCP 的通用转换（Tool.convert_result）
+- 各JSON后端: 按返回类型注解预编译的输出编码器（ToolOutputEncoder）
+
+以及把响应消息编码为一行JSON的耗时（SDK 的 model_dump_json 与复用写缓冲的
+encode_message_into）。未安装的后端跳过。
+
+运行：python benchmarks/bench_serialization.py [--iterations 20000]
+"""
+
+import argparse
+import importlib.util
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import mcp_types as types
+from fastmcp.tools import Tool
+from pydantic import BaseModel
+
+from src.serialization import BACKENDS, ToolOutputEncoder, _return_annotation, encode_message_into, set_backend
+
+
+class Forecast(BaseModel):
+    day: int
+    high: float
+    low: float
+    condition: str
+
+
+def weather() -> dict:
+    ...
+
+
+def forecast() -> List[Forecast]:
+    ...
+
+
+def total() -> int:
+    ...
+
+
+def listing() -> Dict[str, Any]:
+    ...
+
+
+CASES = [
+    ("dict", weather, {"city": "Beijing", "temperature": 22, "condition": "Sunny", "humidity": 65}),
+    ("int", total, 42),
+    ("models[14]", forecast, [Forecast(day=i, high=20.5 + i, low=10.0, condition="Cloudy") for i in range(14)]),
+    ("dict 100KB", listing, {"items": [{"id": i, "name": f"item-{i}", "tags": ["a", "b"]} for i in range(2500)]}),
+]
+
+
+def per_call(fn, iterations: int) -> float:
+    """平均每次耗时（微秒）"""
+    return timeit.timeit(fn, number=iterations) / iterations * 1e6
+
+
+def main(args):
+    backends = [b for b in BACKENDS if b == "json" or importlib.util.find_spec(b)]
+    print(f"{'result':>12} {'fastmcp':>9} " + " ".join(f"{b:>9}" for b in backends) + "   (us/call)")
+    for label, fn, value in CASES:
+        tool = Tool.from_function(fn)
+        iterations = args.iterations if "KB" not in label else max(1, args.iterations // 100)
+        row = [per_call(lambda: tool.convert_result(value), iterations)]
+        for backend in backends:
+            set_backend(backend)
+            encoder = ToolOutputEncoder(_return_annotation(fn), tool.output_schema)
+            row.append(per_call(lambda: encoder.encode(value), iterations))
+        print(f"{label:>12} " + " ".join(f"{t:>9.1f}" for t in row))
+
+    print()
+    print(f"{'message':>12} {'sdk':>9} " + " ".join(f"{b:>9}" for b in backends) + "   (us/message)")
+    for label, fn, value in CASES:
+        tool = Tool.from_function(fn)
+        result = tool.convert_result(value).to_mcp_result()
+        if isinstance(result, tuple):
+            result = types.CallToolResult(content=result[0], structured_content=result[1])
+        message = types.JSONRPCResponse(jsonrpc="2.0", id=1, result=result.model_dump(by_alias=True, exclude_none=True))
+        iterations = args.iterations if "KB" not in label else max(1, args.iterations // 100)
+        row = [per_call(lambda: message.model_dump_json(by_alias=True, exclude_unset=True).encode(), iterations)]
+        buffer = bytearray()
+        for backend in backends:
+            set_backend(backend)
+            row.append(per_call(lambda: encode_message_into(message, buffer, 0), iterations))
+        print(f"{label:>12} " + " ".join(f"{t:>9.1f}" for t in row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tool output serialization benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args())
@@ -0,0 +1,85 @@
+"""SSE会话回收基准
+
+模拟失联的客户端（半开连接）：每轮打开 --sessions 个SSE连接后不再读取、
+不发送任何请求也不关闭，等待 --wait 秒后开始下一轮，共 --rounds 轮。对比：
+
+- unmanaged: 不限会话数、不做空闲回收（--sse-idle-timeout 0 --sse-max-sessions 0）
+- managed: 空闲 --idle-timeout 秒后回收
+
+每轮结束时输出服务器持有的会话数（/admin/sessions）与进程 RSS（MB，读取 /proc，仅 Linux）。
+
+运行：python benchmarks/bench_sessions.py [--sessions 200] [--rounds 3] [--idle-timeout 2] [--wait 4]
+"""
+
+import argparse
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+
+from bench_transports import TOKEN, HTTPServer, read_rss
+from src.sessions import IDLE_TIMEOUT_ENV, MAX_SESSIONS_ENV
+
+HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+
+
+def open_stalled(port: int, count: int) -> list:
+    """打开SSE连接，读到endpoint事件后不再读取"""
+    request = (f"GET /mcp/sse HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {TOKEN}\r\n"
+               f"Accept: text/event-stream\r\n\r\n").encode()
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.sendall(request)
+        data = b""
+        while b"session_id=" not in data:
+            data += sock.recv(4096)
+        sockets.append(sock)
+    return sockets
+
+
+def run(label: str, env: dict, args) -> list:
+    os.environ.update(env)
+    server = HTTPServer("sse", workers=1)
+    server.start()
+    sockets, rows = [], []
+    try:
+        base = f"http://127.0.0.1:{server.port}"
+        rows.append((label, 0, 0, read_rss(server.process.pid)["rss_mb"]))
+        for round_ in range(1, args.rounds + 1):
+            sockets.extend(open_stalled(server.port, args.sessions))
+            time.sleep(args.wait)
+            sessions = httpx.get(f"{base}/admin/sessions", headers=HEADERS).json()["sessions"]
+            rows.append((label, round_, sessions, read_rss(server.process.pid)["rss_mb"]))
+    finally:
+        for sock in sockets:
+            sock.close()
+        server.stop()
+        for name in env:
+            os.environ.pop(name, None)
+    return rows
+
+
+def main(args):
+    scenarios = [
+        ("unmanaged", {IDLE_TIMEOUT_ENV: "0", MAX_SESSIONS_ENV: "0"}),
+        ("managed", {IDLE_TIMEOUT_ENV: str(args.idle_timeout), MAX_SESSIONS_ENV: "0"}),
+    ]
+    print(f"{'server':>10} {'round':>6} {'sessions':>9} {'rss MB':>8}")
+    for label, env in scenarios:
+        for name, round_, sessions, rss in run(label, env, args):
+            print(f"{name:>10} {round_:>6} {sessions:>9} {rss:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SSE session reaping benchmark")
+    parser.add_argument("--sessions", type=int, default=200, help="stalled SSE connections opened per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--idle-timeout", type=float, default=2.0)
+    parser.add_argument("--wait", type=float, default=4.0, help="seconds between rounds")
+    main(parser.parse_args())
@@ -0,0 +1,182 @@
+"""冷启动基准
+
+每轮都在新的子进程中测量（避免模块缓存影响）：
+
+- spawn: 从启动 main.py 到可以服务的时间——stdio 为 initialize 请求得到响应，
+  SSE 与 Streamable-HTTP 为 HTTP 端点返回200
+- app: 进程内的分阶段耗时——导入 src.app、create_app()、lifespan 启动与关闭
+- importtime: `python -X importtime -c "import main"` 的总导入耗时及耗时最多的模块
+
+运行：python benchmarks/bench_startup.py [--runs 5] [--transports stdio sse http] [--top 15] [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).parent.parent
+
+import httpx
+
+
+# 在子进程中执行：分阶段计时并以JSON输出
+APP_PROBE = """
+import asyncio, json, time
+t0 = time.perf_counter()
+from src.app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+
+async def lifespan():
+    global t3
+    async with app.router.lifespan_context(app):
+        t3 = time.perf_counter()
+    return time.perf_counter()
+
+t4 = asyncio.run(lifespan())
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "startup": t3 - t2, "shutdown": t4 - t3}))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+INITIALIZE = json.dumps({
+    "jsonrpc": "2.0", "id": 1, "method": "initialize",
+    "params": {
+        "protocolVersion": "2025-06-18",
+        "capabilities": {},
+        "clientInfo": {"name": "bench-startup", "version": "1.0.0"},
+    },
+}) + "\n"
+
+
+def measure_stdio() -> float:
+    """启动stdio服务器直到 initialize 得到响应所需的秒数"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "main.py"), "--transport", "stdio", "--no-auth"],
+        cwd=str(ROOT), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        process.stdin.write(INITIALIZE)
+        process.stdin.flush()
+        for line in process.stdout:
+            if line.startswith("{") and '"id":1' in line.replace(" ", ""):
+                return time.perf_counter() - start
+        raise RuntimeError(f"stdio server exited with code {process.wait()}")
+    finally:
+        process.kill()
+        process.wait(timeout=15)
+
+
+def measure_spawn(transport: str) -> float:
+    """启动服务器进程直到就绪端点返回200所需的秒数"""
+    if transport == "stdio":
+        return measure_stdio()
+    port = free_port()
+    path = "/health" if transport == "sse" else "/metrics"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(ROOT / "main.py"), "--transport", transport,
+         "--host", "127.0.0.1", "--port", str(port), "--no-auth"],
+        cwd=str(ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{transport} server exited with code {process.returncode}")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}{path}", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=15)
+
+
+def measure_app() -> Dict[str, float]:
+    """在新进程中分阶段测量 create_app 与 lifespan"""
+    output = subprocess.check_output(
+        [sys.executable, "-c", APP_PROBE], cwd=str(ROOT),
+        env=dict(os.environ, MCP_AUTH_TOKEN=os.environ.get("MCP_AUTH_TOKEN", "bench-token")),
+        stderr=subprocess.DEVNULL, text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_importtime(top: int) -> Dict[str, object]:
+    """解析 -X importtime 输出，返回总耗时与累计耗时最多的模块"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=str(ROOT), capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+        modules.append((name, int(cumulative_us)))
+    total = next((us for name, us in modules if name == "main"), 0)
+    modules.sort(key=lambda item: item[1], reverse=True)
+    return {
+        "total_ms": total / 1000,
+        "modules": len(modules),
+        "top": [{"module": name, "cumulative_ms": us / 1000} for name, us in modules[:top]],
+    }
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "min_ms": min(samples) * 1000,
+        "median_ms": statistics.median(samples) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+def main(args):
+    report = {"runs": args.runs, "spawn": {}, "app": {}}
+
+    print(f"{'phase':>16} {'min ms':>9} {'median ms':>10} {'max ms':>9}")
+    phases: Dict[str, List[float]] = {}
+    for _ in range(args.runs):
+        for phase, seconds in measure_app().items():
+            phases.setdefault(phase, []).append(seconds)
+    for phase, samples in phases.items():
+        stats = report["app"][phase] = summarize(samples)
+        print(f"{phase:>16} {stats['min_ms']:>9.1f} {stats['median_ms']:>10.1f} {stats['max_ms']:>9.1f}")
+
+    for transport in args.transports:
+        stats = report["spawn"][transport] = summarize([measure_spawn(transport) for _ in range(args.runs)])
+        print(f"{'spawn ' + transport:>16} {stats['min_ms']:>9.1f} {stats['median_ms']:>10.1f} {stats['max_ms']:>9.1f}")
+
+    report["importtime"] = measure_importtime(args.top)
+    print(f"\nimport main: {report['importtime']['total_ms']:.1f} ms, {report['importtime']['modules']} modules")
+    for item in report["importtime"]["top"]:
+        print(f"  {item['cumulative_ms']:>9.1f} ms  {item['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--transports", nargs="+", choices=["stdio", "sse", "http"], default=["stdio", "sse", "http"])
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--output", type=str, default=None, help="Write results to a JSON file")
+    main(parser.parse_args())
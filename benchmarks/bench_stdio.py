@@ -0,0 +1,113 @@
+"""stdio传输吞吐基准
+
+以子进程启动 main.py（stdio），完成初始化握手后一次性写入 N 个请求，
+同时读取全部响应，统计每秒处理的消息数。对比：
+
+- sdk: MCP SDK 默认的 stdio 传输（main.py 的默认值）
+- fast/json: 批量读写的传输（--stdio-mode fast），pydantic 编解码
+- fast/orjson、fast/msgspec: 批量读写的传输，快速JSON后端（未安装的后端跳过）
+
+负载：0 表示 ping（只有传输开销），其他值为 reverse_text 工具的输入字符数。
+
+运行：python benchmarks/bench_stdio.py [--payload 0 1024 102400] [--requests 2000]
+"""
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).parent.parent
+
+MODES = [
+    ("sdk", ["--stdio-mode", "sdk"]),
+    ("fast/json", ["--stdio-mode", "fast", "--json", "json"]),
+    ("fast/orjson", ["--stdio-mode", "fast", "--json", "orjson"]),
+    ("fast/msgspec", ["--stdio-mode", "fast", "--json", "msgspec"]),
+]
+
+
+def request(id: int, payload: int) -> bytes:
+    if payload == 0:
+        message = {"jsonrpc": "2.0", "id": id, "method": "ping"}
+    else:
+        # 每个请求的输入不同，避免命中工具结果缓存
+        text = f"{id:08d}" + "x" * (payload - 8)
+        message = {
+            "jsonrpc": "2.0", "id": id, "method": "tools/call",
+            "params": {"name": "reverse_text", "arguments": {"text": text}},
+        }
+    return json.dumps(message).encode() + b"\n"
+
+
+def start(args: List[str]) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "main.py", "--transport", "stdio", "--no-auth", *args],
+        cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    initialize = {
+        "jsonrpc": "2.0", "id": 0, "method": "initialize",
+        "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "bench", "version": "1"}},
+    }
+    proc.stdin.write(json.dumps(initialize).encode() + b"\n")
+    proc.stdin.flush()
+    # 跳过 main.py 打印到 stdout 的状态行
+    while not proc.stdout.readline().startswith(b'{"jsonrpc"'):
+        pass
+    proc.stdin.write(b'{"jsonrpc":"2.0","method":"notifications/initialized"}\n')
+    proc.stdin.flush()
+    return proc
+
+
+def run(args: List[str], payload: int, count: int) -> float:
+    """每秒处理的请求数"""
+    proc = start(args)
+    try:
+        # 预热（工具模块按需加载）
+        proc.stdin.write(request(-1, payload))
+        proc.stdin.flush()
+        proc.stdout.readline()
+        requests = [request(i, payload) for i in range(count)]
+
+        def write():
+            for line in requests:
+                proc.stdin.write(line)
+            proc.stdin.flush()
+
+        start_time = time.perf_counter()
+        writer = threading.Thread(target=write)
+        writer.start()
+        for _ in range(count):
+            line = proc.stdout.readline()
+            if not line:
+                raise RuntimeError("server exited early")
+        elapsed = time.perf_counter() - start_time
+        writer.join()
+        return count / elapsed
+    finally:
+        proc.stdin.close()
+        proc.kill()
+        proc.wait()
+
+
+def main(args):
+    modes = [
+        (name, flags) for name, flags in MODES
+        if "--json" not in flags or flags[1] == "json" or importlib.util.find_spec(flags[1])
+    ]
+    print(f"{'payload':>8} " + " ".join(f"{name:>13}" for name, _ in modes) + "   (messages/s)")
+    for payload in args.payload:
+        rates = [run(flags, payload, args.requests) for _, flags in modes]
+        print(f"{payload:>8} " + " ".join(f"{rate:>13.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="STDIO transport throughput benchmark")
+    parser.add_argument("--payload", nargs="+", type=int, default=[0, 1024, 100 * 1024])
+    parser.add_argument("--requests", type=int, default=2000)
+    main(parser.parse_args())
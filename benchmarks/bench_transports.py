@@ -0,0 +1,284 @@
+"""传输层负载测试
+
+在本地启动服务器（stdio 由客户端直接派生，SSE/HTTP 以子进程运行 main.py），
+对 src/tools 中的工具发起并发调用，按并发数与负载大小组合分别统计：
+
+- 延迟 p50 / p95 / p99（毫秒）
+- 吞吐（请求/秒）
+- 服务器进程 RSS 与峰值 RSS（MB，读取 /proc，仅 Linux）
+
+结果写入 JSON，可用 --compare 与之前的结果对比。
+
+运行：
+    python benchmarks/bench_transports.py [--transports stdio sse http]
+        [--concurrency 1 8 32] [--payload 16 1024 65536] [--requests 500]
+        [--workers 1] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+import httpx
+from fastmcp import Client
+from fastmcp.client.transports import SSETransport, StdioTransport, StreamableHttpTransport
+
+
+TOKEN = "bench-token"
+TOOL = "reverse_text"
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def read_rss(pid: int) -> Dict[str, Optional[float]]:
+    """读取进程当前RSS与峰值RSS（MB）"""
+    rss = {"rss_mb": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss["rss_mb"] = int(line.split()[1]) / 1024
+                elif line.startswith("VmHWM:"):
+                    rss["peak_rss_mb"] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return rss
+
+
+def child_pids() -> List[int]:
+    """当前进程的子进程（用于定位 stdio 服务器）"""
+    pids = []
+    for task in Path(f"/proc/{os.getpid()}/task").glob("*"):
+        try:
+            pids.extend(int(pid) for pid in (task / "children").read_text().split())
+        except OSError:
+            continue
+    return pids
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_env() -> Dict[str, str]:
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    for name in ("MCP_RATE_LIMIT", "MCP_MAX_IN_FLIGHT"):
+        env.pop(name, None)
+    return env
+
+
+class HTTPServer:
+    """以子进程运行的 SSE / Streamable-HTTP 服务器"""
+
+    def __init__(self, transport: str, workers: int):
+        self.transport = transport
+        self.workers = workers
+        self.port = free_port()
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [sys.executable, str(ROOT / "main.py"), "--transport", self.transport,
+             "--host", "127.0.0.1", "--port", str(self.port), "--token", TOKEN,
+             "--workers", str(self.workers)],
+            cwd=str(ROOT), env=server_env(),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{self.port}/metrics",
+                                     headers={"Authorization": f"Bearer {TOKEN}"}, timeout=1)
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"{self.transport} server did not start")
+
+    def pids(self) -> List[int]:
+        """服务器进程及其worker"""
+        pids = [self.process.pid]
+        try:
+            pids.extend(int(pid) for pid in Path(f"/proc/{self.process.pid}/task/{self.process.pid}/children").read_text().split())
+        except OSError:
+            pass
+        return pids
+
+    def client(self) -> Client:
+        headers = {"Authorization": f"Bearer {TOKEN}"}
+        if self.transport == "sse":
+            return Client(SSETransport(f"http://127.0.0.1:{self.port}/mcp/sse", headers=headers))
+        return Client(StreamableHttpTransport(f"http://127.0.0.1:{self.port}/mcp", headers=headers))
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+async def run_case(client: Client, concurrency: int, payload: int, requests: int) -> Dict[str, float]:
+    """以给定并发数发起 requests 次调用，返回延迟与吞吐"""
+    text = "x" * payload
+    latencies: List[float] = []
+    counter = iter(range(requests))
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            # 每次调用使用不同参数，避免命中结果缓存
+            arguments = {"text": f"{i:08d}{text}"}
+            start = time.perf_counter()
+            try:
+                await client.call_tool(TOOL, arguments)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+def memory(pids: List[int]) -> Dict[str, Optional[float]]:
+    total = {"rss_mb": None, "peak_rss_mb": None}
+    for pid in pids:
+        for key, value in read_rss(pid).items():
+            if value is not None:
+                total[key] = (total[key] or 0) + value
+    return total
+
+
+async def bench_transport(transport: str, args) -> List[Dict]:
+    server = None
+    if transport == "stdio":
+        client = Client(StdioTransport(
+            sys.executable, [str(ROOT / "main.py"), "--transport", "stdio", "--token", TOKEN],
+            env=server_env(), cwd=str(ROOT), log_file=Path(os.devnull),
+        ))
+    else:
+        server = HTTPServer(transport, args.workers)
+        server.start()
+        client = server.client()
+
+    results = []
+    try:
+        async with client:
+            pids = server.pids() if server else child_pids()
+            await run_case(client, 4, 16, args.warmup)
+            for concurrency in args.concurrency:
+                for payload in args.payload:
+                    stats = await run_case(client, concurrency, payload, args.requests)
+                    stats.update(memory(pids))
+                    stats.update(transport=transport, concurrency=concurrency, payload=payload)
+                    results.append(stats)
+                    print(
+                        f"{transport:>6} {concurrency:>5} {payload:>8} {stats['rps']:>9.1f} "
+                        f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+                        f"{stats['rss_mb'] or 0:>8.1f} {stats['errors']:>6}"
+                    )
+    finally:
+        if server is not None:
+            server.stop()
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline_path: str):
+    """与之前的结果逐项对比（吞吐与p99的变化百分比）"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    index = {(r["transport"], r["concurrency"], r["payload"]): r for r in baseline["results"]}
+    print()
+    print(f"compared with {baseline_path} ({baseline.get('commit')})")
+    print(f"{'transport':>9} {'conc':>5} {'payload':>8} {'rps Δ%':>8} {'p99 Δ%':>8}")
+    for r in results:
+        old = index.get((r["transport"], r["concurrency"], r["payload"]))
+        if old is None:
+            continue
+        rps = (r["rps"] - old["rps"]) / old["rps"] * 100 if old["rps"] else 0.0
+        p99 = (r["p99_ms"] - old["p99_ms"]) / old["p99_ms"] * 100 if old["p99_ms"] else 0.0
+        print(f"{r['transport']:>9} {r['concurrency']:>5} {r['payload']:>8} {rps:>+8.1f} {p99:>+8.1f}")
+
+
+async def main(args):
+    print(f"{'mode':>6} {'conc':>5} {'payload':>8} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rss MB':>8} {'errors':>6}")
+    results = []
+    for transport in args.transports:
+        results.extend(await bench_transport(transport, args))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "tool": TOOL,
+            "requests": args.requests,
+            "workers": args.workers,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transport load test")
+    parser.add_argument("--transports", nargs="+", choices=["stdio", "sse", "http"], default=["stdio", "sse", "http"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--payload", nargs="+", type=int, default=[16, 1024, 65536], help="Payload size in bytes")
+    parser.add_argument("--requests", type=int, default=500, help="Calls per concurrency/payload combination")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for SSE/HTTP servers")
+    parser.add_argument("--output", type=str, default=None, help="Write results to a JSON file")
+    parser.add_argument("--compare", type=str, default=None, help="Compare with a previous JSON result")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,100 @@
+"""参数校验基准
+
+对比小工具每次调用的参数校验开销：
+
+- body: 直接调用工具函数
+- pydantic: 按函数签名构建的 TypeAdapter 校验参数并调用函数
+- precompiled: 预编译校验器（标量签名的快速路径）校验参数并调用函数
+- fastmcp / validated: Tool.run 中结果转换之前的部分（查找包装器与 TypeAdapter、
+  校验、调度与执行），分别为 FunctionTool 与 ValidatedTool
+- run: 完整的 Tool.run（含结果转换），FunctionTool / ValidatedTool
+
+运行：python benchmarks/bench_validation.py [--iterations 20000]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastmcp.server.dependencies import without_injected_parameters
+from fastmcp.tools import Tool
+from fastmcp.tools.function_tool import _strict_input_validation, _wrap_body_errors
+from fastmcp.utilities.async_utils import is_coroutine_function
+from fastmcp.utilities.types import get_cached_typeadapter
+
+from src.validation import ValidatedTool
+
+
+def add(a: int, b: int) -> int:
+    return a + b
+
+
+def multiply(a: float, b: float) -> float:
+    return a * b
+
+
+def reverse_text(text: str) -> str:
+    return text[::-1]
+
+
+CASES = [
+    ("add", add, {"a": 1, "b": 2}),
+    ("multiply", multiply, {"a": 2, "b": 3.5}),
+    ("reverse_text", reverse_text, {"text": "hello world"}),
+]
+
+
+def per_call(fn, iterations: int) -> float:
+    """平均每次耗时（微秒）"""
+    return timeit.timeit(fn, number=iterations) / iterations * 1e6
+
+
+async def fastmcp_execute(tool, arguments):
+    """FunctionTool.run 中结果转换之前的部分"""
+    body_fn = _wrap_body_errors(tool.fn, materialize_generators=True)
+    wrapper_fn = without_injected_parameters(body_fn, run_in_thread=tool.run_in_thread)
+    exec_fn = _wrap_body_errors(wrapper_fn)
+    type_adapter = get_cached_typeadapter(exec_fn)
+    exec_is_async = is_coroutine_function(wrapper_fn)
+    return await tool._run_body(type_adapter, exec_is_async, arguments, strict=_strict_input_validation())
+
+
+def per_await(fn, arguments, iterations: int) -> float:
+    """平均每次 await fn(arguments) 的耗时（微秒）"""
+    async def loop():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await fn(arguments)
+        return (time.perf_counter() - start) / iterations * 1e6
+    return asyncio.run(loop())
+
+
+def main(args):
+    columns = ("body", "pydantic", "precomp.", "fastmcp", "validated", "run", "run(val.)")
+    print(f"{'tool':>14} " + " ".join(f"{c:>9}" for c in columns) + "   (us/call)")
+    for label, fn, arguments in CASES:
+        # 同步工具在事件循环中执行，排除线程池切换的影响
+        tool = Tool.from_function(fn, run_in_thread=False)
+        validated = ValidatedTool.from_tool(tool)
+        validator = validated.validator
+        row = [
+            per_call(lambda: fn(**arguments), args.iterations),
+            per_call(lambda: validator.adapter.validate_python(arguments), args.iterations),
+            per_call(lambda: validator.body(**validator.bind(arguments)), args.iterations),
+            per_await(lambda a: fastmcp_execute(tool, a), arguments, args.iterations),
+            per_await(validated.execute, arguments, args.iterations),
+            per_await(tool.run, arguments, args.iterations),
+            per_await(validated.run, arguments, args.iterations),
+        ]
+        print(f"{label:>14} " + " ".join(f"{t:>9.2f}" for t in row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tool argument validation benchmark")
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args())
@@ -2,7 +2,8 @@
 
 演示如何使用 SSE 传输模式调用 MCP 服务器。
 包括两种方式：
-1. 使用 mcp.client.sse 模块的 sse_client 函数（推荐）
+1. 使用 src.client_pool 的 ClientPool（推荐）：会话与连接在多次调用间复用，
+   断线后自动重连
 2. 直接调用 /mcp/messages 端点（需要手动管理 session_id）
 
 注意：SSE 是长连接模式，客户端会持续运行。
@@ -21,8 +22,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import httpx
 
-from mcp.client.sse import sse_client
-from mcp import ClientSession
+from src.client_pool import ClientPool
 
 
 async def main():
@@ -34,41 +34,35 @@ async def main():
 
     base_url = "http://localhost:8003"
     token = "123456"
+    url = f"{base_url}/mcp/sse"
 
-    headers = {'Authorization': f'Bearer {token}'}
-
-    print(f"Connecting to {base_url}/sse...")
+    print(f"Connecting to {url}...")
 
     try:
-        async with sse_client(
-            url=f'{base_url}/mcp/sse',
-            headers=headers
-        ) as (read_stream, write_stream):
-            print("SSE connected! Creating session...")
-
-            async with ClientSession(read_stream, write_stream) as session:
-                print("Session created! Initializing...")
-
-                # 初始化连接
-                await session.initialize()
-                print("Initialized!")
-                print()
+        # 连接池在第一次调用时建立 SSE 连接并完成 initialize，之后的调用复用同一个会话
+        async with ClientPool(token=token) as pool:
+            # 列出工具
+            print("Listing tools...")
+            result = await pool.list_tools(url)
+            print(f"Tools: {[t.name for t in result.tools]}")
+            print()
 
-                # 列出工具
-                print("Listing tools...")
-                result = await session.list_tools()
-                print(f"Tools: {[t.name for t in result.tools]}")
-                print()
+            # 调用工具
+            print("Calling 'add' tool...")
+            result = await pool.call_tool(url, "add", {"a": 10, "b": 5})
+            print(f"Result: {result.content[0].text if result.content else result}")
+            print()
 
-                # 调用工具
-                print("Calling 'add' tool...")
-                result = await session.call_tool("add", {"a": 10, "b": 5})
-                print(f"Result: {result.content[0].text if result.content else result}")
-                print()
+            print("Calling 'reverse_text' tool...")
+            result = await pool.call_tool(url, "reverse_text", {"text": "Hello MCP"})
+            print(f"Result: {result.content[0].text if result.content else result}")
+            print()
 
-                print("Calling 'reverse_text' tool...")
-                result = await session.call_tool("reverse_text", {"text": "Hello MCP"})
-                print(f"Result: {result.content[0].text if result.content else result}")
+            # 并发调用在同一个会话上多路复用
+            print("Calling 'add' 5 times concurrently...")
+            results = await asyncio.gather(*[pool.call_tool(url, "add", {"a": i, "b": i}) for i in range(5)])
+            print(f"Results: {[r.content[0].text for r in results]}")
+            print(f"Pool: {pool.stats()}")
 
     except Exception as e:
         import traceback
@@ -104,8 +98,8 @@ async def messages_endpoint_example():
     print()
 
     try:
-        # 使用两个客户端：一个用于 SSE（接收响应），一个用于 POST（发送请求）
-        async with httpx.AsyncClient() as sse_client, httpx.AsyncClient() as post_client:
+        # 同一个客户端的连接池：SSE 流占用一个连接，POST 复用另一个 keep-alive 连接
+        async with httpx.AsyncClient() as client:
             # 步骤1: 建立 SSE 连接（后台任务，持续读取响应）
             print("步骤1: 建立 SSE 连接...")
 
@@ -114,7 +108,7 @@ async def messages_endpoint_example():
             async def read_sse_responses():
                 nonlocal sse_response_text
                 try:
-                    async with sse_client.stream(
+                    async with client.stream(
                         "GET",
                         f"{base_url}/mcp/sse",
                         headers=headers,
@@ -153,7 +147,7 @@ async def messages_endpoint_example():
 
             # 发送初始化请求
             print("  Sending: initialize")
-            resp = await post_client.post(
+            resp = await client.post(
                 messages_url,
                 json={
                     "jsonrpc": "2.0",
@@ -173,7 +167,7 @@ async def messages_endpoint_example():
 
             # 发送 initialized 通知（通知消息没有 id）
             print("  Sending: notifications/initialized")
-            resp = await post_client.post(
+            resp = await client.post(
                 messages_url,
                 json={"jsonrpc": "2.0", "method": "notifications/initialized"},
                 headers=headers,
@@ -184,7 +178,7 @@ async def messages_endpoint_example():
 
             # 列出工具
             print("  Sending: tools/list")
-            resp = await post_client.post(
+            resp = await client.post(
                 messages_url,
                 json={"jsonrpc": "2.0", "id": 3, "method": "tools/list", "params": {}},
                 headers=headers,
@@ -195,7 +189,7 @@ async def messages_endpoint_example():
 
             # 调用工具
             print("  Sending: tools/call (add)")
-            resp = await post_client.post(
+            resp = await client.post(
                 messages_url,
                 json={
                     "jsonrpc": "2.0",
@@ -210,7 +204,7 @@ async def messages_endpoint_example():
             await asyncio.sleep(0.5)
 
             print("  Sending: tools/call (reverse_text)")
-            resp = await post_client.post(
+            resp = await client.post(
                 messages_url,
                 json={
                     "jsonrpc": "2.0",
@@ -224,6 +218,25 @@ async def messages_endpoint_example():
             print(f"  Status: {resp.status_code}")
             await asyncio.sleep(0.5)
 
+            # 批量调用：一次 POST 发送多个请求（JSON-RPC batch），服务器并发执行，
+            # 每个结果完成后立即通过 SSE 流返回
+            print("  Sending: batch of 3 tools/call")
+            resp = await client.post(
+                messages_url,
+                json=[
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 6 + i,
+                        "method": "tools/call",
+                        "params": {"name": "add", "arguments": {"a": i, "b": i}}
+                    }
+                    for i in range(3)
+                ],
+                headers=headers,
+                timeout=10.0
+            )
+            print(f"  Status: {resp.status_code}")
+
             # 等待 SSE 响应
             await asyncio.sleep(1.0)
 
@@ -257,7 +270,7 @@ if __name__ == "__main__":
         "--method",
         choices=["sse", "messages", "both"],
         default="both",
-        help="Which method to use: 'sse' for sse_client, 'messages' for messages endpoint, 'both' for both (default)"
+        help="Which method to use: 'sse' for ClientPool, 'messages' for messages endpoint, 'both' for both (default)"
     )
     args = parser.parse_args()
 
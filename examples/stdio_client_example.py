@@ -1,20 +1,20 @@
 """STDIO模式客户端调用示例
 
 演示如何通过stdio transport调用MCP服务器。
-需要先启动服务器，然后客户端连接到服务器进行调用。
+ClientPool 在第一次调用时启动服务器子进程并完成 initialize，之后的调用复用同一个会话，
+子进程意外退出时下一次调用自动重新启动。
 """
 
 import asyncio
-import subprocess
 import sys
-from contextlib import asynccontextmanager
 from pathlib import Path
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import StdioServerParameters
+
+from src.client_pool import ClientPool
 
 
 # 服务器启动配置
@@ -22,27 +22,18 @@ SERVER_SCRIPT = Path(__file__).parent.parent / "main.py"
 AUTH_TOKEN = "your-secret-token"
 
 
-@asynccontextmanager
-async def get_mcp_client():
-    """创建MCP客户端连接"""
-
-    server_params = StdioServerParameters(
-        command="python",
-        args=[
-            str(SERVER_SCRIPT),
-            "--transport", "stdio",
-            "--token", AUTH_TOKEN
-        ],
-        env={
-            "PYTHONIOENCODING": "utf-8"
-        }
-    )
-
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            # 初始化连接
-            await session.initialize()
-            yield session
+# 服务器启动参数，连接池以它作为会话的键
+SERVER = StdioServerParameters(
+    command=sys.executable,
+    args=[
+        str(SERVER_SCRIPT),
+        "--transport", "stdio",
+        "--token", AUTH_TOKEN
+    ],
+    env={
+        "PYTHONIOENCODING": "utf-8"
+    }
+)
 
 
 async def test_stdio_client():
@@ -53,77 +44,72 @@ async def test_stdio_client():
     print("=" * 50)
     print()
 
-    async with get_mcp_client() as session:
-        # 1. 列出所有可用工具
-        print("1. Listing available tools...")
-        tools = await session.list_tools()
-        tool_names = [t.name for t in tools]
-        print(f"   Tools: {tool_names}")
-        print()
-
-        # 2. 调用 add 工具
-        print("2. Calling 'add' tool...")
-        result = await session.call_tool("add", {"a": 10, "b": 5})
-        print(f"   add(10, 5) = {result.content[0].text}")
-        print()
-
-        # 3. 调用 multiply 工具
-        print("3. Calling 'multiply' tool...")
-        result = await session.call_tool("multiply", {"a": 3.5, "b": 2})
-        print(f"   multiply(3.5, 2) = {result.content[0].text}")
-        print()
-
-        # 4. 调用 get_weather 工具
-        print("4. Calling 'get_weather' tool...")
-        result = await session.call_tool("get_weather", {"city": "Beijing"})
-        print(f"   get_weather('Beijing') = {result.content[0].text}")
-        print()
-
-        # 5. 调用 reverse_text 工具
-        print("5. Calling 'reverse_text' tool...")
-        result = await session.call_tool("reverse_text", {"text": "Hello MCP"})
-        print(f"   reverse_text('Hello MCP') = {result.content[0].text}")
-        print()
-
-        # 6. 列出资源
-        print("6. Listing available resources...")
-        resources = await session.list_resources()
-        resource_uris = [r.uri for r in resources]
-        print(f"   Resources: {resource_uris}")
-        print()
-
-        # 7. 读取资源
-        if resources:
-            print("7. Reading resource 'config://app-info'...")
-            content = await session.read_resource("config://app-info")
-            print(f"   Content: {content.contents[0].text}")
-
-
-async def test_with_subprocess():
-    """使用subprocess手动管理服务器进程"""
+    async with ClientPool() as pool:
+        # 借用池中的会话连续调用
+        async with pool.session(SERVER) as session:
+            # 1. 列出所有可用工具
+            print("1. Listing available tools...")
+            tools = await session.list_tools()
+            tool_names = [t.name for t in tools.tools]
+            print(f"   Tools: {tool_names}")
+            print()
+
+            # 2. 调用 add 工具
+            print("2. Calling 'add' tool...")
+            result = await session.call_tool("add", {"a": 10, "b": 5})
+            print(f"   add(10, 5) = {result.content[0].text}")
+            print()
+
+            # 3. 调用 multiply 工具
+            print("3. Calling 'multiply' tool...")
+            result = await session.call_tool("multiply", {"a": 3.5, "b": 2})
+            print(f"   multiply(3.5, 2) = {result.content[0].text}")
+            print()
+
+            # 4. 调用 get_weather 工具
+            print("4. Calling 'get_weather' tool...")
+            result = await session.call_tool("get_weather", {"city": "Beijing"})
+            print(f"   get_weather('Beijing') = {result.content[0].text}")
+            print()
+
+            # 5. 调用 reverse_text 工具
+            print("5. Calling 'reverse_text' tool...")
+            result = await session.call_tool("reverse_text", {"text": "Hello MCP"})
+            print(f"   reverse_text('Hello MCP') = {result.content[0].text}")
+            print()
+
+            # 6. 列出资源
+            print("6. Listing available resources...")
+            resources = await session.list_resources()
+            resource_uris = [str(r.uri) for r in resources.resources]
+            print(f"   Resources: {resource_uris}")
+            print()
+
+            # 7. 读取资源
+            if resource_uris:
+                print("7. Reading resource 'config://app-info'...")
+                content = await session.read_resource("config://app-info")
+                print(f"   Content: {content.contents[0].text}")
+                print()
+
+        # 之后的任务直接通过连接池调用，不再启动子进程与握手
+        await test_pooled_tasks(pool)
+
+
+async def test_pooled_tasks(pool: ClientPool):
+    """多个任务共用连接池中的会话"""
 
     print("=" * 50)
-    print("MCP STDIO Client with Subprocess")
+    print("MCP STDIO Client with ClientPool")
     print("=" * 50)
     print()
 
-    # 启动服务器进程
-    server_params = StdioServerParameters(
-        command="python",
-        args=[
-            str(SERVER_SCRIPT),
-            "--transport", "stdio",
-            "--token", AUTH_TOKEN
-        ]
-    )
-
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-
-            # 调用工具
-            result = await session.call_tool("add", {"a": 100, "b": 200})
-            print(f"add(100, 200) = {result.content[0].text}")
+    results = await asyncio.gather(*[
+        pool.call_tool(SERVER, "add", {"a": 100, "b": i}) for i in range(5)
+    ])
+    for i, result in enumerate(results):
+        print(f"add(100, {i}) = {result.content[0].text}")
+    print(f"Pool: {pool.stats()}")
 
 
 if __name__ == "__main__":
@@ -5,27 +5,65 @@
 import argparse
 import os
 import sys
-import uvicorn
-from src import mcp, configure_auth, create_app, AuthConfig
+from src import mcp, configure_auth, AuthConfig
+from src.auth import AuthReloader
+from src.admission import MAX_IN_FLIGHT_ENV, MAX_QUEUE_ENV, RATE_BURST_ENV, RATE_LIMIT_ENV
+from src.execution import PROCESSES_ENV, THREADS_ENV
+from src.listing import PAGE_SIZE_ENV
+from src.serialization import JSON_ENV
+from src.sessions import (
+    IDLE_TIMEOUT_ENV, MAX_SESSIONS_ENV, PING_INTERVAL_ENV, QUEUE_POLICY_ENV, QUEUE_SIZE_ENV, SEND_TIMEOUT_ENV,
+)
+from src.validation import STRICT_ARGS_ENV
+from src.server import get_auth_config
 
+# HTTP传输相关的依赖（uvicorn、FastAPI等）在对应的 run_* 中才导入，
+# 使stdio模式的启动不为其付出导入开销
 
-def run_stdio():
+
+def run_stdio(mode: str = "sdk"):
     """Run MCP server with STDIO transport."""
-    print("Starting MCP server with STDIO transport...")
-    mcp.run()
+    if mode == "fast":
+        # 批量传输使用 mcp SDK 的内部函数，SDK 版本不匹配时回退到默认传输
+        try:
+            from src.stdio import run_stdio_async
+        except ImportError as e:
+            print(f"Batched STDIO transport unavailable ({e}), using the SDK transport", file=sys.stderr)
+            mode = "sdk"
+    print(f"Starting MCP server with STDIO transport ({mode})...")
+    if mode == "sdk":
+        mcp.run()
+        return
+    import anyio
+    anyio.run(run_stdio_async, mcp)
 
 
-def run_sse(host: str = "0.0.0.0", port: int = 8000):
+def run_sse(host: str = "0.0.0.0", port: int = 8000, workers: int = 1, reloader: AuthReloader = None):
     """Run MCP server with HTTP/SSE transport via FastAPI."""
     print(f"Starting MCP server with HTTP/SSE transport on {host}:{port}")
+    if workers > 1:
+        from src.workers import run_workers
+        print(f"Using {workers} worker processes")
+        run_workers("sse", host, port, workers, get_auth_config(), reloader)
+        return
+    import uvicorn
+    from src.app import create_app
     app = create_app()
     uvicorn.run(app, host=host, port=port)
 
 
-def run_http(host: str = "0.0.0.0", port: int = 8000):
+def run_http(host: str = "0.0.0.0", port: int = 8000, workers: int = 1, reloader: AuthReloader = None):
     """Run MCP server with Streamable-HTTP transport."""
     print(f"Starting MCP server with Streamable-HTTP transport on {host}:{port}")
-    mcp.run(transport="streamable-http", host=host, port=port)
+    if workers > 1:
+        from src.workers import run_workers
+        print(f"Using {workers} worker processes")
+        run_workers("http", host, port, workers, get_auth_config(), reloader)
+        return
+    import uvicorn
+    from src.app import create_http_app
+    app = create_http_app()
+    uvicorn.run(app, host=host, port=port)
 
 
 def main():
@@ -49,6 +87,114 @@ def main():
         default=8000,
         help="Port for HTTP/SSE transport",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for HTTP/SSE transport",
+    )
+    parser.add_argument(
+        "--tool-threads",
+        type=int,
+        default=None,
+        help="Thread pool size for tools using thread execution",
+    )
+    parser.add_argument(
+        "--tool-processes",
+        type=int,
+        default=None,
+        help="Process pool size for tools using process execution",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Requests per second allowed per token",
+    )
+    parser.add_argument(
+        "--rate-burst",
+        type=int,
+        default=None,
+        help="Burst size for --rate-limit (defaults to the rate)",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=None,
+        help="Concurrent tool calls allowed per token",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=None,
+        help="Tool calls per token that may wait when --max-in-flight is reached",
+    )
+    parser.add_argument(
+        "--list-page-size",
+        type=int,
+        default=None,
+        help="Items per page for tools/resources/prompts listings (0 disables pagination)",
+    )
+    parser.add_argument(
+        "--stdio-mode",
+        type=str,
+        choices=["sdk", "fast"],
+        default="sdk",
+        help="STDIO transport implementation: the MCP SDK default (sdk) or batched reads/writes (fast, "
+             "relies on MCP SDK internals)",
+    )
+    parser.add_argument(
+        "--json",
+        type=str,
+        choices=["auto", "orjson", "msgspec", "json"],
+        default=None,
+        help="JSON backend for tool/resource results on all transports and for message framing with "
+             "--stdio-mode fast (falls back when not installed)",
+    )
+    parser.add_argument(
+        "--sse-max-sessions",
+        type=int,
+        default=None,
+        help="Maximum concurrent SSE sessions per worker, further connections get 503 (0 = unlimited, default 1000)",
+    )
+    parser.add_argument(
+        "--sse-idle-timeout",
+        type=float,
+        default=None,
+        help="Close SSE sessions without POSTs or outgoing messages for this many seconds (0 = never, default 900)",
+    )
+    parser.add_argument(
+        "--sse-ping-interval",
+        type=float,
+        default=None,
+        help="Seconds between SSE keep-alive comments (0 = disabled, default 15)",
+    )
+    parser.add_argument(
+        "--sse-queue-size",
+        type=int,
+        default=None,
+        help="Outgoing messages buffered per SSE session for slow clients (default 256)",
+    )
+    parser.add_argument(
+        "--sse-queue-policy",
+        type=str,
+        choices=["drop", "disconnect"],
+        default=None,
+        help="What to do when an SSE session's queue stays full past --sse-send-timeout: drop the message "
+             "or disconnect (default)",
+    )
+    parser.add_argument(
+        "--sse-send-timeout",
+        type=float,
+        default=None,
+        help="Seconds a stalled SSE write may block a full queue before --sse-queue-policy applies "
+             "(0 = wait forever, default 30)",
+    )
+    parser.add_argument(
+        "--strict-args",
+        action="store_true",
+        help="Validate tool arguments strictly, without type coercion (also MCP_STRICT_ARGS=1)",
+    )
     parser.add_argument(
         "--token",
         type=str,
@@ -62,6 +208,12 @@ def main():
         action="store_true",
         help="Disable authentication (not recommended)",
     )
+    parser.add_argument(
+        "--auth-file",
+        type=str,
+        default=None,
+        help="Path to JSON auth config file (reloaded on change or SIGHUP)",
+    )
     parser.add_argument(
         "--env-file",
         type=str,
@@ -71,15 +223,54 @@ def main():
 
     args = parser.parse_args()
 
+    # 通过环境变量传递，使 --workers 启动的子进程使用同样的配置
+    if args.tool_threads:
+        os.environ[THREADS_ENV] = str(args.tool_threads)
+    if args.tool_processes:
+        os.environ[PROCESSES_ENV] = str(args.tool_processes)
+    for env, value in (
+        (RATE_LIMIT_ENV, args.rate_limit),
+        (RATE_BURST_ENV, args.rate_burst),
+        (MAX_IN_FLIGHT_ENV, args.max_in_flight),
+        (MAX_QUEUE_ENV, args.max_queue),
+        (PAGE_SIZE_ENV, args.list_page_size),
+        (JSON_ENV, args.json),
+        (MAX_SESSIONS_ENV, args.sse_max_sessions),
+        (IDLE_TIMEOUT_ENV, args.sse_idle_timeout),
+        (PING_INTERVAL_ENV, args.sse_ping_interval),
+        (QUEUE_SIZE_ENV, args.sse_queue_size),
+        (QUEUE_POLICY_ENV, args.sse_queue_policy),
+        (SEND_TIMEOUT_ENV, args.sse_send_timeout),
+    ):
+        if value is not None:
+            os.environ[env] = str(value)
+    if args.strict_args:
+        os.environ[STRICT_ARGS_ENV] = "1"
+        mcp.strict_input_validation = True
+
+    reloader = None
     if args.no_auth:
         config = AuthConfig.disabled()
         configure_auth(config)
         print("Authentication disabled")
+    elif args.auth_file:
+        reloader = AuthReloader(args.auth_file, on_change=configure_auth)
+        try:
+            config = reloader.load()
+        except (OSError, ValueError) as e:
+            print(f"ERROR: Failed to load auth file {args.auth_file}: {e}")
+            sys.exit(1)
+        configure_auth(config)
+        print(f"Authentication loaded from {args.auth_file} with {len(config.tokens)} token(s)")
     else:
         tokens = args.tokens or []
         if not tokens:
             tokens = os.environ.get("MCP_AUTH_TOKEN", "").split(",")
             tokens = [t.strip() for t in tokens if t.strip()]
+        if not tokens and os.path.exists(args.env_file):
+            tokens = AuthConfig.from_env_file(args.env_file).tokens
+            if tokens:
+                reloader = AuthReloader(args.env_file, on_change=configure_auth, env_file=True)
 
         if tokens:
             config = AuthConfig(enabled=True, tokens=tokens)
@@ -90,12 +281,17 @@ def main():
             print("Please set --token or MCP_AUTH_TOKEN environment variable")
             sys.exit(1)
 
+    if reloader is not None:
+        reloader.start()
+        reloader.install_signal_handler()
+        print(f"Watching {reloader.path} for token changes (SIGHUP to reload)")
+
     if args.transport == "stdio":
-        run_stdio()
+        run_stdio(args.stdio_mode)
     elif args.transport == "http":
-        run_http(host=args.host, port=args.port)
+        run_http(host=args.host, port=args.port, workers=args.workers, reloader=reloader)
     else:
-        run_sse(host=args.host, port=args.port)
+        run_sse(host=args.host, port=args.port, workers=args.workers, reloader=reloader)
 
 
 if __name__ == "__main__":
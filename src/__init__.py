@@ -1,9 +1,28 @@
 """
 MCP包 - 项目源代码入口
+
+导出的名称在首次访问时才导入对应模块（PEP 562），
+stdio模式不会因为导入本包而加载 FastAPI 等HTTP依赖。
 """
 
-from .server import mcp, get_server, configure_auth
-from .app import create_app
-from .auth import AuthConfig, create_auth
+import importlib
+
+_EXPORTS = {
+    "mcp": ".server",
+    "get_server": ".server",
+    "configure_auth": ".server",
+    "create_app": ".app",
+    "AuthConfig": ".auth",
+    "create_auth": ".auth",
+}
 
 __all__ = ["mcp", "get_server", "configure_auth", "create_app", "AuthConfig"]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,351 @@
+"""
+准入控制模块 - 按token与工具限流
+
+两层控制，过载时快速失败而不是让所有请求一起变慢：
+
+- AdmissionMiddleware（ASGI）：按已验证token（未认证的请求按客户端IP）的令牌桶限速，
+  超限直接返回429
+- ToolAdmissionMiddleware（FastMCP）：tools/call 的并发上限与有界等待队列，
+  按token和工具分别计数，超限返回JSON-RPC错误
+
+每个token的默认限额来自环境变量（也可通过 main.py 的 --rate-limit 等参数设置）：
+MCP_RATE_LIMIT（每秒请求数）、MCP_RATE_BURST、MCP_MAX_IN_FLIGHT、MCP_MAX_QUEUE。
+单个工具的限额用 @rate_limit 指定。
+
+示例:
+    @mcp.tool
+    @rate_limit(rate=5, max_in_flight=2, max_queue=10)
+    def expensive(query: str) -> str:
+        ...
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Optional
+
+from fastmcp.exceptions import MCPError
+from fastmcp.server.auth import AccessToken
+from fastmcp.server.dependencies import get_access_token, get_http_request
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools import ToolResult
+from starlette.responses import JSONResponse
+
+
+RATE_LIMIT_ENV = "MCP_RATE_LIMIT"
+RATE_BURST_ENV = "MCP_RATE_BURST"
+MAX_IN_FLIGHT_ENV = "MCP_MAX_IN_FLIGHT"
+MAX_QUEUE_ENV = "MCP_MAX_QUEUE"
+
+# 令牌桶与并发计数的键数上限，超出时先清除空闲的键，仍超出时按LRU淘汰令牌桶
+MAX_KEYS = 10000
+
+# JSON-RPC错误码（服务器保留区间）
+OVERLOADED_ERROR = -32001
+
+
+class Overloaded(Exception):
+    """请求被准入控制拒绝"""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class Limit:
+    """
+    限额配置
+
+    rate为每秒允许的请求数（令牌桶），burst为桶容量，默认与rate相同；
+    max_in_flight为同时执行的上限，超出后最多max_queue个请求排队等待
+    queue_timeout秒，其余直接拒绝。None表示不限制。
+    """
+    rate: Optional[float] = None
+    burst: Optional[int] = None
+    max_in_flight: Optional[int] = None
+    max_queue: int = 0
+    queue_timeout: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> Optional["Limit"]:
+        """从环境变量读取每个token的默认限额，均未设置时返回None"""
+        rate = os.environ.get(RATE_LIMIT_ENV, "").strip()
+        burst = os.environ.get(RATE_BURST_ENV, "").strip()
+        in_flight = os.environ.get(MAX_IN_FLIGHT_ENV, "").strip()
+        queue = os.environ.get(MAX_QUEUE_ENV, "").strip()
+        if not (rate or in_flight):
+            return None
+        return cls(
+            rate=float(rate) if rate else None,
+            burst=int(burst) if burst else None,
+            max_in_flight=int(in_flight) if in_flight else None,
+            max_queue=int(queue) if queue else 0,
+        )
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst if burst is not None else max(1, math.ceil(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def acquire(self) -> float:
+        """取一个令牌，成功返回0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def idle(self, now: float) -> bool:
+        """已回满：丢弃后重新创建的令牌桶与其等价"""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class _Gate:
+    """并发上限与有界FIFO等待队列"""
+
+    def __init__(self, limit: Limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+    async def enter(self, name: str):
+        limit = self.limit
+        if self.in_flight < limit.max_in_flight and not self.waiters:
+            self.in_flight += 1
+            return
+        if len(self.waiters) >= limit.max_queue:
+            raise Overloaded(f"Too many concurrent requests for {name}")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, limit.queue_timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded(f"Queue wait timed out for {name}", limit.queue_timeout) from None
+        except BaseException:
+            # 已拿到槽位却被取消时转交给下一个等待者
+            if waiter.done() and not waiter.cancelled():
+                self.leave()
+            raise
+        finally:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+        # 槽位已由 leave() 直接转交，in_flight 不变
+
+    def leave(self):
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class AdmissionController:
+    """
+    准入控制器
+
+    按键（token、工具名）维护令牌桶与并发计数。
+    token_limit未显式设置时，在首次使用时从环境变量读取。
+    """
+
+    def __init__(self, token_limit: Optional[Limit] = None, max_keys: int = MAX_KEYS):
+        self._token_limit = token_limit
+        self._token_limit_loaded = token_limit is not None
+        self.max_keys = max_keys
+        self.tool_limits: Dict[str, Limit] = {}
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._gates: Dict[str, _Gate] = {}
+        self.rejected = 0
+
+    @property
+    def token_limit(self) -> Optional[Limit]:
+        if not self._token_limit_loaded:
+            self._token_limit = Limit.from_env()
+            self._token_limit_loaded = True
+        return self._token_limit
+
+    @token_limit.setter
+    def token_limit(self, limit: Optional[Limit]):
+        self._token_limit = limit
+        self._token_limit_loaded = True
+        self._buckets = OrderedDict((k, v) for k, v in self._buckets.items() if k.startswith("tool:"))
+        self._gates = {k: v for k, v in self._gates.items() if k.startswith("tool:")}
+
+    def check_rate(self, key: str, limit: Optional[Limit]):
+        """令牌桶检查，超限抛出 Overloaded"""
+        if limit is None or limit.rate is None:
+            return
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune_buckets()
+            bucket = self._buckets[key] = TokenBucket(limit.rate, limit.burst)
+        else:
+            self._buckets.move_to_end(key)
+        wait = bucket.acquire()
+        if wait:
+            self.rejected += 1
+            raise Overloaded(f"Rate limit exceeded for {key}", wait)
+
+    async def enter(self, key: str, limit: Optional[Limit]) -> Optional[_Gate]:
+        """占用一个并发槽位，返回的gate需在结束后调用 leave()"""
+        if limit is None or limit.max_in_flight is None:
+            return None
+        gate = self._gates.get(key)
+        if gate is None:
+            if len(self._gates) >= self.max_keys:
+                # 没有执行中与排队调用的gate可以丢弃，需要时重新创建
+                self._gates = {k: g for k, g in self._gates.items() if g.in_flight or g.waiters}
+            gate = self._gates[key] = _Gate(limit)
+        try:
+            await gate.enter(key)
+        except Overloaded:
+            self.rejected += 1
+            raise
+        return gate
+
+    def _prune_buckets(self):
+        now = time.monotonic()
+        for key in [k for k, bucket in self._buckets.items() if bucket.idle(now)]:
+            del self._buckets[key]
+        while len(self._buckets) >= self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        """当前执行中、排队中的调用数与累计拒绝数"""
+        return {
+            "in_flight": sum(gate.in_flight for gate in self._gates.values()),
+            "queued": sum(len(gate.waiters) for gate in self._gates.values()),
+            "rejected": self.rejected,
+        }
+
+
+admission = AdmissionController()
+
+
+def _token_key(access: AccessToken) -> str:
+    """已验证token的键：token的完整SHA-256摘要，不同token不会共用限额"""
+    return "token:" + hashlib.sha256(access.token.encode("utf-8")).hexdigest()
+
+
+def client_key(scope, access: Optional[AccessToken] = None) -> str:
+    """限速的键：已验证的token（默认取认证中间件放入scope的token），其余请求使用客户端IP，
+    未经验证的Authorization头不会产生新的键"""
+    if access is None:
+        access = getattr(scope.get("user"), "access_token", None)
+    if access is not None:
+        return _token_key(access)
+    client = scope.get("client")
+    return "client:" + (client[0] if client else "unknown")
+
+
+def _caller_key() -> str:
+    """MCP请求的限额键，与 client_key 一致；stdio没有HTTP请求，整个进程只有一个客户端"""
+    access = get_access_token()
+    if access is not None:
+        return _token_key(access)
+    try:
+        request = get_http_request()
+    except RuntimeError:
+        return "client:local"
+    return client_key(request.scope)
+
+
+def overloaded_response(e: Overloaded) -> JSONResponse:
+    """超过限速时的429响应"""
+    return JSONResponse(
+        {"error": e.reason}, status_code=429, headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """按token限速的ASGI中间件，用于 mcp.http_app(middleware=...)，需位于认证中间件之内"""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            self.controller.check_rate(client_key(scope), self.controller.token_limit)
+        except Overloaded as e:
+            await overloaded_response(e)(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+
+class ToolAdmissionMiddleware(Middleware):
+    """tools/call 的并发与限速控制，拒绝时返回JSON-RPC错误"""
+
+    def __init__(self, controller: Optional[AdmissionController] = None):
+        self.controller = controller or admission
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext) -> ToolResult:
+        controller = self.controller
+        name = context.message.name
+        tool_limit = controller.tool_limits.get(name)
+        token_limit = controller.token_limit
+        if tool_limit is None and (token_limit is None or token_limit.max_in_flight is None):
+            return await call_next(context)
+
+        token_key = _caller_key()
+        gates = []
+        try:
+            controller.check_rate("tool:" + name, tool_limit)
+            gate = await controller.enter("tool:" + name, tool_limit)
+            if gate is not None:
+                gates.append(gate)
+            gate = await controller.enter(token_key, token_limit)
+            if gate is not None:
+                gates.append(gate)
+            return await call_next(context)
+        except Overloaded as e:
+            raise MCPError(OVERLOADED_ERROR, e.reason, {"retry_after": e.retry_after}) from None
+        finally:
+            for gate in gates:
+                gate.leave()
+
+
+def rate_limit(
+    rate: Optional[float] = None,
+    burst: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    max_queue: int = 0,
+    queue_timeout: float = 1.0,
+    name: Optional[str] = None,
+) -> Callable:
+    """
+    为工具设置限额（所有token共享）
+
+    Args:
+        rate: 每秒允许的调用数
+        burst: 令牌桶容量，默认与rate相同
+        max_in_flight: 同时执行的最大调用数
+        max_queue: 并发已满时最多排队的调用数
+        queue_timeout: 排队等待的最长时间（秒）
+        name: 工具名，默认使用函数名
+    """
+    limit = Limit(rate=rate, burst=burst, max_in_flight=max_in_flight,
+                  max_queue=max_queue, queue_timeout=queue_timeout)
+
+    def decorator(fn: Callable) -> Callable:
+        admission.tool_limits[name or fn.__name__] = limit
+        return fn
+    return decorator
@@ -3,23 +3,44 @@ FastAPI应用模块 - HTTP/SSE传输支持
 """
 
 from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastmcp import FastMCP
+from starlette.middleware import Middleware
+from starlette.routing import Route
 
+from .admission import AdmissionMiddleware
+from .batching import BatchMiddleware
+from .metrics import HTTPMetricsMiddleware, metrics_endpoint
+from .ranges import raw_resource_endpoint
 from .server import mcp
+from .sessions import SessionManager, SessionMiddleware, sessions_endpoint
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    mcp_app = mcp.http_app(transport="sse")
-    app.state.mcp_app = mcp_app
-    yield
+def _http_middleware(sessions: Optional[SessionManager] = None) -> list:
+    """
+    MCP HTTP应用的ASGI中间件（由外到内），SSE传输额外管理会话
+
+    批量请求在限速之前拆分，每条消息各消耗一个令牌
+    """
+    middleware = [Middleware(HTTPMetricsMiddleware), Middleware(BatchMiddleware), Middleware(AdmissionMiddleware)]
+    if sessions is not None:
+        middleware.append(Middleware(SessionMiddleware, manager=sessions))
+    return middleware
 
 
 def create_app() -> FastAPI:
     """创建FastAPI应用"""
-    mcp_app = mcp.http_app(transport="sse")
+    sessions = SessionManager()
+    mcp_app = mcp.http_app(transport="sse", middleware=_http_middleware(sessions))
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # 挂载的子应用不会自动执行自身的lifespan，由FastAPI的lifespan驱动，
+        # 服务器的启动、后台任务与关闭清理都随FastAPI应用一起进行
+        async with mcp_app.lifespan(mcp_app):
+            yield
 
     app = FastAPI(
         title="FastAPI MCP Server",
@@ -27,6 +48,8 @@ def create_app() -> FastAPI:
         lifespan=lifespan,
     )
 
+    app.state.mcp_app = mcp_app
+    app.state.sessions = sessions
     app.mount("/mcp", mcp_app)
 
     app.add_middleware(
@@ -41,6 +64,11 @@ def create_app() -> FastAPI:
     async def health_check():
         return {"status": "healthy", "server": "fastapi-mcp"}
 
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
+    app.add_route("/resources/raw", raw_resource_endpoint, methods=["GET"], include_in_schema=False)
+    app.add_route("/admin/sessions", sessions_endpoint, methods=["GET"], include_in_schema=False)
+    app.add_route("/admin/sessions/{session_id}", sessions_endpoint, methods=["DELETE"], include_in_schema=False)
+
     @app.get("/")
     async def root():
         return {
@@ -48,9 +76,20 @@ def create_app() -> FastAPI:
             "version": "1.0.0",
             "endpoints": {
                 "health": "/health",
+                "metrics": "/metrics",
+                "resources": "/resources/raw?uri=... (GET - file resources, supports Range)",
+                "sessions": "/admin/sessions (GET - list SSE sessions, DELETE /admin/sessions/{id} - close one)",
                 "sse": "/mcp/sse (GET - SSE stream)",
                 "messages": "/mcp/messages (POST - JSON-RPC)",
             },
         }
 
     return app
+
+
+def create_http_app():
+    """创建Streamable-HTTP传输的ASGI应用（MCP端点为 /mcp）"""
+    app = mcp.http_app(transport="streamable-http", middleware=_http_middleware())
+    app.router.routes.append(Route("/metrics", metrics_endpoint, methods=["GET"]))
+    app.router.routes.append(Route("/resources/raw", raw_resource_endpoint, methods=["GET"]))
+    return app
@@ -2,20 +2,248 @@
 认证模块 - 支持Bearer Token认证
 """
 
+import hashlib
+import hmac
+import logging
 import os
+import signal
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List
-from fastmcp.server.auth import StaticTokenVerifier, TokenVerifier
+from typing import Optional, Dict, Any, Callable, Iterable, List, Tuple
+from fastmcp.server.auth import AccessToken, AuthContext, TokenVerifier
+from fastmcp.server.middleware.authorization import AuthMiddleware
 
 
+logger = logging.getLogger(__name__)
+
 AUTH_TOKEN_ENV = "MCP_AUTH_TOKEN"
 
+# 配置中以该前缀开头的token表示已哈希的SHA-256摘要（十六进制）
+HASHED_TOKEN_PREFIX = "sha256:"
+
+
+def hash_token(token: str) -> str:
+    """计算token的SHA-256摘要，返回可直接写入配置的 sha256:<hex> 形式"""
+    return HASHED_TOKEN_PREFIX + hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _token_digest(token: str) -> bytes:
+    """将配置中的token（明文或 sha256:<hex>）转换为摘要字节"""
+    if token.startswith(HASHED_TOKEN_PREFIX):
+        return bytes.fromhex(token[len(HASHED_TOKEN_PREFIX):])
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
 
 @dataclass
 class BearerToken:
     """Bearer Token配置"""
     token: str
     scopes: list[str] = field(default_factory=list)
+    expires_at: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class _TokenEntry:
+    digest: bytes
+    client_id: str
+    scopes: Tuple[str, ...]
+    expires_at: Optional[float]
+
+
+class HashedTokenVerifier(TokenVerifier):
+    """
+    基于SHA-256摘要索引的Token验证器
+
+    只保存token的摘要，验证时先计算摘要再做O(1)的字典查找，
+    最后用 hmac.compare_digest 做常数时间比较。每个token携带自己的
+    scopes和过期时间。
+    
+    update() 先构建完整的新索引再整体替换引用，运行中的请求
+    要么看到旧索引要么看到新索引，不会看到中间状态。
+    """
+
+    def __init__(self, tokens: Iterable[BearerToken], required_scopes: Optional[List[str]] = None):
+        super().__init__(required_scopes=required_scopes)
+        self._index: Dict[bytes, _TokenEntry] = self._build_index(tokens)
+        self.version = 0
+
+    def update(self, tokens: Iterable[BearerToken]):
+        """原子替换token集合"""
+        index = self._build_index(tokens)
+        self._index = index
+        self.version += 1
+
+    @staticmethod
+    def _build_index(tokens: Iterable[BearerToken]) -> Dict[bytes, _TokenEntry]:
+        index: Dict[bytes, _TokenEntry] = {}
+        for bearer in tokens:
+            digest = _token_digest(bearer.token)
+            index[digest] = _TokenEntry(
+                digest=digest,
+                # 用作限速、会话归属等的调用方身份，取128位避免不同token冲突
+                client_id=f"token-{digest[:16].hex()}",
+                scopes=tuple(bearer.scopes),
+                expires_at=bearer.expires_at,
+            )
+        return index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    async def verify_token(self, token: str) -> Optional[AccessToken]:
+        """验证token，返回访问信息；无效、过期或缺少必需scope时返回None"""
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        entry = self._index.get(digest)
+        if entry is None or not hmac.compare_digest(entry.digest, digest):
+            return None
+        if entry.expires_at is not None and entry.expires_at < time.time():
+            return None
+        if self.required_scopes and not set(self.required_scopes).issubset(entry.scopes):
+            return None
+        return AccessToken(
+            token=token,
+            client_id=entry.client_id,
+            scopes=list(entry.scopes),
+            expires_at=int(entry.expires_at) if entry.expires_at is not None else None,
+        )
+
+
+class CachedTokenVerifier(TokenVerifier):
+    """
+    验证结果缓存（LRU + TTL），可包装任意 TokenVerifier
+    
+    - 有效token缓存 ttl 秒，且不超过token自身的过期时间
+    - 无效token缓存 negative_ttl 秒（负缓存），避免重复验证错误token
+    - 以token的SHA-256摘要作为键，缓存条目大小与token长度无关
+    - 被包装的验证器带有 version 属性时（如 HashedTokenVerifier），
+      版本变化（token轮换）会自动清空缓存
+    """
+    
+    def __init__(
+        self,
+        verifier: TokenVerifier,
+        maxsize: int = 10000,
+        ttl: float = 60.0,
+        negative_ttl: float = 5.0,
+    ):
+        super().__init__(
+            base_url=verifier.base_url,
+            required_scopes=verifier.required_scopes,
+        )
+        self.verifier = verifier
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._cache: "OrderedDict[bytes, Tuple[float, Optional[AccessToken]]]" = OrderedDict()
+        self._version = getattr(verifier, "version", None)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def invalidate(self):
+        """清空缓存"""
+        self._cache.clear()
+        self._version = getattr(self.verifier, "version", None)
+    
+    def stats(self) -> Dict[str, int]:
+        """返回缓存命中统计"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._cache),
+        }
+    
+    async def verify_token(self, token: str) -> Optional[AccessToken]:
+        """优先从缓存返回验证结果，未命中时委托给被包装的验证器"""
+        if getattr(self.verifier, "version", None) != self._version:
+            self.invalidate()
+        
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires, access = cached
+            if expires > now:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return access
+            del self._cache[key]
+        
+        self.misses += 1
+        access = await self.verifier.verify_token(token)
+        if access is None:
+            expires = now + self.negative_ttl
+        else:
+            expires = now + self.ttl
+            if access.expires_at is not None:
+                expires = min(expires, now + access.expires_at - time.time())
+        
+        self._cache[key] = (expires, access)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+            self.evictions += 1
+        return access
+
+
+def unwrap_verifier(verifier: Optional[TokenVerifier]) -> Optional[TokenVerifier]:
+    """返回缓存包装器内部的验证器"""
+    while isinstance(verifier, CachedTokenVerifier):
+        verifier = verifier.verifier
+    return verifier
+
+
+async def request_access_token(server, request) -> Optional[AccessToken]:
+    """HTTP请求的Bearer token对应的访问信息，缺少或无效时返回None"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if server.auth is None or scheme.lower() != "bearer" or not token:
+        return None
+    return await server.auth.verify_token(token)
+
+
+async def verify_request(server, request) -> bool:
+    """校验HTTP请求的Bearer token，用于 /mcp 之外的HTTP端点；服务器未启用认证时总是通过"""
+    if server.auth is None:
+        return True
+    return await request_access_token(server, request) is not None
+
+
+class ToolScopeCheck:
+    """
+    按工具名校验scope的授权检查，配合 fastmcp 的 AuthMiddleware 使用
+
+    tool_scopes 中未列出的工具不做限制。
+    """
+
+    def __init__(self, tool_scopes: Optional[Dict[str, List[str]]] = None):
+        self.tool_scopes: Dict[str, List[str]] = dict(tool_scopes or {})
+
+    def __call__(self, ctx: AuthContext) -> bool:
+        if ctx.tool is None:
+            return True
+        required = self.tool_scopes.get(ctx.tool.name)
+        if not required:
+            return True
+        if ctx.token is None:
+            return False
+        return set(required).issubset(ctx.token.scopes)
+
+
+class ScopeAuthMiddleware(AuthMiddleware):
+    """
+    只在服务器启用认证时做授权检查的 AuthMiddleware
+
+    中间件在创建服务器时安装，认证可以之后通过 configure_auth 开启或关闭；
+    未启用认证时直接放行，未知组件仍得到原有的“未找到”错误。
+    """
+
+    async def __call__(self, context, call_next):
+        fastmcp = context.fastmcp_context
+        if fastmcp is not None and fastmcp.fastmcp.auth is None:
+            return await call_next(context)
+        return await super().__call__(context, call_next)
 
 
 @dataclass
@@ -35,10 +263,23 @@ class AuthConfig:
         
         # 从配置文件加载
         config = AuthConfig.from_file("config.json")
+        
+        # 带scope和过期时间的token，以及按工具限制scope
+        config.add_token("secret-token", scopes=["read"], expires_at=time.time() + 3600)
+        config.tool_scopes["get_weather"] = ["read"]
+        
+        # 缓存验证结果60秒
+        config = AuthConfig(enabled=True, tokens=["secret-token"], cache_ttl=60)
+    
+    tokens 中的条目可以是明文token，也可以是 hash_token() 生成的 sha256:<hex> 摘要。
     """
     enabled: bool = True
     tokens: List[str] = field(default_factory=list)
     require_auth: bool = True
+    token_scopes: Dict[str, List[str]] = field(default_factory=dict)
+    token_expiry: Dict[str, float] = field(default_factory=dict)
+    tool_scopes: Dict[str, List[str]] = field(default_factory=dict)
+    cache_ttl: Optional[float] = None
     
     @classmethod
     def from_env(cls, env_var: str = AUTH_TOKEN_ENV) -> "AuthConfig":
@@ -61,18 +302,56 @@ class AuthConfig:
         enabled = bool(tokens)
         return cls(enabled=enabled, tokens=tokens)
     
+    @classmethod
+    def from_env_file(cls, path: str, env_var: str = AUTH_TOKEN_ENV) -> "AuthConfig":
+        """
+        从.env文件加载认证配置，支持的变量与 from_env 相同
+        
+        文件不存在时抛出 FileNotFoundError。
+        """
+        values: Dict[str, str] = {}
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                key, value = line.split("=", 1)
+                values[key.strip()] = value.strip().strip("'\"")
+        
+        tokens: List[str] = []
+        if values.get(env_var):
+            tokens.append(values[env_var])
+        tokens.extend([t.strip() for t in values.get(f"{env_var}S", "").split(",") if t.strip()])
+        return cls(enabled=bool(tokens), tokens=tokens)
+    
     @classmethod
     def from_file(cls, path: str) -> "AuthConfig":
-        """从JSON文件加载认证配置"""
+        """
+        从JSON文件加载认证配置
+        
+        tokens 中的条目可以是字符串，也可以是对象:
+            {"token": "...", "scopes": ["read"], "expires_at": 1700000000}
+        """
         import json
         try:
             with open(path, "r") as f:
                 data = json.load(f)
-            return cls(
+            config = cls(
                 enabled=data.get("enabled", True),
-                tokens=data.get("tokens", []),
-                require_auth=data.get("require_auth", True)
+                require_auth=data.get("require_auth", True),
+                tool_scopes=data.get("tool_scopes", {}),
+                cache_ttl=data.get("cache_ttl"),
             )
+            for entry in data.get("tokens", []):
+                if isinstance(entry, str):
+                    config.add_token(entry)
+                else:
+                    config.add_token(
+                        entry["token"],
+                        scopes=entry.get("scopes"),
+                        expires_at=entry.get("expires_at"),
+                    )
+            return config
         except FileNotFoundError:
             return cls(enabled=False)
         except json.JSONDecodeError:
@@ -86,19 +365,45 @@ class AuthConfig:
     def save_to_file(self, path: str):
         """保存配置到JSON文件"""
         import json
+        tokens: List[Any] = []
+        for bearer in self.bearer_tokens():
+            if not bearer.scopes and bearer.expires_at is None:
+                tokens.append(bearer.token)
+                continue
+            entry: Dict[str, Any] = {"token": bearer.token, "scopes": bearer.scopes}
+            if bearer.expires_at is not None:
+                entry["expires_at"] = bearer.expires_at
+            tokens.append(entry)
         data = {
             "enabled": self.enabled,
-            "tokens": self.tokens,
+            "tokens": tokens,
             "require_auth": self.require_auth
         }
+        if self.tool_scopes:
+            data["tool_scopes"] = self.tool_scopes
+        if self.cache_ttl is not None:
+            data["cache_ttl"] = self.cache_ttl
         with open(path, "w") as f:
             json.dump(data, f, indent=2)
     
-    def add_token(self, token: str, scopes: list[str] = None):
+    def add_token(self, token: str, scopes: list[str] = None, expires_at: Optional[float] = None):
         """添加一个token"""
-        if scopes is None:
-            scopes = []
         self.tokens.append(token)
+        if scopes:
+            self.token_scopes[token] = list(scopes)
+        if expires_at is not None:
+            self.token_expiry[token] = expires_at
+    
+    def bearer_tokens(self) -> List[BearerToken]:
+        """返回带scope与过期时间的token列表"""
+        return [
+            BearerToken(
+                token=token,
+                scopes=list(self.token_scopes.get(token, [])),
+                expires_at=self.token_expiry.get(token),
+            )
+            for token in self.tokens
+        ]
     
     def validate(self) -> bool:
         """验证配置是否有效"""
@@ -113,10 +418,10 @@ class AuthConfig:
                 raise ValueError("Authentication is required but no tokens configured")
             return None
         
-        token_map: Dict[str, Dict[str, Any]] = {
-            token: {"scopes": []} for token in self.tokens
-        }
-        return StaticTokenVerifier(tokens=token_map)
+        verifier: TokenVerifier = HashedTokenVerifier(self.bearer_tokens())
+        if self.cache_ttl:
+            verifier = CachedTokenVerifier(verifier, ttl=self.cache_ttl)
+        return verifier
 
 
 def create_auth(config: AuthConfig) -> Optional[TokenVerifier]:
@@ -124,3 +429,105 @@ def create_auth(config: AuthConfig) -> Optional[TokenVerifier]:
     if not config.validate():
         raise ValueError("Invalid auth configuration")
     return config._create_verifier()
+
+
+class AuthReloader:
+    """
+    认证配置热加载器
+    
+    监视JSON配置文件（AuthConfig.from_file）或.env文件（AuthConfig.from_env_file），
+    文件变化或收到SIGHUP时重新加载并调用 on_change 应用新配置。
+    加载失败（文件缺失、格式错误、配置无效）时保留原有配置。
+    
+    示例:
+        reloader = AuthReloader("auth.json", on_change=configure_auth)
+        reloader.start()
+        reloader.install_signal_handler()
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        on_change: Callable[[AuthConfig], None],
+        env_file: bool = False,
+        interval: float = 1.0,
+    ):
+        self.path = path
+        self.on_change = on_change
+        self.env_file = env_file
+        self.interval = interval
+        self._mtime: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+    
+    def __getstate__(self):
+        # 用于传递给worker进程，线程和锁在子进程中重新创建
+        return {
+            "path": self.path,
+            "on_change": self.on_change,
+            "env_file": self.env_file,
+            "interval": self.interval,
+        }
+    
+    def __setstate__(self, state):
+        self.__init__(**state)
+    
+    def load(self) -> AuthConfig:
+        """读取配置文件"""
+        if self.env_file:
+            return AuthConfig.from_env_file(self.path)
+        if not os.path.exists(self.path):
+            # from_file 对缺失文件返回禁用配置，热加载时不能因此关闭认证
+            raise FileNotFoundError(self.path)
+        return AuthConfig.from_file(self.path)
+    
+    def reload(self) -> bool:
+        """重新加载并应用配置，成功返回True"""
+        with self._lock:
+            try:
+                self._mtime = os.stat(self.path).st_mtime
+                config = self.load()
+                if not config.validate():
+                    raise ValueError("Invalid auth configuration")
+                self.on_change(config)
+            except (OSError, ValueError) as e:
+                logger.warning("Failed to reload auth config from %s: %s", self.path, e)
+                return False
+        logger.info("Reloaded auth config from %s (%d token(s))", self.path, len(config.tokens))
+        return True
+    
+    def _changed(self) -> bool:
+        try:
+            return os.stat(self.path).st_mtime != self._mtime
+        except OSError:
+            return False
+    
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if self._changed():
+                self.reload()
+    
+    def start(self):
+        """启动文件监视线程"""
+        if self._thread is not None:
+            return
+        try:
+            self._mtime = os.stat(self.path).st_mtime
+        except OSError:
+            self._mtime = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="auth-reloader", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止文件监视线程"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def install_signal_handler(self):
+        """收到SIGHUP时重新加载（仅支持POSIX，需在主线程调用）"""
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self.reload())
@@ -0,0 +1,237 @@
+"""
+批量请求模块 - JSON-RPC batch 支持
+
+BatchMiddleware 拦截请求体为 JSON 数组的 POST，把数组中的每条消息作为
+独立的内部请求并发交给 MCP 应用处理：
+
+- SSE 传输（/mcp/messages）：每条消息的响应照常通过 SSE 流返回，
+  有消息被接受时返回 202，未被接受的消息在响应体中逐条以JSON-RPC错误返回
+- Streamable-HTTP 传输：以 text/event-stream 返回，每条响应在对应请求
+  完成时立即作为一个 message 事件写出，不必等待整个批次
+"""
+
+import asyncio
+import json
+from typing import List, Optional, Tuple
+
+
+# JSON-RPC错误码
+INVALID_REQUEST = -32600
+INTERNAL_ERROR = -32603
+
+
+class _SubResponse:
+    """收集单个内部请求的响应，并把其中的 JSON-RPC 消息推入队列"""
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+        self.status = 500
+        self.content_type = b""
+        self.body = bytearray()
+        self.emitted = 0
+        self._buffer = b""
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            for key, value in message.get("headers", []):
+                if key.lower() == b"content-type":
+                    self.content_type = value.split(b";")[0].strip().lower()
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if self.content_type == b"text/event-stream":
+                await self._feed_events(chunk)
+            else:
+                self.body.extend(chunk)
+
+    async def _feed_events(self, chunk: bytes):
+        self._buffer += chunk.replace(b"\r\n", b"\n")
+        while b"\n\n" in self._buffer:
+            event, self._buffer = self._buffer.split(b"\n\n", 1)
+            data = [line[5:].lstrip() for line in event.split(b"\n") if line.startswith(b"data:")]
+            if data:
+                self.emitted += 1
+                await self.queue.put(b"\n".join(data))
+
+    async def finish(self):
+        # 只转发JSON-RPC消息；429等中间件的错误响应由批量处理转换为JSON-RPC错误
+        if self.content_type == b"application/json" and _is_jsonrpc(bytes(self.body)):
+            self.emitted += 1
+            await self.queue.put(bytes(self.body))
+
+
+def _is_jsonrpc(body: bytes) -> bool:
+    try:
+        message = json.loads(body)
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("jsonrpc") == "2.0"
+
+
+def _parse_batch(body: bytes) -> Optional[List[bytes]]:
+    """请求体是 JSON 数组时返回逐条序列化后的消息，否则返回None"""
+    if not body.lstrip().startswith(b"["):
+        return None
+    try:
+        items = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(items, list) or not items:
+        return None
+    return [json.dumps(item, separators=(",", ":")).encode("utf-8") for item in items]
+
+
+class BatchMiddleware:
+    """JSON-RPC batch 中间件（ASGI），用于 mcp.http_app(middleware=...)"""
+
+    def __init__(self, app, max_batch_size: int = 500):
+        self.app = app
+        self.max_batch_size = max_batch_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        body, more_messages = await self._read_body(receive)
+        batch = _parse_batch(body) if not more_messages else None
+        if batch is None:
+            await self.app(scope, self._replay(body, more_messages, receive), send)
+            return
+
+        if len(batch) > self.max_batch_size:
+            await self._send_plain(send, 413, f"Batch size exceeds {self.max_batch_size}".encode())
+            return
+        await self._handle_batch(scope, batch, send)
+
+    @staticmethod
+    async def _read_body(receive) -> Tuple[bytes, List[dict]]:
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return bytes(body), [message]
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                return bytes(body), []
+
+    @staticmethod
+    def _replay(body: bytes, pending: List[dict], receive):
+        sent = False
+
+        async def replay_receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        return replay_receive
+
+    async def _handle_batch(self, scope, batch: List[bytes], send):
+        queue: asyncio.Queue = asyncio.Queue()
+        responses = [_SubResponse(queue) for _ in batch]
+
+        async def run(item: bytes, response: _SubResponse):
+            headers = [
+                (key, value) for key, value in scope.get("headers", [])
+                if key.lower() != b"content-length"
+            ]
+            headers.append((b"content-length", str(len(item)).encode()))
+            sub_scope = dict(scope, headers=headers)
+            try:
+                await self.app(sub_scope, self._replay(item, [], _never_disconnect), response.send)
+            finally:
+                await response.finish()
+
+        async def run_all():
+            try:
+                await asyncio.gather(*(run(item, resp) for item, resp in zip(batch, responses)))
+            finally:
+                await queue.put(None)
+
+        task = asyncio.create_task(run_all())
+        started = False
+        try:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                if not started:
+                    started = True
+                    await send({
+                        "type": "http.response.start",
+                        "status": 200,
+                        "headers": [
+                            (b"content-type", b"text/event-stream"),
+                            (b"cache-control", b"no-store"),
+                        ],
+                    })
+                await send({
+                    "type": "http.response.body",
+                    "body": b"event: message\ndata: " + message + b"\n\n",
+                    "more_body": True,
+                })
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+        if started:
+            # 没有产生JSON-RPC响应的失败请求（如被限速）补发对应的错误
+            for i, response in enumerate(responses):
+                if response.status >= 300 and not response.emitted:
+                    error = json.dumps(_item_error(batch[i], i, response)).encode("utf-8")
+                    await send({
+                        "type": "http.response.body",
+                        "body": b"event: message\ndata: " + error + b"\n\n",
+                        "more_body": True,
+                    })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        failed = [i for i, r in enumerate(responses) if r.status >= 300]
+        if not failed:
+            await self._send_plain(send, 202, b"Accepted")
+        elif len(failed) == len(responses):
+            # 没有任何消息被接受（如会话不存在），整个批次返回该错误
+            await self._send_plain(send, responses[0].status, bytes(responses[0].body))
+        else:
+            # 其余消息已被接受并执行，批次仍返回202，失败的消息逐条以JSON-RPC错误返回
+            errors = [_item_error(batch[i], i, responses[i]) for i in failed]
+            await send({
+                "type": "http.response.start",
+                "status": 202,
+                "headers": [(b"content-type", b"application/json")],
+            })
+            await send({"type": "http.response.body", "body": json.dumps(errors).encode("utf-8")})
+
+    @staticmethod
+    async def _send_plain(send, status: int, body: bytes):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _item_error(item: bytes, index: int, response: _SubResponse) -> dict:
+    """批量中未被接受的单条消息对应的JSON-RPC错误，data中带有其在批量中的位置与HTTP状态"""
+    message = json.loads(item)
+    return {
+        "jsonrpc": "2.0",
+        "id": message.get("id") if isinstance(message, dict) else None,
+        "error": {
+            "code": INVALID_REQUEST if response.status < 500 else INTERNAL_ERROR,
+            "message": bytes(response.body).decode("utf-8", "replace") or f"HTTP {response.status}",
+            "data": {"index": index, "status": response.status},
+        },
+    }
+
+
+async def _never_disconnect():
+    # 内部请求的请求体已一次性给出，之后不会再有客户端消息
+    await asyncio.Event().wait()
@@ -0,0 +1,399 @@
+"""
+缓存模块 - 纯函数工具的结果缓存与资源缓存
+
+使用 @cacheable 标记结果只取决于参数的工具，命中缓存时直接返回结果，
+跳过参数校验与工具执行。
+
+使用 @cacheable_resource 标记内容不随调用方变化的资源，按URI缓存读取结果
+（已序列化的内容），命中时不再调用资源函数。每个结果的 _meta.etag 是内容哈希，
+客户端在请求 _meta.ifNoneMatch 中带上之前的etag，内容未变化时只返回
+_meta.notModified=true。资源内容变化（显式 invalidate，或过期后重新读取得到不同的
+etag）时向订阅了该URI的客户端发送 notifications/resources/updated，客户端不必轮询。
+
+示例:
+    @mcp.tool
+    @cacheable()
+    def add(a: int, b: int) -> int:
+        return a + b
+
+    @mcp.tool
+    @cacheable(ttl=60)
+    def get_weather(city: str) -> dict:
+        ...
+
+    @mcp.resource("config://app-info")
+    @cacheable_resource(ttl=300)
+    def get_app_info() -> dict:
+        ...
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastmcp.resources import ResourceResult
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from fastmcp.tools import ToolResult
+from mcp.server.subscriptions import ResourceUpdated
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachePolicy:
+    """单个工具的缓存策略"""
+    maxsize: int = 256
+    ttl: Optional[float] = None
+    max_bytes: int = 1024 * 1024
+
+
+@dataclass
+class _ToolCache:
+    policy: CachePolicy
+    entries: "OrderedDict[str, Tuple[Optional[float], int, ToolResult]]" = field(default_factory=OrderedDict)
+    bytes: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+def _canonical_key(arguments: Optional[Dict[str, Any]]) -> str:
+    """将参数规范化为缓存键（键排序、紧凑分隔符）"""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _result_size(result: ToolResult) -> int:
+    """估算结果占用的字节数"""
+    size = sum(len(block.model_dump_json()) for block in result.content)
+    if result.structured_content is not None:
+        size += len(json.dumps(result.structured_content, default=str))
+    return size
+
+
+class ToolResultCache:
+    """
+    工具结果缓存
+
+    每个工具独立维护一个LRU，支持可选TTL和内存上限（按序列化大小估算）。
+    """
+
+    def __init__(self):
+        self._tools: Dict[str, _ToolCache] = {}
+
+    def register(self, name: str, policy: CachePolicy):
+        """为工具启用缓存，策略不变时保留已缓存的结果"""
+        cache = self._tools.get(name)
+        if cache is None or cache.policy != policy:
+            self._tools[name] = _ToolCache(policy=policy)
+
+    @property
+    def policies(self) -> Dict[str, CachePolicy]:
+        return {name: cache.policy for name, cache in self._tools.items()}
+
+    def is_cacheable(self, name: str) -> bool:
+        return name in self._tools
+
+    def get(self, name: str, arguments: Optional[Dict[str, Any]]) -> Optional[ToolResult]:
+        cache = self._tools.get(name)
+        if cache is None:
+            return None
+        key = _canonical_key(arguments)
+        entry = cache.entries.get(key)
+        if entry is not None:
+            expires, size, result = entry
+            if expires is None or expires > time.monotonic():
+                cache.entries.move_to_end(key)
+                cache.hits += 1
+                return result
+            del cache.entries[key]
+            cache.bytes -= size
+        cache.misses += 1
+        return None
+
+    def put(self, name: str, arguments: Optional[Dict[str, Any]], result: ToolResult):
+        cache = self._tools.get(name)
+        if cache is None or result.is_error:
+            return
+        policy = cache.policy
+        size = _result_size(result)
+        if size > policy.max_bytes:
+            return
+        key = _canonical_key(arguments)
+        old = cache.entries.pop(key, None)
+        if old is not None:
+            cache.bytes -= old[1]
+        expires = time.monotonic() + policy.ttl if policy.ttl is not None else None
+        cache.entries[key] = (expires, size, result)
+        cache.bytes += size
+        while len(cache.entries) > policy.maxsize or cache.bytes > policy.max_bytes:
+            _, (_, evicted_size, _) = cache.entries.popitem(last=False)
+            cache.bytes -= evicted_size
+            cache.evictions += 1
+
+    def clear(self, name: Optional[str] = None):
+        """清空指定工具（或全部工具）的缓存"""
+        for tool_name, cache in self._tools.items():
+            if name is None or tool_name == name:
+                cache.entries.clear()
+                cache.bytes = 0
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回每个工具的缓存统计"""
+        stats = {}
+        for name, cache in self._tools.items():
+            lookups = cache.hits + cache.misses
+            stats[name] = {
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "hit_ratio": cache.hits / lookups if lookups else 0.0,
+                "evictions": cache.evictions,
+                "size": len(cache.entries),
+                "bytes": cache.bytes,
+            }
+        return stats
+
+
+class ToolCacheMiddleware(Middleware):
+    """在 tools/call 前查询缓存，命中时不再执行参数校验与工具本身"""
+
+    def __init__(self, cache: ToolResultCache):
+        self.cache = cache
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext) -> ToolResult:
+        message = context.message
+        name = message.name
+        if not self.cache.is_cacheable(name) or message.input_responses or message.request_state:
+            return await call_next(context)
+
+        result = self.cache.get(name, message.arguments)
+        if result is not None:
+            return result
+        result = await call_next(context)
+        self.cache.put(name, message.arguments, result)
+        return result
+
+
+tool_cache = ToolResultCache()
+
+
+def cacheable(
+    maxsize: int = 256,
+    ttl: Optional[float] = None,
+    max_bytes: int = 1024 * 1024,
+    name: Optional[str] = None,
+) -> Callable:
+    """
+    标记工具结果可缓存
+
+    Args:
+        maxsize: 最多缓存的参数组合数
+        ttl: 缓存有效期（秒），None表示不过期
+        max_bytes: 该工具缓存占用的内存上限（字节）
+        name: 工具名，默认使用函数名
+    """
+    def decorator(fn: Callable) -> Callable:
+        tool_cache.register(name or fn.__name__, CachePolicy(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes))
+        return fn
+    return decorator
+
+
+def _resource_etag(result: ResourceResult) -> str:
+    """资源内容的哈希"""
+    digest = hashlib.sha256()
+    for item in result.contents:
+        data = item.content
+        digest.update(data if isinstance(data, bytes) else data.encode())
+        digest.update((item.mime_type or "").encode())
+    return digest.hexdigest()[:32]
+
+
+@dataclass
+class _ResourceEntry:
+    name: str
+    expires: Optional[float]
+    size: int
+    etag: str
+    result: ResourceResult
+
+
+class ResourceCache:
+    """
+    资源读取结果缓存
+
+    按URI缓存，策略按资源名（模板资源为模板名）注册。所有资源共享一个LRU，
+    总条目数与总内存受 maxsize / max_bytes 限制，每个资源的URI数受其策略的 maxsize 限制。
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: int = 16 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.policies: Dict[str, CachePolicy] = {}
+        # 变化通知器（listing.ChangeNotifier），由服务器设置
+        self.notifier = None
+        self._entries: "OrderedDict[str, _ResourceEntry]" = OrderedDict()
+        self._counts: Dict[str, int] = {}
+        # 最近读取过的URI -> 资源名（None表示不缓存），以及每个URI最后一次的etag
+        self._names: "OrderedDict[str, Optional[str]]" = OrderedDict()
+        self._etags: Dict[str, str] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def register(self, name: str, policy: CachePolicy):
+        """为资源启用缓存"""
+        if self.policies.get(name) != policy:
+            self.policies[name] = policy
+            self._names.clear()
+
+    async def resolve(self, server, uri: str) -> Optional[str]:
+        """URI对应的已启用缓存的资源名，结果按URI记忆"""
+        if uri in self._names:
+            self._names.move_to_end(uri)
+            return self._names[uri]
+        component = await server.get_resource(uri)
+        if component is None:
+            component = await server.get_resource_template(uri)
+        name = component.name if component is not None and component.name in self.policies else None
+        self._names[uri] = name
+        while len(self._names) > self.maxsize:
+            old, _ = self._names.popitem(last=False)
+            self._etags.pop(old, None)
+        return name
+
+    def get(self, uri: str) -> Optional[ResourceResult]:
+        entry = self._entries.get(uri)
+        if entry is not None:
+            if entry.expires is None or entry.expires > time.monotonic():
+                self._entries.move_to_end(uri)
+                self.hits += 1
+                return entry.result
+            self._drop(uri)
+        self.misses += 1
+        return None
+
+    def put(self, name: str, uri: str, result: ResourceResult) -> bool:
+        """缓存结果并写入etag，返回内容是否与该URI上一次的内容不同"""
+        policy = self.policies[name]
+        etag = _resource_etag(result)
+        result.meta = {**(result.meta or {}), "etag": etag}
+        previous = self._etags.get(uri)
+        self._etags[uri] = etag
+        size = sum(len(item.content) for item in result.contents)
+        if size <= policy.max_bytes:
+            self._drop(uri)
+            expires = time.monotonic() + policy.ttl if policy.ttl is not None else None
+            self._entries[uri] = _ResourceEntry(name, expires, size, etag, result)
+            self.bytes += size
+            self._counts[name] = self._counts.get(name, 0) + 1
+            if self._counts[name] > policy.maxsize:
+                self._evict(next(u for u, e in self._entries.items() if e.name == name))
+            while len(self._entries) > self.maxsize or self.bytes > self.max_bytes:
+                self._evict(next(iter(self._entries)))
+        return previous is not None and previous != etag
+
+    def _drop(self, uri: str) -> Optional[_ResourceEntry]:
+        entry = self._entries.pop(uri, None)
+        if entry is not None:
+            self.bytes -= entry.size
+            self._counts[entry.name] -= 1
+        return entry
+
+    def _evict(self, uri: str):
+        self._drop(uri)
+        self.evictions += 1
+
+    def invalidate(self, uri: Optional[str] = None, name: Optional[str] = None):
+        """
+        资源内容已变化：失效缓存并通知订阅者
+
+        Args:
+            uri: 只失效该URI
+            name: 只失效该资源（模板资源为其所有URI）；两者都不指定时失效全部
+        """
+        uris = [
+            u for u, entry in self._entries.items()
+            if (uri is None or u == uri) and (name is None or entry.name == name)
+        ]
+        if uri is not None and uri not in uris:
+            uris.append(uri)
+        for u in uris:
+            self._drop(u)
+            self._etags.pop(u, None)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for u in uris:
+            loop.create_task(self.notify(u))
+
+    async def notify(self, uri: str):
+        """向订阅者推送 resources/updated"""
+        if self.notifier is not None:
+            await self.notifier.publish(ResourceUpdated(uri=uri))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "bytes": self.bytes,
+        }
+
+
+class ResourceCacheMiddleware(Middleware):
+    """在 resources/read 前查询缓存，并处理 ifNoneMatch"""
+
+    def __init__(self, cache: ResourceCache):
+        self.cache = cache
+
+    async def on_read_resource(self, context: MiddlewareContext, call_next: CallNext) -> ResourceResult:
+        if not self.cache.policies or context.fastmcp_context is None:
+            return await call_next(context)
+        uri = str(context.message.uri)
+        name = await self.cache.resolve(context.fastmcp_context.fastmcp, uri)
+        if name is None:
+            return await call_next(context)
+
+        result = self.cache.get(uri)
+        if result is None:
+            result = await call_next(context)
+            if self.cache.put(name, uri, result):
+                await self.cache.notify(uri)
+
+        # FastMCP 传给中间件的参数不含 _meta，从请求上下文读取
+        request = context.fastmcp_context.request_context
+        meta = (request.meta if request is not None else None) or {}
+        if meta.get("ifNoneMatch") == result.meta["etag"]:
+            return ResourceResult([], meta={"etag": result.meta["etag"], "notModified": True})
+        return result
+
+
+resource_cache = ResourceCache()
+
+
+def cacheable_resource(
+    maxsize: int = 256,
+    ttl: Optional[float] = None,
+    max_bytes: int = 1024 * 1024,
+    name: Optional[str] = None,
+) -> Callable:
+    """
+    标记资源内容可缓存（内容不能随调用方变化）
+
+    Args:
+        maxsize: 模板资源最多缓存的URI数
+        ttl: 缓存有效期（秒），None表示直到 invalidate
+        max_bytes: 单个资源内容的大小上限（字节），超过时不缓存
+        name: 资源名，默认使用函数名
+    """
+    def decorator(fn: Callable) -> Callable:
+        resource_cache.register(name or fn.__name__, CachePolicy(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes))
+        return fn
+    return decorator
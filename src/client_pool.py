@@ -0,0 +1,314 @@
+"""
+客户端连接池模块 - 保持MCP会话的客户端连接池
+
+每次新建客户端都要建立连接并完成 initialize 握手，编排器为每个任务这样做，
+每个任务都要付出一次握手延迟。ClientPool 按 (服务器, token) 保持已初始化的会话：
+
+- 复用：会话建立后一直保留，空闲超过 idle_timeout 秒才关闭
+- 多路复用：一个会话可以同时进行多个请求（按请求id区分响应），选择进行中请求最少的会话；
+  每个会话进行中的请求达到 max_in_flight 且会话数未达 max_sessions 时再建立新会话
+- HTTP连接：同一服务器的所有会话与请求共用一个连接池（HTTP/1.1 keep-alive，
+  安装了 h2 时使用 HTTP/2），新会话不必重新建立TCP/TLS连接
+- 自动重连：连接断开或服务器已不认识的会话被丢弃，下次使用时重新建立；请求因此失败时
+  在新会话上重试一次。连接断开时请求可能已被执行，有副作用的工具可用 retry=False 关闭重试
+
+服务器地址以 /sse 结尾时使用SSE传输，其他 http(s) 地址使用 Streamable-HTTP，
+StdioServerParameters 使用stdio传输（每个会话一个子进程）。token 作为
+Authorization: Bearer 头发送，只用于HTTP传输。
+
+示例:
+    async with ClientPool(token="secret") as pool:
+        result = await pool.call_tool("http://localhost:8000/mcp", "add", {"a": 1, "b": 2})
+        async with pool.session("http://localhost:8000/mcp") as session:
+            tools = await session.list_tools()
+"""
+
+import importlib.util
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+from urllib.parse import urlsplit
+
+import anyio
+import httpx2
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamable_http_client
+from mcp.shared._httpx_utils import MCP_DEFAULT_SSE_READ_TIMEOUT, MCP_DEFAULT_TIMEOUT
+from mcp.shared.exceptions import MCPError
+from mcp_types import CONNECTION_CLOSED, INVALID_REQUEST
+
+logger = logging.getLogger(__name__)
+
+Server = Union[str, StdioServerParameters]
+T = TypeVar("T")
+
+# 请求因连接断开而失败时的异常，会话被丢弃并可重试
+_DISCONNECTS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, httpx2.TransportError)
+# Streamable-HTTP 服务器不认识会话id（重启或会话过期，HTTP 404）时的错误信息
+_EXPIRED = ("Session not found", "Session terminated")
+
+
+def _expired(exc: BaseException) -> bool:
+    """服务器已不认识该会话，请求未被执行"""
+    return isinstance(exc, MCPError) and exc.code == INVALID_REQUEST and exc.message in _EXPIRED
+
+
+def _disconnected(exc: BaseException) -> bool:
+    """连接断开或会话已失效"""
+    if isinstance(exc, MCPError):
+        return exc.code == CONNECTION_CLOSED or _expired(exc)
+    if isinstance(exc, BaseExceptionGroup):
+        return any(_disconnected(e) for e in exc.exceptions)
+    return isinstance(exc, _DISCONNECTS)
+
+
+class _SharedTransport(httpx2.AsyncBaseTransport):
+    """多个客户端共用的连接池；客户端关闭时不关闭连接池，由 ClientPool 统一关闭"""
+
+    def __init__(self, transport: httpx2.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx2.Request) -> httpx2.Response:
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self):
+        pass
+
+
+class _PooledSession:
+    """池中的一个会话"""
+
+    def __init__(self, key: Tuple[str, Optional[str]]):
+        self.key = key
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.requests = 0
+        self.last_used = time.monotonic()
+        self.closing = anyio.Event()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+        self.closing.set()
+
+
+class ClientPool:
+    """
+    MCP客户端连接池
+
+    Args:
+        token: 默认的认证token，可在每次调用时覆盖
+        max_sessions: 每个 (服务器, token) 最多保持的会话数
+        max_in_flight: 单个会话进行中的请求达到该值时优先建立新会话
+        idle_timeout: 会话空闲超过该秒数后关闭，None表示不关闭
+        http2: 是否使用HTTP/2，None表示安装了 h2 时使用
+        max_connections: 每个服务器的HTTP连接上限
+        timeout: HTTP请求超时（秒），SSE流的读取超时使用SDK的默认值
+        session_kwargs: 传给 ClientSession 的其他参数（回调、client_info 等）
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        max_sessions: int = 4,
+        max_in_flight: int = 32,
+        idle_timeout: Optional[float] = 300.0,
+        http2: Optional[bool] = None,
+        max_connections: int = 100,
+        timeout: float = MCP_DEFAULT_TIMEOUT,
+        **session_kwargs: Any,
+    ):
+        if max_sessions < 1 or max_in_flight < 1:
+            raise ValueError("max_sessions and max_in_flight must be positive")
+        self.token = token
+        self.max_sessions = max_sessions
+        self.max_in_flight = max_in_flight
+        self.idle_timeout = idle_timeout
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        self.max_connections = max_connections
+        self.timeout = httpx2.Timeout(timeout, read=MCP_DEFAULT_SSE_READ_TIMEOUT)
+        self.session_kwargs = session_kwargs
+        self._sessions: Dict[Tuple[str, Optional[str]], List[_PooledSession]] = {}
+        self._locks: Dict[Tuple[str, Optional[str]], anyio.Lock] = {}
+        self._transports: Dict[str, httpx2.AsyncHTTPTransport] = {}
+        self._task_group: Optional[anyio.abc.TaskGroup] = None
+        self._reaper = anyio.CancelScope()
+        self.connects = 0
+        self.reconnects = 0
+
+    async def __aenter__(self) -> "ClientPool":
+        self._task_group = anyio.create_task_group()
+        await self._task_group.__aenter__()
+        if self.idle_timeout is not None:
+            self._task_group.start_soon(self._reap_idle)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        task_group, self._task_group = self._task_group, None
+        for sessions in self._sessions.values():
+            for entry in sessions:
+                entry.close()
+        # 会话任务在 closing 事件后正常退出（Streamable-HTTP 会话向服务器发送 DELETE）
+        self._reaper.cancel()
+        try:
+            return await task_group.__aexit__(*exc_info)
+        finally:
+            transports, self._transports = self._transports, {}
+            for transport in transports.values():
+                await transport.aclose()
+
+    @staticmethod
+    def _key(server: Server, token: Optional[str]) -> Tuple[str, Optional[str]]:
+        name = server.model_dump_json() if isinstance(server, StdioServerParameters) else server
+        return name, token
+
+    def _transport(self, url: str) -> _SharedTransport:
+        """按服务器（scheme://host:port）共用的HTTP连接池"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        transport = self._transports.get(origin)
+        if transport is None:
+            limits = httpx2.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            transport = self._transports[origin] = httpx2.AsyncHTTPTransport(http2=self.http2, limits=limits)
+        return _SharedTransport(transport)
+
+    @asynccontextmanager
+    async def _connect(self, server: Server, token: Optional[str]):
+        """建立传输，返回 (read_stream, write_stream)"""
+        if isinstance(server, StdioServerParameters):
+            async with stdio_client(server) as streams:
+                yield streams
+            return
+
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        transport = self._transport(server)
+        if urlsplit(server).path.rstrip("/").endswith("/sse"):
+            def client_factory(headers=None, timeout=None, auth=None):
+                return httpx2.AsyncClient(transport=transport, headers=headers, timeout=timeout, auth=auth)
+
+            async with sse_client(server, headers=headers, timeout=self.timeout.connect,
+                                  httpx_client_factory=client_factory) as streams:
+                yield streams
+        else:
+            async with httpx2.AsyncClient(transport=transport, headers=headers, timeout=self.timeout) as client:
+                async with streamable_http_client(server, http_client=client) as streams:
+                    yield streams
+
+    async def _serve(self, entry: _PooledSession, server: Server, token: Optional[str],
+                     *, task_status=anyio.TASK_STATUS_IGNORED):
+        """会话任务：建立连接并初始化，保持到会话被关闭或连接断开"""
+        started = False
+        try:
+            async with self._connect(server, token) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream, **self.session_kwargs) as session:
+                    await session.initialize()
+                    entry.session = session
+                    started = True
+                    task_status.started()
+                    await entry.closing.wait()
+        except Exception as e:
+            if not started:
+                raise
+            logger.warning("MCP session to %s closed: %s", entry.key[0], e)
+        finally:
+            entry.closed = True
+            sessions = self._sessions.get(entry.key, [])
+            if entry in sessions:
+                sessions.remove(entry)
+
+    async def _acquire(self, server: Server, token: Optional[str]) -> _PooledSession:
+        if self._task_group is None:
+            raise RuntimeError("ClientPool must be used with 'async with'")
+        key = self._key(server, token)
+        lock = self._locks.setdefault(key, anyio.Lock())
+        async with lock:
+            sessions = self._sessions.setdefault(key, [])
+            entry = min((s for s in sessions if not s.closed), key=lambda s: s.in_flight, default=None)
+            live = sum(1 for s in sessions if not s.closed)
+            if entry is None or (entry.in_flight >= self.max_in_flight and live < self.max_sessions):
+                entry = _PooledSession(key)
+                await self._task_group.start(self._serve, entry, server, token)
+                sessions.append(entry)
+                self.connects += 1
+            entry.in_flight += 1
+        return entry
+
+    def _release(self, entry: _PooledSession):
+        entry.in_flight -= 1
+        entry.requests += 1
+        entry.last_used = time.monotonic()
+
+    @asynccontextmanager
+    async def session(self, server: Server, token: Optional[str] = None) -> AsyncIterator[ClientSession]:
+        """
+        借用一个已初始化的会话
+
+        借用期间会话仍可同时被其他调用方使用；连接断开时会话在归还后被丢弃。
+        """
+        entry = await self._acquire(server, token if token is not None else self.token)
+        try:
+            yield entry.session
+        except BaseException as e:
+            if _disconnected(e):
+                entry.close()
+            raise
+        finally:
+            self._release(entry)
+
+    async def request(self, server: Server, call: Callable[[ClientSession], Awaitable[T]],
+                      token: Optional[str] = None, retry: bool = True) -> T:
+        """
+        在池中的会话上执行 call(session)
+
+        连接断开时丢弃会话，retry 为 True 时在新会话上重试一次。服务器不认识会话
+        （重启或会话过期）时请求未被执行，总是重试。
+        """
+        try:
+            async with self.session(server, token) as session:
+                return await call(session)
+        except Exception as e:
+            if not _expired(e) and not (retry and _disconnected(e)):
+                raise
+            logger.info("MCP session to %s disconnected, reconnecting", self._key(server, token)[0])
+        self.reconnects += 1
+        async with self.session(server, token) as session:
+            return await call(session)
+
+    async def call_tool(self, server: Server, name: str, arguments: Optional[Dict[str, Any]] = None,
+                        token: Optional[str] = None, retry: bool = True, **kwargs: Any):
+        """调用工具（参数同 ClientSession.call_tool）"""
+        return await self.request(server, lambda s: s.call_tool(name, arguments, **kwargs), token, retry)
+
+    async def list_tools(self, server: Server, token: Optional[str] = None):
+        return await self.request(server, lambda s: s.list_tools(), token)
+
+    async def read_resource(self, server: Server, uri: str, token: Optional[str] = None):
+        return await self.request(server, lambda s: s.read_resource(uri), token)
+
+    async def get_prompt(self, server: Server, name: str, arguments: Optional[Dict[str, str]] = None,
+                         token: Optional[str] = None):
+        return await self.request(server, lambda s: s.get_prompt(name, arguments), token)
+
+    async def _reap_idle(self):
+        """定期关闭空闲超过 idle_timeout 的会话"""
+        with self._reaper:
+            while True:
+                await anyio.sleep(min(max(0.1, self.idle_timeout / 4), 60.0))
+                deadline = time.monotonic() - self.idle_timeout
+                for sessions in self._sessions.values():
+                    for entry in sessions:
+                        if entry.in_flight == 0 and entry.last_used < deadline:
+                            entry.close()
+
+    def stats(self) -> Dict[str, int]:
+        """连接池统计"""
+        sessions = [s for group in self._sessions.values() for s in group if not s.closed]
+        return {
+            "sessions": len(sessions),
+            "in_flight": sum(s.in_flight for s in sessions),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+        }
@@ -0,0 +1,193 @@
+"""
+执行模块 - 同步工具的执行策略
+
+同步工具默认在事件循环里直接执行会阻塞所有SSE流与其他会话。
+使用 @execution 为每个工具指定执行方式：
+
+- inline: 在事件循环中直接执行，适合极快的纯计算
+- thread: 在线程池中执行，适合IO密集型工具
+- process: 在进程池中执行，适合CPU密集型工具（参数与返回值需可pickle）
+
+并可为每个工具设置并发上限与超时。线程池与进程池的大小由环境变量
+MCP_TOOL_THREADS / MCP_TOOL_PROCESSES 控制（也可通过 main.py 的
+--tool-threads / --tool-processes 设置），在首次使用时创建。
+
+示例:
+    @mcp.tool
+    @execution("process", max_concurrency=2, timeout=30)
+    def factorize(n: int) -> list:
+        ...
+"""
+
+import asyncio
+import functools
+import importlib
+import inspect
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastmcp.exceptions import ToolError
+
+
+THREADS_ENV = "MCP_TOOL_THREADS"
+PROCESSES_ENV = "MCP_TOOL_PROCESSES"
+
+MODES = ("inline", "thread", "process")
+
+# 进程池中通过 (模块, 限定名) 找回原始函数；模块属性已被装饰器替换，无法直接pickle
+_registry: Dict[Tuple[str, str], Callable] = {}
+
+
+def _call_registered(module: str, qualname: str, kwargs: Dict[str, Any]) -> Any:
+    """进程池中的调用入口"""
+    key = (module, qualname)
+    if key not in _registry:
+        importlib.import_module(module)
+    return _registry[key](**kwargs)
+
+
+@dataclass
+class ExecutionPolicy:
+    """单个工具的执行策略"""
+    mode: str = "thread"
+    max_concurrency: Optional[int] = None
+    timeout: Optional[float] = None
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown execution mode: {self.mode!r}")
+        if self.mode == "inline" and self.timeout is not None:
+            raise ValueError("timeout is not supported for inline execution")
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name, "").strip()
+    return int(value) if value else None
+
+
+class ToolExecutor:
+    """
+    工具执行器
+
+    线程池与进程池在首次使用时按配置创建，所有工具共享；
+    并发上限按工具独立计数。
+    """
+
+    def __init__(self, threads: Optional[int] = None, processes: Optional[int] = None):
+        self.threads = threads
+        self.processes = processes
+        self.policies: Dict[str, ExecutionPolicy] = {}
+        self._pools: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+        self._limits: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+        self.pending: Dict[str, int] = {"thread": 0, "process": 0}
+
+    def configure(self, threads: Optional[int] = None, processes: Optional[int] = None):
+        """设置池大小，已创建的池会在下次使用时按新大小重建"""
+        self.threads = threads
+        self.processes = processes
+        self.shutdown(wait=False)
+
+    def _pool(self, mode: str) -> Executor:
+        pool = self._pools.get(mode)
+        if pool is not None:
+            return pool
+        with self._lock:
+            pool = self._pools.get(mode)
+            if pool is None:
+                if mode == "thread":
+                    pool = ThreadPoolExecutor(
+                        max_workers=self.threads or _env_int(THREADS_ENV),
+                        thread_name_prefix="mcp-tool",
+                    )
+                else:
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.processes or _env_int(PROCESSES_ENV),
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                self._pools[mode] = pool
+        return pool
+
+    def _semaphore(self, name: str, limit: int) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        entry = self._limits.get(name)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Semaphore(limit))
+            self._limits[name] = entry
+        return entry[1]
+
+    async def run(self, name: str, fn: Callable, kwargs: Dict[str, Any]) -> Any:
+        """按工具的执行策略调用 fn"""
+        policy = self.policies.get(name) or ExecutionPolicy()
+        if policy.max_concurrency is None:
+            return await self._dispatch(name, policy, fn, kwargs)
+        async with self._semaphore(name, policy.max_concurrency):
+            return await self._dispatch(name, policy, fn, kwargs)
+
+    async def _dispatch(self, name: str, policy: ExecutionPolicy, fn: Callable, kwargs: Dict[str, Any]) -> Any:
+        if policy.mode == "inline":
+            return fn(**kwargs)
+
+        if policy.mode == "thread":
+            future = self._pool("thread").submit(functools.partial(fn, **kwargs))
+        else:
+            future = self._pool("process").submit(_call_registered, fn.__module__, fn.__qualname__, kwargs)
+
+        self.pending[policy.mode] += 1
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), policy.timeout)
+        except asyncio.TimeoutError:
+            # 已开始执行的任务无法中断，只能放弃其结果
+            future.cancel()
+            raise ToolError(f"Tool '{name}' timed out after {policy.timeout}s") from None
+        finally:
+            self.pending[policy.mode] -= 1
+
+    def shutdown(self, wait: bool = True):
+        """关闭所有池"""
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+
+tool_executor = ToolExecutor()
+
+
+def execution(
+    mode: str = "thread",
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    name: Optional[str] = None,
+) -> Callable:
+    """
+    指定同步工具的执行策略
+
+    Args:
+        mode: inline / thread / process
+        max_concurrency: 该工具同时执行的最大调用数，None表示不限制
+        timeout: 超时时间（秒），超时后返回工具错误；inline模式不支持
+        name: 工具名，默认使用函数名
+    """
+    policy = ExecutionPolicy(mode=mode, max_concurrency=max_concurrency, timeout=timeout)
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            raise TypeError(f"@execution only applies to sync functions: {fn.__qualname__}")
+        tool_name = name or fn.__name__
+        tool_executor.policies[tool_name] = policy
+        _registry[(fn.__module__, fn.__qualname__)] = fn
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            # FastMCP 总是按关键字传入已校验的参数，无需再按签名绑定
+            arguments = signature.bind(*args, **kwargs).arguments if args else kwargs
+            return await tool_executor.run(tool_name, fn, arguments)
+
+        return wrapper
+    return decorator
@@ -0,0 +1,329 @@
+"""
+懒加载模块 - 按需导入工具、资源与提示词模块
+
+导入组件模块会触发函数签名解析、JSON Schema 生成与文档字符串解析，
+是stdio模式启动时间的主要部分。组件清单（manifest.json）记录了每个
+组件来源（见 plugins 模块）注册的组件元数据，启动时只据此构造轻量的占位组件
+并建立名称索引用于列表与查找；组件第一次被调用（或读取）时才导入对应来源，
+注册真正的组件。
+
+模块中 @rate_limit、@cacheable、@cacheable_resource、@execution 登记的策略
+也记入清单，启动时直接登记：中间件在调用组件之前就要用到这些策略。
+
+随包发布的清单在构建时生成（python -m src.lazy），运行时只读。清单按来源模块
+源文件的SHA-256校验，源文件变化（或条目缺失）时该来源在启动时直接导入，新的条目
+写入缓存目录中的清单（MCP_CACHE_DIR，默认 ~/.cache/fastapi-mcp），下次启动即可懒加载。
+设置环境变量 MCP_LAZY_LOAD=0 可关闭懒加载。
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastmcp.prompts import Prompt
+from fastmcp.resources import Resource, ResourceTemplate
+from fastmcp.server.providers import Provider
+from fastmcp.tools import Tool
+
+from .admission import Limit, admission
+from .cache import CachePolicy, resource_cache, tool_cache
+from .execution import ExecutionPolicy, tool_executor
+from .plugins import load, module_of
+
+logger = logging.getLogger(__name__)
+
+LAZY_LOAD_ENV = "MCP_LAZY_LOAD"
+CACHE_DIR_ENV = "MCP_CACHE_DIR"
+MANIFEST_PATH = Path(__file__).with_name("manifest.json")
+
+_COMMON = {"name", "version", "title", "description", "icons", "tags", "meta"}
+
+# 每类组件：(占位组件类, 清单中记录的字段)，只记录列表所需的字段
+_KINDS: Dict[str, Tuple[type, set]] = {
+    "tools": (Tool, _COMMON | {"parameters", "output_schema", "annotations"}),
+    "resources": (Resource, _COMMON | {"uri", "mime_type", "annotations"}),
+    "resource_templates": (ResourceTemplate, _COMMON | {"uri_template", "mime_type", "parameters", "annotations"}),
+    "prompts": (Prompt, _COMMON | {"arguments"}),
+}
+
+# 按键精确查找的组件类型及其索引键，资源模板需按URI逐个匹配
+_KEYS = {
+    "tools": lambda c: c.name,
+    "resources": lambda c: str(c.uri),
+    "prompts": lambda c: c.name,
+}
+
+
+# 装饰器在导入时登记的策略：(读取已登记的策略, 按清单数据登记)
+_POLICIES: Dict[str, Tuple[Callable[[], Dict[str, Any]], Callable[[str, Dict[str, Any]], None]]] = {
+    "rate_limit": (
+        lambda: admission.tool_limits,
+        lambda name, data: admission.tool_limits.__setitem__(name, Limit(**data)),
+    ),
+    "cacheable": (
+        lambda: tool_cache.policies,
+        lambda name, data: tool_cache.register(name, CachePolicy(**data)),
+    ),
+    "cacheable_resource": (
+        lambda: resource_cache.policies,
+        lambda name, data: resource_cache.register(name, CachePolicy(**data)),
+    ),
+    "execution": (
+        lambda: tool_executor.policies,
+        lambda name, data: tool_executor.policies.__setitem__(name, ExecutionPolicy(**data)),
+    ),
+}
+
+
+def cache_manifest_path() -> Path:
+    """运行时生成的清单条目的保存位置"""
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        directory = os.path.join(base, "fastapi-mcp")
+    return Path(directory) / "manifest.json"
+
+
+def source_hash(module: str) -> Optional[str]:
+    """不导入模块，计算其源文件的SHA-256"""
+    try:
+        spec = importlib.util.find_spec(module)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.has_location or not spec.origin:
+        return None
+    try:
+        return hashlib.sha256(Path(spec.origin).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def describe(
+    source: str,
+    components: Iterable[Any],
+    policies: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """生成单个组件来源的清单条目"""
+    entry: Dict[str, Any] = {"sha256": source_hash(module_of(source))}
+    if policies:
+        entry["policies"] = policies
+    for kind in _KINDS:
+        entry[kind] = []
+    for component in components:
+        for kind, (cls, fields) in _KINDS.items():
+            if isinstance(component, cls):
+                entry[kind].append(component.model_dump(mode="json", include=fields, exclude_none=True))
+                break
+        # 带组件级授权的模块不做懒加载，避免占位组件绕过授权过滤
+        if getattr(component, "auth", None) is not None:
+            entry["eager"] = True
+    return entry
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict[str, Any]:
+    """读取清单，不存在或无法解析时返回空清单"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"modules": {}}
+
+
+def save_manifest(manifest: Dict[str, Any], path: Path):
+    """原子写入清单，目录不可写时忽略"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.debug("Could not write %s: %s", path, e)
+
+
+def apply_policies(entry: Dict[str, Any]):
+    """登记清单条目中记录的装饰器策略"""
+    for kind, policies in entry.get("policies", {}).items():
+        _, register = _POLICIES[kind]
+        for name, data in policies.items():
+            register(name, data)
+
+
+def import_source(server, source: str) -> Dict[str, Any]:
+    """导入来源，返回由其注册的组件与登记的策略生成的清单条目"""
+    # 先导入父包，父包注册的组件不计入本来源的条目
+    parent = module_of(source).rpartition(".")[0]
+    if parent:
+        importlib.import_module(parent)
+    local = server._local_provider
+    before = set(local._components)
+    registered = {kind: dict(current()) for kind, (current, _) in _POLICIES.items()}
+    load(server, source)
+    added = [c for key, c in local._components.items() if key not in before]
+    policies = {}
+    for kind, (current, _) in _POLICIES.items():
+        new = {name: asdict(p) for name, p in current().items() if registered[kind].get(name) is not p}
+        if new:
+            policies[kind] = new
+    return describe(source, added, policies)
+
+
+def build(path: Path = MANIFEST_PATH):
+    """构建时重新生成随包发布的清单：导入服务器的全部组件来源并记录"""
+    global MANIFEST_PATH
+    packaged = MANIFEST_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        # 忽略已有清单，服务器导入时所有来源都会直接导入，条目写入临时缓存目录
+        MANIFEST_PATH = Path(tmp) / "packaged.json"
+        os.environ[CACHE_DIR_ENV] = tmp
+        os.environ[LAZY_LOAD_ENV] = "1"
+        try:
+            from . import server  # noqa: F401
+        finally:
+            MANIFEST_PATH = packaged
+        manifest = load_manifest(cache_manifest_path())
+    save_manifest(manifest, path)
+    return manifest
+
+
+class LazyProvider(Provider):
+    """
+    按清单提供占位组件，组件被使用时再导入所属来源
+
+    来源导入后其组件注册在服务器自身的 LocalProvider 中（排在本provider之前），
+    之后的列表与调用都直接由 LocalProvider 处理。
+    """
+
+    def __init__(self, server, entries: Dict[str, Dict[str, Any]]):
+        super().__init__()
+        self._server = server
+        self._loaded: set = set()
+        self._components: Dict[str, List[Tuple[str, Any]]] = {kind: [] for kind in _KINDS}
+        self._index: Dict[str, Dict[str, str]] = {kind: {} for kind in _KEYS}
+        for source, entry in entries.items():
+            for kind, (cls, _) in _KINDS.items():
+                for data in entry.get(kind, []):
+                    component = cls(**data)
+                    self._components[kind].append((source, component))
+                    if kind in _KEYS:
+                        self._index[kind].setdefault(_KEYS[kind](component), source)
+
+    @classmethod
+    def install(
+        cls,
+        server,
+        sources: Iterable[str],
+        manifest_path: Optional[Path] = None,
+        cache_path: Optional[Path] = None,
+    ) -> "LazyProvider":
+        """
+        为服务器安装懒加载provider
+
+        随包发布的清单（manifest_path）只读；其中条目缺失或源文件已变化的来源使用
+        缓存清单（cache_path）中的条目，都无效或需要立即导入时在此直接导入，并把
+        重新生成的条目写入缓存清单；已不存在的来源从缓存清单中删除。
+        """
+        sources = list(sources)
+        packaged = load_manifest(manifest_path or MANIFEST_PATH).get("modules", {})
+        cache_path = cache_path or cache_manifest_path()
+        manifest = load_manifest(cache_path)
+        entries = manifest.setdefault("modules", {})
+        lazy = {}
+        changed = False
+        for source in set(entries) - set(sources):
+            del entries[source]
+            changed = True
+        for source in sources:
+            if ":" not in source and source in sys.modules:
+                # 已导入（或正在导入）的模块自行完成注册
+                continue
+            digest = source_hash(module_of(source))
+            entry = next((
+                e for e in (packaged.get(source), entries.get(source))
+                if e is not None and not e.get("eager") and e.get("sha256") == digest
+            ), None)
+            if entry is not None:
+                apply_policies(entry)
+                lazy[source] = entry
+                continue
+
+            entry = import_source(server, source)
+            if entries.get(source) != entry:
+                entries[source] = entry
+                changed = True
+        if changed:
+            save_manifest(manifest, cache_path)
+
+        provider = cls(server, lazy)
+        server.add_provider(provider)
+        return provider
+
+    @property
+    def _local(self) -> Provider:
+        return self._server._local_provider
+
+    def _is_loaded(self, source: str) -> bool:
+        # 导入即注册的模块也可能被其他代码先行导入
+        return source in self._loaded or (":" not in source and source in sys.modules)
+
+    def _pending(self, kind: str) -> List[Any]:
+        return [c for source, c in self._components[kind] if not self._is_loaded(source)]
+
+    def _load(self, source: Optional[str]) -> bool:
+        """导入尚未加载的来源"""
+        if source is None or self._is_loaded(source):
+            return False
+        logger.debug("Loading %s on demand", source)
+        self._loaded.add(source)
+        load(self._server, source)
+        return True
+
+    async def _list_tools(self):
+        return self._pending("tools")
+
+    async def _get_tool(self, name, version=None):
+        if self._load(self._index["tools"].get(name)):
+            return await self._local._get_tool(name, version)
+        return None
+
+    async def _list_resources(self):
+        return self._pending("resources")
+
+    async def _get_resource(self, uri, version=None):
+        if self._load(self._index["resources"].get(uri)):
+            return await self._local._get_resource(uri, version)
+        return None
+
+    async def _list_resource_templates(self):
+        return self._pending("resource_templates")
+
+    async def _get_resource_template(self, uri, version=None):
+        for source, template in self._components["resource_templates"]:
+            if not self._is_loaded(source) and template.matches(uri) is not None:
+                self._load(source)
+                return await self._local._get_resource_template(uri, version)
+        return None
+
+    async def _list_prompts(self):
+        return self._pending("prompts")
+
+    async def _get_prompt(self, name, version=None):
+        if self._load(self._index["prompts"].get(name)):
+            return await self._local._get_prompt(name, version)
+        return None
+
+
+if __name__ == "__main__":
+    from src.lazy import build as _build
+
+    _modules = _build()["modules"]
+    print(f"Wrote {MANIFEST_PATH} ({len(_modules)} sources)")
@@ -0,0 +1,380 @@
+"""
+列表缓存模块 - 预先构建并缓存组件列表响应
+
+tools/list、resources/list、resources/templates/list、prompts/list 的完整列表按
+调用方身份构建一次并缓存（同时建立名称索引、有序名称表与标签索引），之后的请求
+不再遍历provider、执行中间件与重新生成每个组件的MCP表示，分页与过滤的耗时只取决于
+返回的条目数，与组件总数无关。
+
+分页使用游标，每页条目数由环境变量 MCP_LIST_PAGE_SIZE 设置（默认100，0表示不分页）。
+请求的 _meta 中可以带过滤条件：prefix（名称前缀，资源为URI前缀）与 tags（包含任一标签）。
+翻页时需带上相同的过滤条件。
+
+组件注册变化（增删组件、添加provider或transform、授权配置变化）时缓存版本递增、
+全部失效，并向客户端发送 listChanged 通知（列表内容实际未变化时不发送，
+例如懒加载模块导入后真实组件替换了占位组件）。握手协议的连接直接收到通知，
+2026-07-28 协议的客户端通过 subscriptions/listen 流接收。
+
+每个响应的 _meta.etag 是该页内容的哈希，在多个worker之间一致，_meta.total 是符合过滤
+条件的条目总数。客户端可以在请求的
+_meta.ifNoneMatch 中带上之前的etag，未变化时响应只包含 _meta.notModified=true，
+不再重复传输全部schema。
+
+注意：缓存假设列表只取决于调用方的token，不支持按会话启用/禁用组件。
+"""
+
+import asyncio
+import base64
+import bisect
+import hashlib
+import json
+import logging
+import os
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastmcp.server.auth import AccessToken
+from fastmcp.server.dependencies import bind_request_context, get_access_token
+from mcp.server.subscriptions import (
+    InMemorySubscriptionBus,
+    ListenHandler,
+    PromptsListChanged,
+    ResourcesListChanged,
+    ResourceUpdated,
+    ToolsListChanged,
+)
+from mcp.shared.subscriptions import event_to_notification
+from mcp.shared.exceptions import MCPError
+from mcp_types import (
+    INVALID_PARAMS,
+    EmptyResult,
+    PaginatedRequestParams,
+    SubscribeRequestParams,
+    SubscriptionsListenRequestParams,
+    UnsubscribeRequestParams,
+)
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE_ENV = "MCP_LIST_PAGE_SIZE"
+DEFAULT_PAGE_SIZE = 100
+
+# 列表类型：(MCP方法, FastMCP处理函数, 对应的变化事件, 条目的键)
+LISTS: Dict[str, Tuple[str, str, Any, Any]] = {
+    "tools": ("tools/list", "_on_list_tools", ToolsListChanged(), lambda t: t.name),
+    "resources": ("resources/list", "_on_list_resources", ResourcesListChanged(), lambda r: str(r.uri)),
+    "resource_templates": (
+        "resources/templates/list", "_on_list_resource_templates", ResourcesListChanged(), lambda t: t.uri_template,
+    ),
+    "prompts": ("prompts/list", "_on_list_prompts", PromptsListChanged(), lambda p: p.name),
+}
+
+
+def _principal(token: Optional[AccessToken]) -> Optional[Tuple[str, Tuple[str, ...]]]:
+    """列表结果所依赖的调用方身份"""
+    if token is None:
+        return None
+    return token.client_id, tuple(sorted(token.scopes))
+
+
+def _item_digest(item) -> bytes:
+    return hashlib.sha256(item.model_dump_json(by_alias=True, exclude_none=True).encode("utf-8")).digest()
+
+
+def etag(digests: Sequence[bytes]) -> str:
+    """由各条目哈希计算列表内容的哈希"""
+    return hashlib.sha256(b"".join(digests)).hexdigest()[:32]
+
+
+def _tags(item) -> Sequence[str]:
+    meta = item.meta or {}
+    return meta.get("fastmcp", {}).get("tags", ())
+
+
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after": key}).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["after"]
+    except (ValueError, KeyError, TypeError):
+        raise MCPError(code=INVALID_PARAMS, message=f"Invalid cursor: {cursor!r}")
+
+
+class Catalog:
+    """
+    一个调用方可见的完整列表及其索引
+
+    - index：键 -> 位置，用于解析游标
+    - sorted_keys / sorted_positions：按键排序，前缀过滤用二分查找
+    - tag_index：标签 -> 有序位置列表
+    """
+
+    def __init__(self, items: List[Any], key):
+        self.items = items
+        self.keys = [key(item) for item in items]
+        self.digests = [_item_digest(item) for item in items]
+        self.index = {k: i for i, k in enumerate(self.keys)}
+        order = sorted(range(len(items)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[i] for i in order]
+        self.sorted_positions = order
+        self.tag_index: Dict[str, List[int]] = {}
+        for i, item in enumerate(items):
+            for tag in _tags(item):
+                self.tag_index.setdefault(tag, []).append(i)
+
+    def select(self, prefix: Optional[str] = None, tags: Optional[Sequence[str]] = None) -> Optional[List[int]]:
+        """符合过滤条件的位置（按注册顺序），没有过滤条件时返回None"""
+        selected = None
+        if isinstance(tags, str):
+            tags = [tags]
+        if prefix:
+            lo = bisect.bisect_left(self.sorted_keys, prefix)
+            hi = bisect.bisect_left(self.sorted_keys, prefix + "\U0010ffff")
+            selected = set(self.sorted_positions[lo:hi])
+        if tags:
+            tagged = set()
+            for tag in tags:
+                tagged.update(self.tag_index.get(tag, ()))
+            selected = tagged if selected is None else selected & tagged
+        return None if selected is None else sorted(selected)
+
+    def page(
+        self,
+        cursor: Optional[str],
+        page_size: Optional[int],
+        prefix: Optional[str] = None,
+        tags: Optional[Sequence[str]] = None,
+    ) -> Tuple[List[int], Optional[str], int]:
+        """返回 (本页位置, 下一页游标, 符合条件的总数)"""
+        selected = self.select(prefix, tags)
+        total = len(self.items) if selected is None else len(selected)
+        start = 0
+        if cursor is not None:
+            after = self.index.get(decode_cursor(cursor))
+            if after is None:
+                raise MCPError(code=INVALID_PARAMS, message="Cursor refers to a component that no longer exists")
+            start = after + 1 if selected is None else bisect.bisect_right(selected, after)
+        end = total if not page_size else min(total, start + page_size)
+        positions = list(range(start, end)) if selected is None else selected[start:end]
+        next_cursor = encode_cursor(self.keys[positions[-1]]) if positions and end < total else None
+        return positions, next_cursor, total
+
+
+class ChangeNotifier:
+    """
+    向客户端推送变化事件
+
+    握手协议（2025-xx）的连接有常驻的服务器→客户端通道，直接发送通知；
+    2026-07-28 协议只通过客户端打开的 subscriptions/listen 流投递，事件发布到总线。
+    资源更新通知只发给通过 resources/subscribe 订阅了该URI的握手协议连接。
+    """
+
+    def __init__(self):
+        self.bus = InMemorySubscriptionBus()
+        # ServerSession 每个请求新建一个，按其所属的连接记录
+        self._connections: "weakref.WeakSet" = weakref.WeakSet()
+        # 连接 -> 订阅的资源URI
+        self._resources: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def install(self, server):
+        """在服务器上提供 subscriptions/listen 与 resources/subscribe"""
+        low_level = server._mcp_server
+        handlers = (
+            ("subscriptions/listen", SubscriptionsListenRequestParams, ListenHandler(self.bus)),
+            ("resources/subscribe", SubscribeRequestParams, self._subscribe),
+            ("resources/unsubscribe", UnsubscribeRequestParams, self._unsubscribe),
+        )
+        for method, params_type, handler in handlers:
+            if method not in low_level._request_handlers:
+                low_level.add_request_handler(method, params_type, handler)
+
+    async def _subscribe(self, ctx, params: SubscribeRequestParams) -> EmptyResult:
+        connection = getattr(ctx.session, "_connection", None)
+        if connection is not None:
+            self._resources.setdefault(connection, set()).add(str(params.uri))
+        return EmptyResult()
+
+    async def _unsubscribe(self, ctx, params: UnsubscribeRequestParams) -> EmptyResult:
+        connection = getattr(ctx.session, "_connection", None)
+        if connection is not None:
+            self._resources.get(connection, set()).discard(str(params.uri))
+        return EmptyResult()
+
+    def track(self, ctx):
+        """记录发起请求的连接"""
+        connection = getattr(ctx.session, "_connection", None)
+        if connection is not None:
+            self._connections.add(connection)
+
+    async def publish(self, event):
+        await self.bus.publish(event)
+        data = event_to_notification(event, {}).model_dump(by_alias=True, mode="json", exclude_none=True)
+        if isinstance(event, ResourceUpdated):
+            connections = [c for c, uris in list(self._resources.items()) if event.uri in uris]
+        else:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                # 2026-07-28 协议的连接会丢弃不经 listen 流的变化通知
+                await connection.outbound.notify(data["method"], data.get("params"))
+            except Exception as e:
+                logger.debug("Dropping connection from change notifications: %s", e)
+                self._connections.discard(connection)
+                self._resources.pop(connection, None)
+
+
+class ListingCache:
+    """
+    组件列表响应缓存
+
+    示例:
+        listing = ListingCache(mcp)
+        listing.install()
+    """
+
+    def __init__(
+        self,
+        server,
+        maxsize: int = 256,
+        notifier: Optional[ChangeNotifier] = None,
+        page_size: Optional[int] = None,
+    ):
+        self.server = server
+        self.maxsize = maxsize
+        self._page_size = page_size
+        self.version = 0
+        self.notifier = notifier or ChangeNotifier()
+        self._results: Dict[str, "OrderedDict[Any, Any]"] = {kind: OrderedDict() for kind in LISTS}
+        self._digests: Dict[str, str] = {}
+        self._notifying: set = set()
+        self.hits = 0
+        self.misses = 0
+
+    def install(self):
+        """替换列表处理函数，并在注册变化时失效缓存"""
+        for kind, (method, handler, _, _) in LISTS.items():
+            original = getattr(self.server, handler)
+
+            async def handle(ctx, params, kind=kind, original=original):
+                return await self._handle(kind, original, ctx, params)
+
+            self.server._mcp_server.add_request_handler(method, PaginatedRequestParams, handle)
+        self.notifier.install(self.server)
+
+        local = self.server._local_provider
+        for target, name in (
+            (local, "_add_component"),
+            (local, "_remove_component"),
+            (self.server, "add_provider"),
+            (self.server, "add_transform"),
+        ):
+            setattr(target, name, self._invalidating(getattr(target, name)))
+        return self
+
+    def _invalidating(self, method):
+        def wrapper(*args, **kwargs):
+            result = method(*args, **kwargs)
+            self.invalidate()
+            return result
+
+        return wrapper
+
+    def invalidate(self):
+        """注册变化：失效全部缓存，并检查是否需要通知客户端"""
+        self.version += 1
+        for results in self._results.values():
+            results.clear()
+        # 还没有客户端获取过列表时无需通知
+        if not self._digests:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        for kind in self._digests:
+            if kind not in self._notifying:
+                self._notifying.add(kind)
+                loop.create_task(self._notify(kind))
+
+    @property
+    def page_size(self) -> Optional[int]:
+        """每页条目数，未显式设置时在首次使用时从环境变量读取"""
+        if self._page_size is None:
+            self._page_size = int(os.environ.get(PAGE_SIZE_ENV, DEFAULT_PAGE_SIZE))
+        return self._page_size or None
+
+    @page_size.setter
+    def page_size(self, value: Optional[int]):
+        self._page_size = value or 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "version": self.version}
+
+    async def _handle(self, kind: str, original, ctx, params: Optional[PaginatedRequestParams]):
+        with bind_request_context(ctx):
+            principal = _principal(get_access_token())
+        self.notifier.track(ctx)
+        if kind not in self._digests:
+            self._digests[kind] = await self._digest(kind)
+
+        results = self._results[kind]
+        cached = results.get(principal)
+        if cached is not None:
+            self.hits += 1
+            results.move_to_end(principal)
+        else:
+            self.misses += 1
+            version = self.version
+            # 不带游标调用原处理函数得到完整列表（服务器本身不设置 list_page_size）
+            full = await original(ctx, None)
+            cached = (full, Catalog(getattr(full, kind), LISTS[kind][3]))
+            # 构建期间注册发生变化时不缓存过期结果
+            if version == self.version:
+                results[principal] = cached
+                while len(results) > self.maxsize:
+                    results.popitem(last=False)
+
+        full, catalog = cached
+        meta = (params.meta if params else None) or {}
+        positions, next_cursor, total = catalog.page(
+            params.cursor if params else None, self.page_size, meta.get("prefix"), meta.get("tags"),
+        )
+        tag = etag([catalog.digests[i] for i in positions])
+        result_meta = {**(full.meta or {}), "etag": tag, "total": total}
+        if meta.get("ifNoneMatch") == tag:
+            return full.model_copy(update={kind: [], "next_cursor": next_cursor, "meta": {**result_meta, "notModified": True}})
+        return full.model_copy(update={
+            kind: [catalog.items[i] for i in positions], "next_cursor": next_cursor, "meta": result_meta,
+        })
+
+    async def _digest(self, kind: str) -> str:
+        """不经过授权过滤的完整列表哈希，用于判断列表是否实际变化"""
+        server = self.server
+        if kind == "tools":
+            items = [t.to_mcp_tool(name=t.name) for t in await server.list_tools(run_middleware=False)]
+        elif kind == "resources":
+            items = [r.to_mcp_resource(uri=str(r.uri)) for r in await server.list_resources(run_middleware=False)]
+        elif kind == "resource_templates":
+            items = [
+                t.to_mcp_template(uri_template=t.uri_template)
+                for t in await server.list_resource_templates(run_middleware=False)
+            ]
+        else:
+            items = [p.to_mcp_prompt(name=p.name) for p in await server.list_prompts(run_middleware=False)]
+        return etag([_item_digest(item) for item in items])
+
+    async def _notify(self, kind: str):
+        try:
+            # 合并同一轮事件循环中的多次注册变化
+            await asyncio.sleep(0)
+            self._notifying.discard(kind)
+            digest = await self._digest(kind)
+            if digest == self._digests.get(kind):
+                return
+            self._digests[kind] = digest
+            await self.notifier.publish(LISTS[kind][2])
+        finally:
+            self._notifying.discard(kind)
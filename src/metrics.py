@@ -0,0 +1,400 @@
+"""
+监控模块 - Prometheus 文本格式的 /metrics 端点
+
+- RequestMetricsMiddleware（FastMCP）：工具、提示词、资源的调用次数、错误数与延迟直方图
+- HTTPMetricsMiddleware（ASGI）：活跃SSE流数量与认证失败次数
+- 缓存、准入队列、执行池等状态在抓取时由 collector 读取，不占用请求路径
+
+热路径上只有字典查找与整数累加，均在事件循环线程中完成，无需加锁。
+多worker模式下每个worker各自计数，/metrics 通过Unix socket抓取其他worker的
+快照（/metrics?local=1）后合并输出。
+"""
+
+import bisect
+import glob
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastmcp.exceptions import AuthorizationError
+from fastmcp.server.middleware import CallNext, Middleware, MiddlewareContext
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 单个指标的标签组合上限，超出的归入 "__other__"，避免资源URI等造成无限增长
+MAX_SERIES = 1000
+OVERFLOW_LABEL = "__other__"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Tuple[str, ...]) -> Tuple[str, ...]:
+        if labels in self.values or len(self.values) < MAX_SERIES:
+            return labels
+        return tuple(OVERFLOW_LABEL for _ in labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "type": self.type,
+            "help": self.help,
+            "labels": list(self.labelnames),
+            "values": [[list(k), v] for k, v in self.values.items()],
+        }
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+    type = "gauge"
+
+    def set(self, value: float, *labels: str):
+        self.values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    """直方图，每个标签组合保存各桶计数（非累积）、总和与总数"""
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        entry = self.values.get(key)
+        if entry is None:
+            # [桶计数..., +Inf桶, sum, count]
+            entry = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = super().snapshot()
+        snapshot["buckets"] = list(self.buckets)
+        return snapshot
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: List[Callable[[], List[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, fn: Callable[[], List[_Metric]]) -> Callable[[], List[_Metric]]:
+        """注册抓取时调用的collector，返回临时构造的指标列表"""
+        self.collectors.append(fn)
+        return fn
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """当前进程的全部指标"""
+        metrics = list(self.metrics)
+        for collect in self.collectors:
+            metrics.extend(collect())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+def merge_snapshots(snapshots: List[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """合并多个worker的快照，相同标签的值相加"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = dict(metric, values={})
+            values = target["values"]
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                if key not in values:
+                    values[key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    values[key] = [a + b for a, b in zip(values[key], value)]
+                else:
+                    values[key] += value
+    for metric in merged.values():
+        metric["values"] = [[list(k), v] for k, v in metric["values"].items()]
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: List[str], values: List[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """输出Prometheus文本格式"""
+    lines = []
+    for name, metric in snapshot.items():
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labels"]
+        for labels, value in metric["values"]:
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(metric["buckets"] + ["+Inf"], value[:-2]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{_number(float(bound))}"'
+                lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+requests_total = registry.counter(
+    "mcp_requests_total", "MCP tool/prompt/resource calls", ("kind", "name", "status"))
+request_duration = registry.histogram(
+    "mcp_request_duration_seconds", "MCP tool/prompt/resource call latency", ("kind", "name"))
+sse_sessions = registry.gauge(
+    "mcp_sse_sessions_active", "Open SSE streams")
+auth_failures = registry.counter(
+    "mcp_auth_failures_total", "Rejected authentication or authorization attempts", ("reason",))
+
+
+@registry.collector
+def _collect_tool_cache() -> List[_Metric]:
+    from .cache import tool_cache
+    hits = Counter("mcp_tool_cache_hits_total", "Tool result cache hits", ("tool",))
+    misses = Counter("mcp_tool_cache_misses_total", "Tool result cache misses", ("tool",))
+    evictions = Counter("mcp_tool_cache_evictions_total", "Tool result cache evictions", ("tool",))
+    size = Gauge("mcp_tool_cache_bytes", "Tool result cache size in bytes", ("tool",))
+    for tool, stats in tool_cache.stats().items():
+        hits.values[(tool,)] = stats["hits"]
+        misses.values[(tool,)] = stats["misses"]
+        evictions.values[(tool,)] = stats["evictions"]
+        size.values[(tool,)] = stats["bytes"]
+    return [hits, misses, evictions, size]
+
+
+@registry.collector
+def _collect_resource_cache() -> List[_Metric]:
+    from .cache import resource_cache
+    metrics = []
+    stats = resource_cache.stats()
+    for key in ("hits", "misses", "evictions"):
+        metric = Counter(f"mcp_resource_cache_{key}_total", f"Resource cache {key}")
+        metric.values[()] = stats[key]
+        metrics.append(metric)
+    size = Gauge("mcp_resource_cache_bytes", "Resource cache size in bytes")
+    size.values[()] = stats["bytes"]
+    return metrics + [size]
+
+
+@registry.collector
+def _collect_prompt_templates() -> List[_Metric]:
+    from .templates import templates
+    hits = Counter("mcp_prompt_render_cache_hits_total", "Prompt render cache hits", ("prompt",))
+    misses = Counter("mcp_prompt_render_cache_misses_total", "Prompt render cache misses", ("prompt",))
+    for prompt, template in templates.items():
+        stats = template.stats()
+        hits.values[(prompt,)] = stats["hits"]
+        misses.values[(prompt,)] = stats["misses"]
+    return [hits, misses]
+
+
+@registry.collector
+def _collect_streams() -> List[_Metric]:
+    from .streaming import stream_stats
+    active = Gauge("mcp_tool_streams_active", "Streaming tool calls in progress")
+    chunks = Counter("mcp_tool_stream_chunks_total", "Chunks produced by streaming tools")
+    aborted = Counter("mcp_tool_streams_aborted_total", "Streaming tool calls aborted by backpressure or size limits")
+    stats = stream_stats.stats()
+    active.values[()] = stats["active"]
+    chunks.values[()] = stats["chunks"]
+    aborted.values[()] = stats["aborted"]
+    return [active, chunks, aborted]
+
+
+@registry.collector
+def _collect_queues() -> List[_Metric]:
+    from .admission import admission
+    from .execution import tool_executor
+    in_flight = Gauge("mcp_admission_in_flight", "Admitted tool calls in progress")
+    queued = Gauge("mcp_admission_queue_depth", "Tool calls waiting for admission")
+    rejected = Counter("mcp_admission_rejected_total", "Requests rejected by admission control")
+    pending = Gauge("mcp_executor_pending", "Tool calls submitted to thread/process pools", ("mode",))
+    stats = admission.stats()
+    in_flight.values[()] = stats["in_flight"]
+    queued.values[()] = stats["queued"]
+    rejected.values[()] = stats["rejected"]
+    for mode, count in tool_executor.pending.items():
+        pending.values[(mode,)] = count
+    return [in_flight, queued, rejected, pending]
+
+
+class RequestMetricsMiddleware(Middleware):
+    """统计工具、提示词、资源调用的次数、错误与延迟"""
+
+    async def _observe(self, kind: str, name: str, context: MiddlewareContext, call_next: CallNext):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await call_next(context)
+            status = "error" if getattr(result, "is_error", False) else "ok"
+            return result
+        except AuthorizationError:
+            auth_failures.inc("forbidden")
+            raise
+        finally:
+            request_duration.observe(time.perf_counter() - start, kind, name)
+            requests_total.inc(kind, name, status)
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next: CallNext):
+        return await self._observe("tool", context.message.name, context, call_next)
+
+    async def on_get_prompt(self, context: MiddlewareContext, call_next: CallNext):
+        return await self._observe("prompt", context.message.name, context, call_next)
+
+    async def on_read_resource(self, context: MiddlewareContext, call_next: CallNext):
+        return await self._observe("resource", await self._resource_name(context), context, call_next)
+
+    @staticmethod
+    async def _resource_name(context: MiddlewareContext) -> str:
+        """资源的标签：资源名（模板资源为模板名），不按URI区分，避免时间序列随URI无限增长"""
+        if context.fastmcp_context is None:
+            return "unknown"
+        server = context.fastmcp_context.fastmcp
+        uri = str(context.message.uri)
+        component = await server.get_resource(uri)
+        if component is None:
+            component = await server.get_resource_template(uri)
+        return component.name if component is not None else "unknown"
+
+
+class HTTPMetricsMiddleware:
+    """统计活跃SSE流与HTTP层认证失败的ASGI中间件"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        streaming = False
+
+        async def metered_send(message):
+            nonlocal streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if status == 401:
+                    auth_failures.inc("unauthenticated")
+                elif status == 403:
+                    auth_failures.inc("forbidden")
+                elif scope["method"] == "GET":
+                    for key, value in message.get("headers", []):
+                        if key.lower() == b"content-type" and value.startswith(b"text/event-stream"):
+                            streaming = True
+                            sse_sessions.inc()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, metered_send)
+        finally:
+            if streaming:
+                sse_sessions.dec()
+
+
+# 多worker模式下由worker设置：(运行目录, 本worker的socket路径)
+_peers: Optional[Tuple[str, str]] = None
+
+
+def configure_peers(run_dir: str, own_socket: str):
+    """设置其他worker的位置，/metrics 将合并它们的指标"""
+    global _peers
+    _peers = (run_dir, own_socket)
+
+
+async def _peer_snapshots() -> List[Dict[str, Dict[str, Any]]]:
+    if _peers is None:
+        return []
+    import httpx
+
+    run_dir, own_socket = _peers
+    snapshots = []
+    for path in sorted(glob.glob(os.path.join(run_dir, "worker-*.sock"))):
+        if path == own_socket:
+            continue
+        try:
+            transport = httpx.AsyncHTTPTransport(uds=path)
+            async with httpx.AsyncClient(transport=transport, base_url="http://worker", timeout=2.0) as client:
+                response = await client.get("/metrics", params={"local": "1"})
+                response.raise_for_status()
+                snapshots.append(response.json())
+        except (httpx.HTTPError, ValueError):
+            # worker正在重启或已退出，跳过
+            continue
+    return snapshots
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """GET /metrics，启用认证时需要有效的Bearer token"""
+    from .auth import verify_request
+    from .server import mcp
+
+    # 其他worker通过运行目录下本worker的私有Unix socket读取指标，不带token
+    server = request.scope.get("server")
+    from_peer = _peers is not None and server is not None and server[0] == _peers[1]
+    if not from_peer and not await verify_request(mcp, request):
+        return JSONResponse({"error": "unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    local = registry.snapshot()
+    if request.query_params.get("local"):
+        return JSONResponse(local)
+    snapshot = merge_snapshots([local] + await _peer_snapshots())
+    return PlainTextResponse(render(snapshot), media_type=CONTENT_TYPE)
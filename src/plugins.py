@@ -0,0 +1,74 @@
+"""
+插件模块 - 发现组件子模块与第三方入口点插件
+
+组件来源（source）用字符串表示：
+- "package.module"：导入即注册（模块内使用 @mcp.tool 等装饰器）
+- "package.module:register"：导入后调用 register(server) 注册组件，
+  第三方插件通常使用这种形式，不需要导入本项目的服务器实例
+
+第三方包在 pyproject.toml 中声明入口点即可被发现：
+
+    [project.entry-points."fastapi_mcp.plugins"]
+    my_tools = "my_package.mcp_tools:register"
+"""
+
+import importlib
+import importlib.util
+import logging
+import pkgutil
+from typing import Iterable, List
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "fastapi_mcp.plugins"
+PLUGINS_ENV = "MCP_PLUGINS"
+
+
+def module_of(source: str) -> str:
+    """组件来源对应的模块名"""
+    return source.partition(":")[0]
+
+
+def submodules(package: str) -> List[str]:
+    """不导入包本身，列出包目录下的子模块（跳过以下划线开头的模块）"""
+    try:
+        spec = importlib.util.find_spec(package)
+    except (ImportError, ValueError):
+        return []
+    if spec is None or not spec.submodule_search_locations:
+        return []
+    return sorted(
+        f"{package}.{info.name}"
+        for info in pkgutil.iter_modules(spec.submodule_search_locations)
+        if not info.name.startswith("_")
+    )
+
+
+def entry_point_sources(group: str = ENTRY_POINT_GROUP) -> List[str]:
+    """已安装的第三方插件"""
+    from importlib.metadata import entry_points
+
+    return sorted(ep.value.replace(" ", "") for ep in entry_points(group=group))
+
+
+def discover(packages: Iterable[str], plugins: bool = True) -> List[str]:
+    """按顺序返回所有组件来源：各包本身及其子模块，然后是入口点插件"""
+    sources = []
+    for package in packages:
+        sources.append(package)
+        sources.extend(submodules(package))
+    if plugins:
+        sources.extend(s for s in entry_point_sources() if s not in sources)
+    return sources
+
+
+def load(server, source: str):
+    """导入组件来源并在需要时调用其注册函数"""
+    module_name, _, attr = source.partition(":")
+    module = importlib.import_module(module_name)
+    if attr:
+        register = module
+        for part in attr.split("."):
+            register = getattr(register, part)
+        register(server)
+    logger.debug("Loaded component source %s", source)
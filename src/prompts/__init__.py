@@ -1,15 +1,15 @@
 """
 提示词模块 - 在此目录下添加新的提示词
 每个提示词应该是一个函数，使用 @mcp.prompt 装饰器
+用 @prompt_template 声明的提示词在定义时预编译模板，相同参数的渲染结果会被缓存
 """
 
 from ..server import mcp
+from ..templates import prompt_template
 
 
 @mcp.prompt
-def analyze_code(code: str, language: str = "python") -> str:
-    """Analyze code and provide improvements."""
-    return f"""Please analyze the following {language} code and provide feedback:
+@prompt_template("""Please analyze the following {language} code and provide feedback:
 
 ```{language}
 {code}
@@ -20,41 +20,41 @@ Consider:
 2. Potential bugs or issues
 3. Performance considerations
 4. Best practices
-"""
+""")
+def analyze_code(code: str, language: str = "python") -> str:
+    """Analyze code and provide improvements."""
 
 
 @mcp.prompt
-def summarize_text(text: str, max_length: int = 100) -> str:
-    """Summarize the given text."""
-    return f"""Please summarize the following text in {max_length} words or less:
+@prompt_template("""Please summarize the following text in {max_length} words or less:
 
 {text}
 
-Summary:"""
+Summary:""")
+def summarize_text(text: str, max_length: int = 100) -> str:
+    """Summarize the given text."""
 
 
 @mcp.prompt
-def translate_text(text: str, target_language: str = "English") -> str:
-    """Translate text to the target language."""
-    return f"""Please translate the following text to {target_language}:
+@prompt_template("""Please translate the following text to {target_language}:
 
 {text}
 
-Translation:"""
+Translation:""")
+def translate_text(text: str, target_language: str = "English") -> str:
+    """Translate text to the target language."""
 
 
 @mcp.prompt
+@prompt_template("""Generate {num_questions} practice questions about {topic}. For each question, provide the answer as well.
+
+Questions:""")
 def generate_questions(topic: str, num_questions: int = 3) -> str:
     """Generate practice questions about a topic."""
-    return f"""Generate {num_questions} practice questions about {topic}. For each question, provide the answer as well.
-
-Questions:"""
 
 
 @mcp.prompt
-def create_essay_outline(topic: str, essay_type: str = "argumentative") -> str:
-    """Create an essay outline for a given topic."""
-    return f"""Create an outline for a {essay_type} essay about {topic}.
+@prompt_template("""Create an outline for a {essay_type} essay about {topic}.
 
 Include:
 1. Introduction with thesis statement
@@ -62,4 +62,6 @@ Include:
 3. Counter-arguments (if applicable)
 4. Conclusion
 
-Outline:"""
+Outline:""")
+def create_essay_outline(topic: str, essay_type: str = "argumentative") -> str:
+    """Create an essay outline for a given topic."""
@@ -0,0 +1,154 @@
+"""
+范围读取模块 - 大资源的分段读取
+
+普通资源一次返回全部内容。使用 @ranged 的资源函数只返回文件路径，
+读取时按 offset/length 查询参数返回其中一段：
+
+- MCP 读取：用 mmap 只映射请求的窗口，每次最多返回 max_length 字节，
+  结果 meta 中的 nextOffset 用于继续读取，读取1GB的文件不需要1GB内存
+- HTTP 读取：GET /resources/raw?uri=... 直接以文件响应返回，支持 Range 请求头，
+  按64KB分块从磁盘发送
+
+示例:
+    @mcp.resource("logs://{name}{?offset,length}", mime_type="text/plain")
+    @ranged(max_length=1024 * 1024)
+    def read_log(name: str) -> Path:
+        return safe_path(LOG_DIR, name)
+"""
+
+import functools
+import inspect
+import mimetypes
+import mmap
+import os
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+from fastmcp.exceptions import ResourceError
+from fastmcp.resources import ResourceContent, ResourceResult
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, Response
+
+from .admission import Overloaded, admission, client_key, overloaded_response
+from .auth import request_access_token
+
+DEFAULT_MAX_LENGTH = 1024 * 1024
+
+
+def safe_path(root: Union[str, Path], name: str) -> Path:
+    """root 目录下的文件路径，拒绝跳出 root 的名称"""
+    root = Path(root).resolve()
+    path = (root / name).resolve()
+    if root not in path.parents:
+        raise ResourceError(f"Invalid resource name: {name!r}")
+    return path
+
+
+def read_range(path: Union[str, Path], offset: int, length: int) -> Tuple[bytes, int]:
+    """读取 [offset, offset+length) 的内容，返回 (数据, 文件大小)"""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if offset > size:
+            raise ResourceError(f"Offset {offset} is beyond the end of the resource ({size} bytes)")
+        length = min(length, size - offset)
+        if length <= 0:
+            return b"", size
+        # 映射起点需按分配粒度对齐，只映射请求的窗口
+        start = offset - offset % mmap.ALLOCATIONGRANULARITY
+        with mmap.mmap(f.fileno(), offset + length - start, access=mmap.ACCESS_READ, offset=start) as window:
+            return window[offset - start:], size
+
+
+class RangedResource:
+    """一个分段读取的资源"""
+
+    def __init__(self, fn: Callable, max_length: int, mime_type: Optional[str]):
+        self.fn = fn
+        self.max_length = max_length
+        self.mime_type = mime_type
+
+    def path(self, **params) -> Path:
+        """调用资源函数得到文件路径"""
+        path = Path(self.fn(**params))
+        if not path.is_file():
+            raise ResourceError(f"Resource file not found: {path.name}")
+        return path
+
+    def media_type(self, path: Path) -> str:
+        return self.mime_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+    def read(self, path: Path, offset: int = 0, length: Optional[int] = None) -> ResourceResult:
+        if offset < 0 or (length is not None and length < 0):
+            raise ResourceError("offset and length must not be negative")
+        length = self.max_length if length is None else min(length, self.max_length)
+        data, size = read_range(path, offset, length)
+        end = offset + len(data)
+        meta = {
+            "offset": offset,
+            "length": len(data),
+            "size": size,
+            "nextOffset": end if end < size else None,
+        }
+        return ResourceResult([ResourceContent(data, mime_type=self.media_type(path), meta=meta)])
+
+
+def ranged(max_length: int = DEFAULT_MAX_LENGTH, mime_type: Optional[str] = None) -> Callable:
+    """
+    把返回文件路径的函数包装为分段读取的资源
+
+    包装后的函数多出 offset 与 length 两个参数，资源URI模板应声明
+    {?offset,length} 查询参数。
+
+    Args:
+        max_length: 单次读取返回的最大字节数
+        mime_type: 内容类型，默认按文件扩展名推断
+    """
+    def decorator(fn: Callable) -> Callable:
+        resource = RangedResource(fn, max_length, mime_type)
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, offset: int = 0, length: Optional[int] = None, **kwargs) -> ResourceResult:
+            params = signature.bind(*args, **kwargs).arguments
+            return resource.read(resource.path(**params), offset, length)
+
+        wrapper.__signature__ = signature.replace(
+            parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter("offset", inspect.Parameter.KEYWORD_ONLY, default=0, annotation=int),
+                inspect.Parameter("length", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=Optional[int]),
+            ],
+            return_annotation=ResourceResult,
+        )
+        wrapper.__annotations__ = {
+            **fn.__annotations__, "offset": int, "length": Optional[int], "return": ResourceResult,
+        }
+        wrapper.__ranged__ = resource
+        return wrapper
+    return decorator
+
+
+async def raw_resource_endpoint(request: Request) -> Response:
+    """GET /resources/raw?uri=...，支持 Range 请求头；与 /mcp 一样按token限速"""
+    from .server import mcp
+
+    access = await request_access_token(mcp, request)
+    if mcp.auth is not None and access is None:
+        return JSONResponse({"error": "unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    try:
+        admission.check_rate(client_key(request.scope, access), admission.token_limit)
+    except Overloaded as e:
+        return overloaded_response(e)
+    uri = request.query_params.get("uri", "")
+    template = await mcp.get_resource_template(uri) if uri else None
+    resource = getattr(getattr(template, "fn", None), "__ranged__", None)
+    if resource is None:
+        return JSONResponse({"error": f"No ranged resource matches {uri!r}"}, status_code=404)
+    params = template.matches(uri) or {}
+    params.pop("offset", None)
+    params.pop("length", None)
+    try:
+        path = resource.path(**params)
+    except ResourceError as exc:
+        return JSONResponse({"error": str(exc)}, status_code=404)
+    return FileResponse(path, media_type=resource.media_type(path))
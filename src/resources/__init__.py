@@ -1,12 +1,35 @@
 """
 资源模块 - 在此目录下添加新的资源文件
 每个资源应该是一个函数，使用 @mcp.resource 装饰器
+内容不随调用方变化的资源可以加上 @cacheable_resource 启用缓存
+大文件资源用 @ranged 按 offset/length 分段读取
 """
 
+import os
+
+from fastmcp.exceptions import ResourceError
+
+from ..cache import cacheable_resource
+from ..ranges import ranged, safe_path
 from ..server import mcp
 
+LOG_DIR_ENV = "MCP_LOG_DIR"
+
+# data://{table}/{id} 的示例数据
+SAMPLE_TABLES = {
+    "users": {
+        "1": {"id": 1, "name": "Alice", "role": "admin"},
+        "2": {"id": 2, "name": "Bob", "role": "user"},
+    },
+    "products": {
+        "1": {"id": 1, "name": "Keyboard", "price": 49.0},
+        "2": {"id": 2, "name": "Monitor", "price": 199.0},
+    },
+}
+
 
 @mcp.resource("config://app-info")
+@cacheable_resource()
 def get_app_info() -> dict:
     """Return application information."""
     return {
@@ -14,3 +37,20 @@ def get_app_info() -> dict:
         "version": "1.0.0",
         "description": "A demo MCP server with FastAPI integration",
     }
+
+
+@mcp.resource("logs://{name}{?offset,length}", mime_type="text/plain")
+@ranged(mime_type="text/plain")
+def read_log(name: str):
+    """Read a log file from the log directory, one byte range at a time."""
+    return safe_path(os.environ.get(LOG_DIR_ENV, "logs"), name)
+
+
+@mcp.resource("data://{table}/{id}")
+@cacheable_resource(maxsize=1024)
+def get_record(table: str, id: str) -> dict:
+    """Return one record from a sample table."""
+    record = SAMPLE_TABLES.get(table, {}).get(id)
+    if record is None:
+        raise ResourceError(f"Record not found: {table}/{id}")
+    return record
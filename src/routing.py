@@ -0,0 +1,250 @@
+"""
+路由模块 - 资源URI到资源与模板的预编译索引
+
+FastMCP 的本地provider每次读取资源都遍历全部组件：静态资源逐个比较URI，
+资源模板逐个执行正则匹配，耗时随组件数线性增长。ResourceIndex 替换这两个查找：
+
+- 静态资源：URI -> 资源的字典
+- 资源模板：按 "/" 分段的前缀树，字面量段精确匹配，含参数的段匹配任意一段，
+  {var*} 匹配剩余的所有段；树只用于筛选候选模板，最终仍由模板自身的
+  matches() 确认，匹配语义与原实现一致（多个模板同时匹配时的选择也相同）
+- 解析结果按URI缓存在LRU中
+
+组件增删时索引与缓存整体失效，在下一次查找时重建。
+
+FastMCP 注册每个组件时还会遍历全部已有组件检查版本混用，注册N个组件的耗时是O(N²)
+（1万个模板需要一分多钟）。ResourceIndex 同时把这项检查改为按组件标识分组查找。
+
+这些替换依赖 LocalProvider 的内部方法（pyproject 中固定了测试过的 fastmcp 版本），
+provider 缺少其中任何一个时不做替换，保留 FastMCP 原有的查找。
+
+示例:
+    ResourceIndex(mcp._local_provider).install()
+"""
+
+import gc
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from fastmcp.resources import Resource, ResourceTemplate
+from fastmcp.utilities.versions import version_sort_key
+
+logger = logging.getLogger(__name__)
+
+# install() 替换或使用的 LocalProvider 内部属性
+_PROVIDER_HOOKS = (
+    "_components", "_add_component", "_remove_component", "_check_version_mixing",
+    "_get_component_identity", "_get_resource", "_get_resource_template",
+)
+
+# 保持原样的URI字符（RFC 3986 保留字符），其他字符在URI中可能被百分号编码
+_RESERVED = ":/?#[]@!$&'()*+,;="
+
+
+def _path_segments(template: str) -> Optional[List[str]]:
+    """模板路径部分的各段，无法按段索引的模板返回None"""
+    if "#" in template:
+        return None
+    path = template.split("{?", 1)[0]
+    return path.split("/")
+
+
+def _is_exact(segment: str) -> bool:
+    """字面量段在URI中只有一种写法时才能精确匹配"""
+    return "{" not in segment and quote(segment, safe=_RESERVED) == segment and "%" not in segment
+
+
+class _Node:
+    __slots__ = ("literals", "param", "terminal", "tails")
+
+    def __init__(self):
+        self.literals: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        # 在此结束的模板，以及在此处开始 {var*} 的模板
+        self.terminal: List[int] = []
+        self.tails: List[int] = []
+
+    def child(self, segment: str) -> "_Node":
+        if _is_exact(segment):
+            node = self.literals.get(segment)
+            if node is None:
+                node = self.literals[segment] = _Node()
+            return node
+        if self.param is None:
+            self.param = _Node()
+        return self.param
+
+
+class TemplateTrie:
+    """资源模板的分段前缀树"""
+
+    def __init__(self, templates: List[ResourceTemplate]):
+        self.templates = templates
+        self.root = _Node()
+        # 无法分段的模板，总是作为候选
+        self.unindexed: List[int] = []
+        for position, template in enumerate(templates):
+            segments = _path_segments(template.uri_template)
+            if segments is None:
+                self.unindexed.append(position)
+                continue
+            node = self.root
+            for segment in segments:
+                if "*}" in segment:
+                    node.tails.append(position)
+                    break
+                node = node.child(segment)
+            else:
+                node.terminal.append(position)
+
+    def candidates(self, uri: str) -> List[int]:
+        """可能匹配URI的模板位置（按注册顺序）"""
+        segments = uri.partition("#")[0].partition("?")[0].split("/")
+        found = list(self.unindexed)
+        stack: List[Tuple[_Node, int]] = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            found.extend(node.tails)
+            if depth == len(segments):
+                found.extend(node.terminal)
+                continue
+            literal = node.literals.get(segments[depth])
+            if literal is not None:
+                stack.append((literal, depth + 1))
+            if node.param is not None:
+                stack.append((node.param, depth + 1))
+        found.sort()
+        return found
+
+
+class ResourceIndex:
+    """
+    本地provider的资源查找索引
+
+    Args:
+        provider: FastMCP 的 LocalProvider（server._local_provider）
+        maxsize: 按URI缓存的解析结果数
+    """
+
+    def __init__(self, provider, maxsize: int = 4096):
+        self.provider = provider
+        self.maxsize = maxsize
+        self._resources: Optional[Dict[str, List[Resource]]] = None
+        self._trie: Optional[TemplateTrie] = None
+        self._resolved: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        # (组件类型, 名称或URI) -> 组件，用于注册时的版本混用检查
+        self._identities: Optional[Dict[Tuple[type, str], List[Any]]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def install(self) -> "ResourceIndex":
+        """替换provider的资源查找与版本混用检查，并在组件增删时失效索引"""
+        provider = self.provider
+        missing = [name for name in _PROVIDER_HOOKS if not hasattr(provider, name)]
+        if missing:
+            logger.warning("Resource index disabled: provider has no %s", ", ".join(missing))
+            return self
+        add, remove = provider._add_component, provider._remove_component
+        self._check_version_mixing_original = provider._check_version_mixing
+
+        def add_component(component):
+            result = add(component)
+            if self._identities is not None and result is component:
+                self._identities.setdefault(provider._get_component_identity(component), []).append(component)
+            self.invalidate()
+            return result
+
+        def remove_component(key):
+            result = remove(key)
+            self._identities = None
+            self.invalidate()
+            return result
+
+        provider._add_component = add_component
+        provider._remove_component = remove_component
+        provider._check_version_mixing = self._check_version_mixing
+        provider._get_resource = self.get_resource
+        provider._get_resource_template = self.get_resource_template
+        return self
+
+    def _check_version_mixing(self, component):
+        provider = self.provider
+        if self._identities is None:
+            identities: Dict[Tuple[type, str], List[Any]] = {}
+            for existing in provider._components.values():
+                identities.setdefault(provider._get_component_identity(existing), []).append(existing)
+            self._identities = identities
+        versioned = component.version is not None
+        for existing in self._identities.get(provider._get_component_identity(component), ()):
+            if (existing.version is not None) != versioned:
+                # 由FastMCP原有的检查给出错误信息
+                self._check_version_mixing_original(component)
+                return
+
+    def invalidate(self):
+        self._resources = None
+        self._trie = None
+        self._resolved.clear()
+
+    def _build(self):
+        resources: Dict[str, List[Resource]] = {}
+        templates: List[ResourceTemplate] = []
+        for component in self.provider._components.values():
+            if isinstance(component, Resource):
+                resources.setdefault(str(component.uri), []).append(component)
+            elif isinstance(component, ResourceTemplate):
+                templates.append(component)
+        # 建树时分配大量小对象，会反复触发对全部组件的完整GC，构建期间暂停GC
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._trie = TemplateTrie(templates)
+        finally:
+            if enabled:
+                gc.enable()
+        self._resources = resources
+
+    def _cached(self, kind: str, uri: str, version, lookup):
+        if version:
+            return lookup(uri, version)
+        key = (kind, uri)
+        if key in self._resolved:
+            self._resolved.move_to_end(key)
+            self.hits += 1
+            return self._resolved[key]
+        self.misses += 1
+        result = lookup(uri, None)
+        self._resolved[key] = result
+        if len(self._resolved) > self.maxsize:
+            self._resolved.popitem(last=False)
+        return result
+
+    def _lookup_resource(self, uri: str, version) -> Optional[Resource]:
+        if self._resources is None:
+            self._build()
+        matching = self._resources.get(uri, [])
+        if version:
+            matching = [r for r in matching if version.matches(r.version)]
+        return max(matching, key=version_sort_key) if matching else None
+
+    def _lookup_template(self, uri: str, version) -> Optional[ResourceTemplate]:
+        if self._trie is None:
+            self._build()
+        templates = self._trie.templates
+        matching = [
+            templates[i] for i in self._trie.candidates(uri) if templates[i].matches(uri) is not None
+        ]
+        if version:
+            matching = [t for t in matching if version.matches(t.version)]
+        return max(matching, key=version_sort_key) if matching else None
+
+    async def get_resource(self, uri: str, version=None) -> Optional[Resource]:
+        return self._cached("resource", uri, version, self._lookup_resource)
+
+    async def get_resource_template(self, uri: str, version=None) -> Optional[ResourceTemplate]:
+        return self._cached("template", uri, version, self._lookup_template)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._resolved)}
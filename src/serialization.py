@@ -0,0 +1,410 @@
+"""
+序列化模块 - JSON后端与组件输出的预编译编码器
+
+MCP_JSON 环境变量（或 main.py 的 --json）选择后端（默认auto），所有传输共用：
+
+- orjson / msgspec: 先用快速的JSON库解析为Python对象，再由 pydantic 校验为消息；
+  请求、通知与响应的载荷本身就是 dict，编码时直接交给JSON库输出，
+  不经 pydantic 逐层转换。100KB 的消息解码快约40%，编码快1.3到6倍
+  （含大量非ASCII文本时差距最大）
+- json: 使用 pydantic 自带的JSON解析与输出（与 SDK 默认传输相同）
+- auto: 依次尝试 orjson、msgspec，都未安装时使用 json
+
+请求的后端未安装时记录警告并按 auto 的顺序回退。快速后端无法处理的消息
+自动改用 pydantic 编解码。注意 orjson 把输入中超出64位的整数解析为浮点数，
+需要精确大整数的部署应使用 MCP_JSON=json。
+
+组件输出：FastMCP 对工具返回值要做三遍通用序列化（按返回类型转为JSON对象、
+生成文本内容、构造 ToolResult 时再校验一遍），资源返回的 dict 用标准库 json 编码。
+OutputEncoders 在组件注册时按函数的返回类型注解为每个工具与资源预编译编码器：
+返回值是JSON原生类型时直接由后端编码一次，pydantic 模型等类型用预先构建的
+TypeAdapter 转换，结果直接构造为 ToolResult/ResourceResult。编码器处理不了的值
+（内容块、bytes、与注解不符的值等）原样交给 FastMCP，行为不变。
+这一步在传输之前完成，stdio、SSE 与 Streamable-HTTP 都受益。
+
+示例:
+    message = decode_message(line)
+    end = encode_message_into(message, buffer, 0)
+    OutputEncoders(mcp._local_provider).install()
+"""
+
+import functools
+import inspect
+import logging
+import os
+import typing
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import mcp_types as types
+import pydantic_core
+from pydantic import PydanticSchemaGenerationError
+from fastmcp.resources import ResourceContent, ResourceResult
+from fastmcp.resources.function_resource import FunctionResource
+from fastmcp.resources.template import FunctionResourceTemplate
+from fastmcp.tools import ToolResult
+from fastmcp.tools.function_tool import FunctionTool
+from fastmcp.utilities.async_utils import is_coroutine_function
+from fastmcp.utilities.types import Audio, File, Image, get_cached_typeadapter
+
+logger = logging.getLogger(__name__)
+
+JSON_ENV = "MCP_JSON"
+BACKENDS = ("orjson", "msgspec", "json")
+
+_ERRORS = (TypeError, ValueError, OverflowError)
+
+
+class JSONBackend:
+    """
+    一个JSON库
+
+    Args:
+        name: 后端名称
+        loads: bytes -> 对象
+        dumps: 对象 -> bytes，无法编码的对象抛出异常（不回退为 str()）
+        encode_into: 把对象编码进 bytearray 的 offset 处，None表示用 dumps 后复制
+        errors: 该库编解码失败时抛出的异常类型
+    """
+
+    def __init__(self, name: str, loads: Callable[[bytes], Any], dumps: Callable[[Any], bytes],
+                 encode_into: Optional[Callable[[Any, bytearray, int], None]] = None,
+                 errors: Tuple[type, ...] = ()):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self._encode_into = encode_into
+        self.errors = _ERRORS + errors
+        # json 后端的消息直接用 pydantic 模型自带的编解码
+        self.native_messages = name == "json"
+
+    def write(self, obj: Any, buffer: bytearray, offset: int) -> int:
+        """把对象编码写入 buffer[offset:]，返回写入后的结束位置"""
+        if self._encode_into is not None:
+            self._encode_into(obj, buffer, offset)
+            return len(buffer)
+        data = self.dumps(obj)
+        end = offset + len(data)
+        buffer[offset:end] = data
+        return end
+
+    def __repr__(self):
+        return f"JSONBackend({self.name!r})"
+
+
+def _orjson() -> JSONBackend:
+    import orjson
+    # 日期、dataclass 与内置类型的子类（如 str 枚举）交由 pydantic 处理，与 FastMCP 的输出一致
+    option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    return JSONBackend("orjson", orjson.loads, functools.partial(orjson.dumps, option=option))
+
+
+def _msgspec() -> JSONBackend:
+    import msgspec
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+    return JSONBackend("msgspec", decoder.decode, encoder.encode, encoder.encode_into, (msgspec.MsgspecError,))
+
+
+def _pydantic() -> JSONBackend:
+    return JSONBackend("json", pydantic_core.from_json, pydantic_core.to_json)
+
+
+_FACTORIES: Dict[str, Callable[[], JSONBackend]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _pydantic,
+}
+
+_backend: Optional[JSONBackend] = None
+
+
+def load_backend(name: str = "auto") -> JSONBackend:
+    """按名称加载后端，未安装时按 orjson、msgspec、json 的顺序回退"""
+    name = (name or "auto").strip().lower()
+    if name != "auto" and name not in _FACTORIES:
+        raise ValueError(f"Unknown JSON backend {name!r}, expected one of: auto, {', '.join(BACKENDS)}")
+    order = BACKENDS if name == "auto" else (name,) + tuple(b for b in BACKENDS if b != name)
+    for candidate in order:
+        try:
+            backend = _FACTORIES[candidate]()
+        except ImportError:
+            continue
+        if name not in ("auto", candidate):
+            logger.warning("JSON backend %r is not installed, using %r", name, candidate)
+        return backend
+    raise AssertionError("the json backend is always available")
+
+
+def get_backend() -> JSONBackend:
+    """当前后端，首次使用时按 MCP_JSON 加载"""
+    global _backend
+    if _backend is None:
+        _backend = load_backend(os.environ.get(JSON_ENV, "auto"))
+    return _backend
+
+
+def set_backend(name: Optional[str]) -> JSONBackend:
+    """切换后端，None表示下次使用时重新读取 MCP_JSON"""
+    global _backend
+    _backend = load_backend(name) if name is not None else None
+    return _backend
+
+
+def dumps_text(obj: Any) -> str:
+    """用当前后端把JSON原生对象编码为文本"""
+    return get_backend().dumps(obj).decode()
+
+
+def decode_message(data: bytes) -> types.JSONRPCMessage:
+    """一行JSON解码为 JSON-RPC 消息"""
+    backend = get_backend()
+    if not backend.native_messages:
+        try:
+            obj = backend.loads(data)
+        except backend.errors:
+            pass
+        else:
+            return types.jsonrpc_message_adapter.validate_python(obj, by_name=False)
+    # 与 SDK 一致，非法的UTF-8字节按替换字符处理
+    return types.jsonrpc_message_adapter.validate_json(data.decode("utf-8", "replace"), by_name=False)
+
+
+_PAYLOAD_MESSAGES = (types.JSONRPCRequest, types.JSONRPCNotification, types.JSONRPCResponse)
+
+
+def encode_message_into(message: types.JSONRPCMessage, buffer: bytearray, offset: int) -> int:
+    """把 JSON-RPC 消息与换行符写入 buffer[offset:]，返回结束位置"""
+    backend = get_backend()
+    end = None
+    if not backend.native_messages and type(message) in _PAYLOAD_MESSAGES:
+        # 与 model_dump_json(exclude_unset=True) 相同的字段与顺序
+        fields = message.model_fields_set
+        obj = {name: getattr(message, name) for name in type(message).model_fields if name in fields}
+        try:
+            end = backend.write(obj, buffer, offset)
+        except backend.errors:
+            pass
+    if end is None:
+        data = message.model_dump_json(by_alias=True, exclude_unset=True).encode()
+        end = offset + len(data)
+        buffer[offset:end] = data
+    buffer[end:end + 1] = b"\n"
+    return end + 1
+
+
+def encode_message(message: types.JSONRPCMessage) -> bytes:
+    """JSON-RPC 消息编码为一行JSON（不含换行符）"""
+    buffer = bytearray()
+    return bytes(buffer[:encode_message_into(message, buffer, 0) - 1])
+
+
+_JSON_TYPES = (dict, list, str, int, float, bool, type(None))
+# 按原样交给 FastMCP 转换的返回值
+_PASSTHROUGH = (ToolResult, types.CallToolResult, ResourceResult, bytes, Image, Audio, File) + typing.get_args(types.ContentBlock)
+
+
+def _native_types(annotation: Any) -> Optional[Tuple[type, ...]]:
+    """
+    注解声明的值本身就是JSON原生对象时，返回可以直接编码的顶层类型
+
+    只识别不会被 pydantic 转换的注解：无注解/Any、标量（值的类型须完全一致，
+    int 注解下的 bool、float 注解下的 int 会被 pydantic 转换）、dict/list 与
+    Dict[str, Any]/List[Any]；其他注解（含带元素类型的容器）返回None。
+    """
+    if annotation in (inspect.Signature.empty, Any):
+        return _JSON_TYPES
+    if annotation in _JSON_TYPES:
+        return (annotation,)
+    origin = typing.get_origin(annotation)
+    if origin in (dict, list) and all(arg in (str, Any) for arg in typing.get_args(annotation)):
+        return (origin,)
+    return None
+
+
+def _leaves(annotation: Any):
+    args = typing.get_args(annotation)
+    if not args:
+        yield annotation
+    for arg in args:
+        yield from _leaves(arg)
+
+
+def _encodable(annotation: Any) -> bool:
+    """返回类型中含有内容块、bytes 等由 FastMCP 特殊处理的类型时不编码"""
+    for leaf in _leaves(annotation):
+        if isinstance(leaf, str):
+            return False
+        if isinstance(leaf, type) and issubclass(leaf, _PASSTHROUGH):
+            return False
+    return True
+
+
+def _return_annotation(fn: Callable) -> Any:
+    try:
+        return typing.get_type_hints(fn).get("return", inspect.Signature.empty)
+    except (NameError, TypeError):
+        # 无法解析的前向引用，保持字符串（不安装编码器）
+        return inspect.signature(fn).return_annotation
+
+
+class ToolOutputEncoder:
+    """
+    一个工具的输出编码器
+
+    Args:
+        annotation: 工具函数的返回类型注解
+        output_schema: 工具的输出 schema（决定结构化内容与是否包装为 {"result": ...}）
+    """
+
+    def __init__(self, annotation: Any, output_schema: Optional[Dict[str, Any]]):
+        self.structured = output_schema is not None
+        self.wrap = bool(output_schema and output_schema.get("x-fastmcp-wrap-result"))
+        self.types = _native_types(annotation)
+        self.adapter = None if self.types is not None else get_cached_typeadapter(annotation)
+        self.encoded = 0
+        self.fallbacks = 0
+
+    def _jsonable(self, value: Any) -> Tuple[bool, Any]:
+        if self.adapter is None:
+            return type(value) in self.types, value
+        if isinstance(value, _PASSTHROUGH):
+            return False, None
+        try:
+            return True, self.adapter.dump_python(value, mode="json", warnings="error")
+        except (pydantic_core.PydanticSerializationError, *_ERRORS):
+            return False, None
+
+    @staticmethod
+    def _content(jsonable: Any) -> list:
+        # 与 FastMCP 一致：None 与空列表没有文本内容
+        if jsonable is None or jsonable == []:
+            return []
+        text = jsonable if isinstance(jsonable, str) else dumps_text(jsonable)
+        return [types.TextContent(type="text", text=text)]
+
+    def encode(self, value: Any) -> Optional[ToolResult]:
+        """编码返回值，无法处理时返回None"""
+        ok, jsonable = self._jsonable(value)
+        if ok and self.structured and not self.wrap and not isinstance(jsonable, dict):
+            # 与 schema 不符的值由 FastMCP 报告错误
+            ok = False
+        if ok:
+            try:
+                content = self._content(jsonable)
+            except get_backend().errors:
+                ok = False
+        if not ok:
+            self.fallbacks += 1
+            return None
+        self.encoded += 1
+        if self.wrap:
+            return ToolResult.model_construct(
+                content=content, structured_content={"result": jsonable},
+                meta={"fastmcp": {"wrap_result": True}}, is_error=False,
+            )
+        structured = jsonable if isinstance(jsonable, dict) else None
+        return ToolResult.model_construct(content=content, structured_content=structured, meta=None, is_error=False)
+
+
+class ResourceOutputEncoder:
+    """一个资源或资源模板的输出编码器（JSON原生返回值）"""
+
+    def __init__(self, mime_type: Optional[str], meta: Optional[Dict[str, Any]]):
+        self.mime_type = mime_type or "application/json"
+        self.meta = meta
+        self.encoded = 0
+        self.fallbacks = 0
+
+    def encode(self, value: Any) -> Optional[ResourceResult]:
+        """编码返回值，无法处理时返回None"""
+        # str 由 FastMCP 直接使用，ResourceContent 列表由 FastMCP 处理
+        if type(value) is str or type(value) not in _JSON_TYPES or (
+            type(value) is list and value and isinstance(value[0], ResourceContent)
+        ):
+            self.fallbacks += 1
+            return None
+        try:
+            text = dumps_text(value)
+        except get_backend().errors:
+            self.fallbacks += 1
+            return None
+        self.encoded += 1
+        return ResourceResult([ResourceContent(text, mime_type=self.mime_type, meta=self.meta)])
+
+
+def _wrap(fn: Callable, encoder) -> Callable:
+    """返回值经编码器转换的函数，签名与原函数相同"""
+    if is_coroutine_function(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            value = await fn(*args, **kwargs)
+            result = encoder.encode(value)
+            return value if result is None else result
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            value = fn(*args, **kwargs)
+            result = encoder.encode(value)
+            return value if result is None else result
+    wrapper.__encoder__ = encoder
+    return wrapper
+
+
+class OutputEncoders:
+    """
+    为本地provider注册的工具、资源与资源模板安装输出编码器
+
+    Args:
+        provider: FastMCP 的 LocalProvider（server._local_provider）
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.encoders: Dict[str, Any] = {}
+
+    def install(self) -> "OutputEncoders":
+        """包装已注册与之后注册的组件"""
+        provider = self.provider
+        add, remove = provider._add_component, provider._remove_component
+
+        def add_component(component):
+            self.attach(component)
+            return add(component)
+
+        def remove_component(key):
+            self.encoders.pop(key, None)
+            return remove(key)
+
+        provider._add_component = add_component
+        provider._remove_component = remove_component
+        for component in list(provider._components.values()):
+            self.attach(component)
+        return self
+
+    def attach(self, component) -> bool:
+        """按组件函数的返回类型注解创建编码器，返回是否已安装"""
+        fn = getattr(component, "fn", None)
+        if fn is None or hasattr(fn, "__encoder__") or inspect.isasyncgenfunction(fn) or inspect.isgeneratorfunction(fn):
+            return False
+        annotation = _return_annotation(fn)
+        if not _encodable(annotation):
+            return False
+        if isinstance(component, FunctionTool):
+            try:
+                encoder = ToolOutputEncoder(annotation, component.output_schema)
+            except PydanticSchemaGenerationError:
+                return False
+        elif isinstance(component, (FunctionResource, FunctionResourceTemplate)):
+            if annotation is str or _native_types(annotation) is None:
+                return False
+            encoder = ResourceOutputEncoder(component.mime_type, component.meta)
+        else:
+            return False
+        component.fn = _wrap(fn, encoder)
+        self.encoders[component.key] = encoder
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        encoded = sum(e.encoded for e in self.encoders.values())
+        fallbacks = sum(e.fallbacks for e in self.encoders.values())
+        return {"components": len(self.encoders), "encoded": encoded, "fallbacks": fallbacks}
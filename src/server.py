@@ -4,26 +4,79 @@ MCP服务器模块 - 统一的MCP服务器实例
 
 from fastmcp import FastMCP
 from typing import Optional
-from .auth import AuthConfig, create_auth, AUTH_TOKEN_ENV
+from .auth import (
+    AuthConfig,
+    CachedTokenVerifier,
+    HashedTokenVerifier,
+    ScopeAuthMiddleware,
+    ToolScopeCheck,
+    create_auth,
+    unwrap_verifier,
+    AUTH_TOKEN_ENV,
+)
+from .admission import ToolAdmissionMiddleware
+from .cache import ResourceCacheMiddleware, ToolCacheMiddleware, resource_cache, tool_cache
+from .lazy import LAZY_LOAD_ENV, LazyProvider
+from .listing import ListingCache
+from .plugins import PLUGINS_ENV, discover, load
+from .routing import ResourceIndex
+from .serialization import OutputEncoders
+from .validation import STRICT_ARGS_ENV, ArgumentValidators
+from .metrics import Counter, RequestMetricsMiddleware, registry
 
 import os
 
+# 组件包：包本身及其子模块都会被发现，连同入口点插件通过 LazyProvider 按需导入
+COMPONENT_MODULES = (f"{__package__}.tools", f"{__package__}.resources", f"{__package__}.prompts")
+
 _auth_config: Optional[AuthConfig] = None
 _mcp_instance: Optional[FastMCP] = None
+_listing: Optional[ListingCache] = None
+_encoders: Optional[OutputEncoders] = None
+_validators: Optional[ArgumentValidators] = None
+_tool_scope_check = ToolScopeCheck()
 
 
 def configure_auth(config: AuthConfig):
-    """配置认证"""
-    global _auth_config, _mcp_instance
+    """
+    配置认证
+    
+    已创建的服务器实例会就地更新：token集合原子替换到现有验证器中，
+    不会重建FastMCP实例，已注册的工具和已建立的SSE会话都不受影响。
+    注意：启用/禁用认证的切换只对之后创建的HTTP应用生效。
+    """
+    global _auth_config
     if not config.validate():
         raise ValueError("Invalid auth configuration")
     _auth_config = config
-    _mcp_instance = None
+    _tool_scope_check.tool_scopes = dict(config.tool_scopes)
+    if _mcp_instance is not None:
+        verifier = unwrap_verifier(_mcp_instance.auth)
+        cached = isinstance(_mcp_instance.auth, CachedTokenVerifier)
+        if (
+            isinstance(verifier, HashedTokenVerifier)
+            and config.enabled
+            and config.tokens
+            and cached == bool(config.cache_ttl)
+        ):
+            verifier.update(config.bearer_tokens())
+            if cached:
+                _mcp_instance.auth.ttl = config.cache_ttl
+        else:
+            _mcp_instance.auth = create_auth(config)
+    if _listing is not None:
+        # 工具scope变化会改变各token可见的工具列表
+        _listing.invalidate()
+
+
+def get_auth_config() -> Optional[AuthConfig]:
+    """获取当前的认证配置"""
+    return _auth_config
 
 
 def get_server(name: str = "FastAPI MCP Demo Server", auth_config: AuthConfig = None) -> FastMCP:
     """获取MCP服务器实例"""
-    global _mcp_instance, _auth_config
+    global _mcp_instance, _auth_config, _listing, _encoders, _validators
     
     config = auth_config or _auth_config
     
@@ -34,14 +87,94 @@ def get_server(name: str = "FastAPI MCP Demo Server", auth_config: AuthConfig =
     
     if _mcp_instance is None:
         auth = create_auth(config)
-        _mcp_instance = FastMCP(name, auth=auth)
+        _tool_scope_check.tool_scopes = dict(config.tool_scopes)
+        _mcp_instance = FastMCP(
+            name,
+            auth=auth,
+            middleware=[
+                RequestMetricsMiddleware(),
+                ScopeAuthMiddleware(auth=_tool_scope_check),
+                ToolCacheMiddleware(tool_cache),
+                ResourceCacheMiddleware(resource_cache),
+                ToolAdmissionMiddleware(),
+            ],
+            strict_input_validation=True if os.environ.get(STRICT_ARGS_ENV) == "1" else None,
+        )
+        ResourceIndex(_mcp_instance._local_provider).install()
+        # 校验器先安装，按输出编码器替换后的最终函数编译
+        _validators = ArgumentValidators(_mcp_instance._local_provider).install()
+        _encoders = OutputEncoders(_mcp_instance._local_provider).install()
+        _listing = ListingCache(_mcp_instance).install()
+        resource_cache.notifier = _listing.notifier
         _auth_config = config
     
     return _mcp_instance
 
 
+@registry.collector
+def _collect_auth_cache():
+    """token验证缓存的命中统计"""
+    auth = _mcp_instance.auth if _mcp_instance is not None else None
+    if not isinstance(auth, CachedTokenVerifier):
+        return []
+    metrics = []
+    for key, value in auth.stats().items():
+        if key == "size":
+            continue
+        metric = Counter(f"mcp_auth_cache_{key}_total", f"Token verification cache {key}")
+        metric.values[()] = value
+        metrics.append(metric)
+    return metrics
+
+
+@registry.collector
+def _collect_listing():
+    """组件列表缓存的命中统计"""
+    if _listing is None:
+        return []
+    metrics = []
+    for key in ("hits", "misses"):
+        metric = Counter(f"mcp_list_cache_{key}_total", f"Component list cache {key}")
+        metric.values[()] = _listing.stats()[key]
+        metrics.append(metric)
+    return metrics
+
+
+@registry.collector
+def _collect_encoders():
+    """组件输出编码器的使用统计"""
+    if _encoders is None:
+        return []
+    stats = _encoders.stats()
+    metrics = []
+    for key, help_text in (("encoded", "Component results encoded by precompiled encoders"),
+                           ("fallbacks", "Component results left to FastMCP's generic conversion")):
+        metric = Counter(f"mcp_output_{key}_total", help_text)
+        metric.values[()] = stats[key]
+        metrics.append(metric)
+    return metrics
+
+
+@registry.collector
+def _collect_validators():
+    """工具参数校验器的使用统计"""
+    if _validators is None:
+        return []
+    stats = _validators.stats()
+    metrics = []
+    for key, help_text in (("fast", "Tool calls validated by the precompiled scalar fast path"),
+                           ("fallbacks", "Tool calls validated by pydantic")):
+        metric = Counter(f"mcp_arguments_{key}_total", help_text)
+        metric.values[()] = stats[key]
+        metrics.append(metric)
+    return metrics
+
+
 mcp = get_server()
 
-from . import tools  # noqa: F401
-from . import resources  # noqa: F401
-from . import prompts  # noqa: F401
+_sources = discover(COMPONENT_MODULES, plugins=os.environ.get(PLUGINS_ENV, "1") != "0")
+if os.environ.get(LAZY_LOAD_ENV, "1") == "0":
+    for _source in _sources:
+        load(mcp, _source)
+else:
+    LazyProvider.install(mcp, _sources)
@@ -0,0 +1,454 @@
+"""
+会话模块 - SSE会话的生命周期管理
+
+客户端崩溃或网络中断（半开连接）后，服务端可能长期发现不了SSE会话已失效，
+会话的流、任务与待发送消息一直占用内存。SessionMiddleware（ASGI）包装
+/mcp/sse 的流式响应，由 SessionManager 统一管理：
+
+- 会话数上限：达到 max_sessions 后新的SSE连接直接返回503
+- 空闲回收：超过 idle_timeout 秒既没有收到 POST 也没有发出消息、或写出一直被阻塞
+  的会话被关闭；计时在单独的任务中进行，客户端不再读取时也能关闭
+- 保活：每 ping_interval 秒写出一条注释行，代理不会断开空闲连接，
+  对端已不存在的连接也会因写入失败而被发现
+- 有界发送队列：发往客户端的消息先进入会话的队列，由单独的任务写出；
+  队列已有 queue_size 条时 send 等待写出任务取走消息，读得慢的客户端使MCP服务器的发送变慢，
+  不会丢失消息。当前的写出阻塞超过 send_timeout 秒（客户端不再读取）时才按 queue_policy
+  丢弃该消息（drop）或断开会话（disconnect）
+- 内存统计：每个会话排队中的字节数与峰值、收发字节数与消息数
+
+默认配置来自环境变量（也可通过 main.py 的 --sse-max-sessions 等参数设置）：
+MCP_SSE_MAX_SESSIONS、MCP_SSE_IDLE_TIMEOUT、MCP_SSE_PING_INTERVAL、
+MCP_SSE_QUEUE_SIZE、MCP_SSE_QUEUE_POLICY、MCP_SSE_SEND_TIMEOUT，数值为0表示不限制或不启用。
+
+GET /admin/sessions 列出当前会话，DELETE /admin/sessions/{session_id} 关闭指定会话。
+启用认证时只能查看和关闭本token建立的会话，带 admin scope 的token可以管理全部会话。
+多worker模式下每个worker各自管理本进程持有的会话。
+"""
+
+import json
+import os
+import re
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from .auth import request_access_token
+from .metrics import Counter, Gauge, registry
+
+
+MAX_SESSIONS_ENV = "MCP_SSE_MAX_SESSIONS"
+IDLE_TIMEOUT_ENV = "MCP_SSE_IDLE_TIMEOUT"
+PING_INTERVAL_ENV = "MCP_SSE_PING_INTERVAL"
+QUEUE_SIZE_ENV = "MCP_SSE_QUEUE_SIZE"
+QUEUE_POLICY_ENV = "MCP_SSE_QUEUE_POLICY"
+SEND_TIMEOUT_ENV = "MCP_SSE_SEND_TIMEOUT"
+
+QUEUE_POLICIES = ("drop", "disconnect")
+
+# 可以查看与关闭所有会话的token scope
+ADMIN_SCOPE = "admin"
+
+# 会话关闭后写出剩余消息的最长等待时间，客户端不再读取时不让请求一直挂起
+CLOSE_TIMEOUT = 5.0
+
+_ENDPOINT_RE = re.compile(rb"session_id=([0-9a-fA-F]+)")
+_PING = b": ping\r\n\r\n"
+
+
+@dataclass
+class SessionLimits:
+    """
+    SSE会话的限制
+
+    max_sessions为同时存在的会话上限；idle_timeout秒内没有活动的会话被关闭；
+    每ping_interval秒发送一次保活注释；queue_size为每个会话待发送消息的上限，
+    队列满时等待写出，写出阻塞超过send_timeout秒时按queue_policy处理。None表示不限制或不启用。
+    """
+    max_sessions: Optional[int] = 1000
+    idle_timeout: Optional[float] = 900.0
+    ping_interval: Optional[float] = 15.0
+    queue_size: int = 256
+    queue_policy: str = "disconnect"
+    send_timeout: Optional[float] = 30.0
+
+    def __post_init__(self):
+        if self.queue_policy not in QUEUE_POLICIES:
+            raise ValueError(f"queue_policy must be one of {QUEUE_POLICIES}, got {self.queue_policy!r}")
+        if self.queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+
+    @classmethod
+    def from_env(cls) -> "SessionLimits":
+        """从环境变量读取，未设置的项使用默认值"""
+        defaults = cls()
+
+        def number(env: str, default, convert):
+            value = os.environ.get(env, "").strip()
+            if not value:
+                return default
+            value = convert(value)
+            return value if value > 0 else None
+
+        return cls(
+            max_sessions=number(MAX_SESSIONS_ENV, defaults.max_sessions, int),
+            idle_timeout=number(IDLE_TIMEOUT_ENV, defaults.idle_timeout, float),
+            ping_interval=number(PING_INTERVAL_ENV, defaults.ping_interval, float),
+            queue_size=number(QUEUE_SIZE_ENV, defaults.queue_size, int) or defaults.queue_size,
+            queue_policy=os.environ.get(QUEUE_POLICY_ENV, "").strip() or defaults.queue_policy,
+            send_timeout=number(SEND_TIMEOUT_ENV, defaults.send_timeout, float),
+        )
+
+
+class SSESession:
+    """一个SSE会话的发送队列与统计"""
+
+    def __init__(self, manager: "SessionManager", client: str, owner: Optional[str] = None):
+        self.manager = manager
+        self.id: Optional[str] = None
+        self.client = client
+        # 建立会话的token的client_id，未启用认证时为None
+        self.owner = owner
+        self.created = time.time()
+        self.last_activity = time.monotonic()
+        self.last_write = self.last_activity
+        self.queue: Deque[Dict[str, Any]] = deque()
+        self.buffered_bytes = 0
+        self.peak_buffered_bytes = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.posts = 0
+        self.messages_out = 0
+        self.dropped = 0
+        self.streaming = False
+        self.finished = False
+        self.closed: Optional[str] = None
+        self.scope = anyio.CancelScope()
+        self._timer = anyio.CancelScope()
+        self._wakeup = anyio.Event()
+        self._space = anyio.Event()
+        # 正在写出的消息开始发送的时间
+        self._sending: Optional[float] = None
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def close(self, reason: str):
+        """关闭会话：立即从注册表移除，并取消会话内的MCP服务器任务，响应随之结束"""
+        if self.closed is None:
+            self.closed = reason
+            self.manager.closed[reason] = self.manager.closed.get(reason, 0) + 1
+            self.manager._unregister(self)
+        self.scope.cancel()
+
+    def info(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "session_id": self.id,
+            "client": self.client,
+            "owner": self.owner,
+            "created": self.created,
+            "age": round(time.time() - self.created, 3),
+            "idle": round(now - self.last_activity, 3),
+            "queued": len(self.queue),
+            "buffered_bytes": self.buffered_bytes,
+            "peak_buffered_bytes": self.peak_buffered_bytes,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "posts": self.posts,
+            "messages_out": self.messages_out,
+            "dropped": self.dropped,
+        }
+
+    async def send(self, message):
+        """MCP应用的send：消息进入队列由写出任务发送，SSE流的消息在队列满时等待写出"""
+        if message["type"] == "http.response.start":
+            content_type = b""
+            for key, value in message.get("headers", []):
+                if key.lower() == b"content-type":
+                    content_type = value
+            self.streaming = message["status"] == 200 and content_type.startswith(b"text/event-stream")
+            self._enqueue(message)
+            return
+        if not self.streaming:
+            self._enqueue(message)
+            return
+        if self.closed is not None:
+            return
+        body = message.get("body", b"")
+        if message.get("more_body", False):
+            if body.startswith(b":"):
+                # 由写出任务统一发送保活注释
+                return
+            if self.id is None:
+                match = _ENDPOINT_RE.search(body)
+                if match:
+                    self.id = match.group(1).decode("ascii").lower()
+                    self.manager._register(self)
+            else:
+                self.messages_out += 1
+                self.touch()
+            if len(self.queue) >= self.manager.limits.queue_size and not await self._wait_for_space():
+                self._overflow()
+                return
+        self._enqueue(message)
+
+    async def _wait_for_space(self) -> bool:
+        """等待写出任务从满队列中取走消息；当前写出阻塞超过 send_timeout 秒时返回False"""
+        timeout = self.manager.limits.send_timeout
+        waiting = time.monotonic()
+        while len(self.queue) >= self.manager.limits.queue_size:
+            self._space = anyio.Event()
+            if timeout is None:
+                await self._space.wait()
+                continue
+            # 从正在写出的消息开始发送时计时，客户端已不再读取时后续消息不必再各等一遍
+            stalled = self._sending if self._sending is not None else waiting
+            remaining = stalled + timeout - time.monotonic()
+            if remaining <= 0:
+                return False
+            with anyio.move_on_after(remaining):
+                await self._space.wait()
+        return True
+
+    def _overflow(self):
+        self.dropped += 1
+        self.manager.dropped += 1
+        if self.manager.limits.queue_policy == "disconnect":
+            self.close("overflow")
+
+    def _enqueue(self, message):
+        size = len(message.get("body", b""))
+        self.queue.append(message)
+        self.buffered_bytes += size
+        if self.buffered_bytes > self.peak_buffered_bytes:
+            self.peak_buffered_bytes = self.buffered_bytes
+        self._wakeup.set()
+
+    def finish(self):
+        """MCP应用已返回：关闭的会话丢弃未发送的消息，未结束的流补上结束消息"""
+        if self.closed is not None:
+            self.queue = deque(m for m in self.queue if m["type"] == "http.response.start")
+            self.buffered_bytes = 0
+        last = self.queue[-1] if self.queue else None
+        ended = last is not None and last["type"] == "http.response.body" and not last.get("more_body", False)
+        if self.streaming and not ended:
+            self.queue.append({"type": "http.response.body", "body": b"", "more_body": False})
+        self.finished = True
+        self._wakeup.set()
+
+    async def write(self, send):
+        """写出任务：按顺序发送队列中的消息"""
+        try:
+            while True:
+                while not self.queue:
+                    if self.finished:
+                        return
+                    self._wakeup = anyio.Event()
+                    await self._wakeup.wait()
+                message = self.queue.popleft()
+                self._space.set()
+                body = message.get("body", b"")
+                self.buffered_bytes -= len(body)
+                self._sending = time.monotonic()
+                await send(message)
+                self._sending = None
+                self.bytes_out += len(body)
+                self.last_write = time.monotonic()
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    return
+        finally:
+            self._timer.cancel()
+
+    async def watch(self):
+        """计时任务：空闲或写出阻塞超过 idle_timeout 时关闭会话，空闲时排入保活注释"""
+        limits = self.manager.limits
+        ticks = [t for t in (limits.ping_interval, limits.idle_timeout) if t]
+        if not ticks:
+            return
+        with self._timer:
+            while not self.finished:
+                waits = [min(ticks)]
+                now = time.monotonic()
+                if self.streaming and limits.idle_timeout:
+                    since = self.last_activity if self._sending is None else min(self.last_activity, self._sending)
+                    if now - since >= limits.idle_timeout:
+                        self.close("idle")
+                        return
+                    waits.append(since + limits.idle_timeout - now)
+                if self.streaming and limits.ping_interval:
+                    # 计时器可能略早于截止时间触发，留出1ms余量
+                    due = self.last_write + limits.ping_interval - now
+                    if due <= 0.001:
+                        if not self.queue and self._sending is None:
+                            self._enqueue({"type": "http.response.body", "body": _PING, "more_body": True})
+                        due = limits.ping_interval
+                    waits.append(due)
+                await anyio.sleep(min(waits))
+
+
+# 所有管理器，用于 /metrics
+_managers: "weakref.WeakSet[SessionManager]" = weakref.WeakSet()
+
+
+class SessionManager:
+    """SSE会话的注册表与限制"""
+
+    def __init__(self, limits: Optional[SessionLimits] = None):
+        self.limits = limits or SessionLimits.from_env()
+        self.sessions: Dict[str, SSESession] = {}
+        self.open = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.closed: Dict[str, int] = {}
+        _managers.add(self)
+
+    def _register(self, session: SSESession):
+        self.sessions[session.id] = session
+
+    def _unregister(self, session: SSESession):
+        if session.id is not None and self.sessions.get(session.id) is session:
+            del self.sessions[session.id]
+
+    def get(self, session_id: str) -> Optional[SSESession]:
+        return self.sessions.get(session_id.lower())
+
+    def close(self, session_id: str, reason: str = "admin") -> bool:
+        """关闭指定会话，会话不存在时返回False"""
+        session = self.get(session_id)
+        if session is None:
+            return False
+        session.close(reason)
+        return True
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [session.info() for session in self.sessions.values()]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.limits.max_sessions,
+            "buffered_bytes": sum(s.buffered_bytes for s in self.sessions.values()),
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "closed": dict(self.closed),
+        }
+
+
+class SessionMiddleware:
+    """管理SSE会话的ASGI中间件，用于 mcp.http_app(transport="sse", middleware=...)"""
+
+    def __init__(self, app, manager: SessionManager, sse_path: str = "/sse"):
+        self.app = app
+        self.manager = manager
+        self.sse_path = sse_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["method"] == "GET" and scope["path"].endswith(self.sse_path):
+            await self._serve_stream(scope, receive, send)
+        elif scope["method"] == "POST":
+            await self._serve_post(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _serve_stream(self, scope, receive, send):
+        manager = self.manager
+        limit = manager.limits.max_sessions
+        if limit is not None and manager.open >= limit:
+            manager.rejected += 1
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1")],
+            })
+            await send({"type": "http.response.body", "body": json.dumps({"error": "too many SSE sessions"}).encode()})
+            return
+
+        host, port = scope.get("client") or ("", 0)
+        access = getattr(scope.get("user"), "access_token", None)
+        session = SSESession(manager, f"{host}:{port}", access.client_id if access is not None else None)
+        manager.open += 1
+        try:
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(session.write, send)
+                tg.start_soon(session.watch)
+                try:
+                    with session.scope:
+                        await self.app(scope, receive, session.send)
+                finally:
+                    session.finish()
+                    tg.cancel_scope.deadline = anyio.current_time() + CLOSE_TIMEOUT
+        finally:
+            manager.open -= 1
+            manager._unregister(session)
+
+    async def _serve_post(self, scope, receive, send):
+        values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("session_id")
+        session = self.manager.get(values[0]) if values else None
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+        session.touch()
+        session.posts += 1
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                session.bytes_in += len(message.get("body", b""))
+            return message
+
+        await self.app(scope, counting_receive, send)
+
+
+async def sessions_endpoint(request: Request) -> Response:
+    """GET /admin/sessions 列出会话；DELETE /admin/sessions/{session_id} 关闭会话"""
+    from .server import mcp
+
+    owner = None
+    if mcp.auth is not None:
+        access = await request_access_token(mcp, request)
+        if access is None:
+            return JSONResponse({"error": "unauthorized"}, status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        if ADMIN_SCOPE not in access.scopes:
+            owner = access.client_id
+    manager: SessionManager = request.app.state.sessions
+    if request.method == "DELETE":
+        session_id = request.path_params.get("session_id", "")
+        session = manager.get(session_id)
+        # 其他token的会话与不存在的会话一样返回404
+        if session is None or (owner is not None and session.owner != owner):
+            return JSONResponse({"error": f"Unknown session {session_id!r}"}, status_code=404)
+        session.close("admin")
+        return Response(status_code=204)
+    if owner is None:
+        return JSONResponse(dict(manager.stats(), items=manager.list()))
+    items = [session.info() for session in manager.sessions.values() if session.owner == owner]
+    return JSONResponse({"sessions": len(items), "items": items})
+
+
+@registry.collector
+def _collect_sessions():
+    """SSE会话的数量、排队字节与关闭原因"""
+    rejected = Counter("mcp_sse_sessions_rejected_total", "SSE connections rejected by the session limit")
+    dropped = Counter("mcp_sse_messages_dropped_total", "SSE messages dropped because the client stopped reading")
+    closed = Counter("mcp_sse_sessions_closed_total", "SSE sessions closed by the server", ("reason",))
+    buffered = Gauge("mcp_sse_buffered_bytes", "Bytes queued for SSE clients")
+    managers = list(_managers)
+    if not managers:
+        return []
+    rejected.values[()] = sum(m.rejected for m in managers)
+    dropped.values[()] = sum(m.dropped for m in managers)
+    buffered.values[()] = sum(s.buffered_bytes for m in managers for s in m.sessions.values())
+    for manager in managers:
+        for reason, count in manager.closed.items():
+            closed.inc(reason, amount=count)
+    return [rejected, dropped, closed, buffered]
@@ -0,0 +1,142 @@
+"""
+stdio模块 - 批量读写的stdio传输
+
+SDK 默认的 stdio 传输逐行读取 stdin，每读一行、每次写入和每次 flush 都要切换一次线程，
+响应在发送方逐条等待写完。stdio_server 与其协议完全相同，但：
+
+- 读取：每次从 stdin 读取最多 READ_SIZE 字节，在事件循环里按行切分，
+  客户端连续发送的多条消息只需一次线程切换
+- 写入：响应先进入有界队列（WRITE_QUEUE 条），队列中已积压的消息依次编码进
+  同一块复用的写缓冲，由写线程一次 write + flush，满队列时发送方等待，
+  内存不随慢客户端增长
+- JSON：由 serialization 模块选择的后端编解码（orjson/msgspec，未安装时回退）
+
+服务期间 fd 0 指向空设备、fd 1 指向 stderr（与 SDK 相同），
+工具中误写到 stdout 的内容不会破坏协议流。这部分复用了 mcp.server.stdio 的内部函数，
+因此只在 main.py 的 --stdio-mode fast 时使用（pyproject 中固定了测试过的 mcp 版本），
+默认仍是 SDK 的传输。
+
+示例:
+    anyio.run(run_stdio_async, mcp)
+"""
+
+import sys
+from contextlib import asynccontextmanager
+from typing import BinaryIO, Callable, Optional
+
+import anyio
+import anyio.lowlevel
+from mcp.server.stdio import _claim_fd, _open_stdin_diversion, _open_stdout_diversion
+from mcp.shared._context_streams import create_context_streams
+from mcp.shared.message import SessionMessage
+
+from .serialization import decode_message, encode_message_into
+
+READ_SIZE = 1024 * 1024
+WRITE_QUEUE = 64
+# 单次合并写入的上限，超过后先写出当前一批；写缓冲在批次间复用，超过两倍上限时释放
+WRITE_BATCH_BYTES = 4 * 1024 * 1024
+
+
+def _write_batch(stdout: BinaryIO, buffer: bytearray, end: int):
+    with memoryview(buffer) as view, view[:end] as batch:
+        stdout.write(batch)
+    stdout.flush()
+
+
+@asynccontextmanager
+async def stdio_server(stdin: Optional[BinaryIO] = None, stdout: Optional[BinaryIO] = None):
+    """以批量读写的方式在 stdin/stdout 上提供 MCP 服务，返回 (read_stream, write_stream)"""
+    restore_stdin: Optional[Callable[[], None]] = None
+    restore_stdout: Optional[Callable[[], None]] = None
+    try:
+        if stdin is None:
+            stdin, restore_stdin = _claim_fd(0, sys.stdin, "rb", _open_stdin_diversion)
+        if stdout is None:
+            stdout, restore_stdout = _claim_fd(1, sys.stdout, "wb", _open_stdout_diversion)
+
+        read_stream_writer, read_stream = create_context_streams[SessionMessage | Exception](0)
+        write_stream, write_stream_reader = anyio.create_memory_object_stream[SessionMessage](WRITE_QUEUE)
+        # read1 最多做一次底层读取，有多少数据返回多少，不会等待凑满 READ_SIZE
+        read = getattr(stdin, "read1", stdin.read)
+
+        async def dispatch(line: bytes):
+            if not line.strip():
+                return
+            try:
+                message = decode_message(line)
+            except Exception as exc:
+                await read_stream_writer.send(exc)
+                return
+            await read_stream_writer.send(SessionMessage(message))
+
+        async def stdin_reader():
+            buffer = bytearray()
+            try:
+                async with read_stream_writer:
+                    while True:
+                        chunk = await anyio.to_thread.run_sync(read, READ_SIZE)
+                        if not chunk:
+                            break
+                        # 只在新数据中查找换行符，跨多次读取的大消息不会被重复扫描
+                        scan = len(buffer)
+                        buffer += chunk
+                        start = 0
+                        end = buffer.find(b"\n", scan)
+                        while end >= 0:
+                            await dispatch(bytes(buffer[start:end]))
+                            start = end + 1
+                            end = buffer.find(b"\n", start)
+                        del buffer[:start]
+                    await dispatch(bytes(buffer))
+            except anyio.ClosedResourceError:
+                await anyio.lowlevel.checkpoint()
+
+        async def stdout_writer():
+            buffer = bytearray()
+            try:
+                async with write_stream_reader:
+                    async for session_message in write_stream_reader:
+                        end = encode_message_into(session_message.message, buffer, 0)
+                        while end < WRITE_BATCH_BYTES:
+                            try:
+                                session_message = write_stream_reader.receive_nowait()
+                            except (anyio.WouldBlock, anyio.EndOfStream):
+                                break
+                            end = encode_message_into(session_message.message, buffer, end)
+                        await anyio.to_thread.run_sync(_write_batch, stdout, buffer, end)
+                        if len(buffer) > 2 * WRITE_BATCH_BYTES:
+                            buffer = bytearray()
+            except anyio.ClosedResourceError:
+                await anyio.lowlevel.checkpoint()
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(stdin_reader)
+            tg.start_soon(stdout_writer)
+            yield read_stream, write_stream
+    finally:
+        if restore_stdout is not None:
+            restore_stdout()
+        if restore_stdin is not None:
+            restore_stdin()
+
+
+async def run_stdio_async(server, show_banner: bool = True):
+    """用批量读写的stdio传输运行 FastMCP 服务器（对应 server.run_stdio_async）"""
+    from fastmcp.server.context import reset_transport, set_transport
+
+    if show_banner:
+        from fastmcp.utilities.cli import log_server_banner
+        log_server_banner(server=server)
+
+    token = set_transport("stdio")
+    try:
+        async with server._lifespan_manager():
+            async with stdio_server() as (read_stream, write_stream):
+                await server._mcp_server.run(
+                    read_stream,
+                    write_stream,
+                    server._mcp_server.create_initialization_options(),
+                )
+    finally:
+        reset_transport(token)
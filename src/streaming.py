@@ -0,0 +1,143 @@
+"""
+流式模块 - 异步生成器工具的分块输出
+
+普通工具要在内存里拼出完整结果，序列化后作为一个 SSE 事件发送。
+使用 @streaming 的工具写成异步生成器，每产出一块就作为进度通知
+（notifications/progress，message 为该块内容，progress 为累计字符数）
+立即发给客户端，结果不在服务器端累积。因此工具结果只有摘要
+"[streamed N chunks, M characters]"（meta 中为 {"streamed": {"chunks", "chars"}}），
+客户端需要从进度通知中取得内容。
+
+背压：生成器只有在上一块交给传输层后才会被继续迭代。SSE 传输经过
+sessions.SessionMiddleware 时，每个会话最多排队 queue_size 条消息，队列满时
+发送等待写出任务取走消息；Streamable-HTTP 每个请求的消息流最多16条，满时同样等待。
+慢客户端只会让工具变慢，不会让服务器内存增长。单块发送超过 send_timeout 仍未完成时
+中止本次调用并关闭生成器；SSE 会话的写出阻塞超过会话的 send_timeout 时，会话按
+queue_policy 丢弃该块或断开。
+
+客户端未提供 progressToken（不接收进度通知）时退化为收集所有块后一次返回，
+总量超过 max_bytes 时返回工具错误。
+
+示例:
+    @mcp.tool
+    @streaming(send_timeout=30)
+    async def read_log(path: str):
+        async for line in tail(path):
+            yield line
+"""
+
+import asyncio
+import functools
+import inspect
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from fastmcp.exceptions import ToolError
+from fastmcp.tools import ToolResult
+
+
+class StreamStats:
+    """流式工具的全局计数"""
+
+    def __init__(self):
+        self.active = 0
+        self.chunks = 0
+        self.chars = 0
+        self.aborted = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"active": self.active, "chunks": self.chunks, "chars": self.chars, "aborted": self.aborted}
+
+
+stream_stats = StreamStats()
+
+
+def _progress_context():
+    """当前请求带有 progressToken 时返回其 Context，否则返回None"""
+    from fastmcp.server.dependencies import get_context
+
+    try:
+        ctx = get_context()
+    except RuntimeError:
+        return None
+    # request_context.meta 是请求原始的 _meta，会话尚未建立时 request_context 为None
+    request = ctx.request_context
+    meta = (request.meta if request is not None else None) or {}
+    if meta.get("progressToken") is None:
+        return None
+    return ctx
+
+
+async def _send(ctx, progress: int, chunk: str, timeout: Optional[float], name: str):
+    try:
+        await asyncio.wait_for(ctx.report_progress(progress, message=chunk), timeout)
+    except asyncio.TimeoutError:
+        stream_stats.aborted += 1
+        raise ToolError(f"Tool '{name}' aborted: client did not accept output within {timeout}s") from None
+
+
+async def _consume(stream: AsyncIterator[Any], name: str, send_timeout: Optional[float], max_bytes: int) -> ToolResult:
+    ctx = _progress_context()
+    chunks = 0
+    chars = 0
+    collected = []
+    stream_stats.active += 1
+    try:
+        async for chunk in stream:
+            if not isinstance(chunk, str):
+                chunk = str(chunk)
+            if not chunk:
+                continue
+            chunks += 1
+            chars += len(chunk)
+            stream_stats.chunks += 1
+            stream_stats.chars += len(chunk)
+            if ctx is not None:
+                await _send(ctx, chars, chunk, send_timeout, name)
+                continue
+            if chars > max_bytes:
+                stream_stats.aborted += 1
+                raise ToolError(
+                    f"Tool '{name}' output exceeds {max_bytes} characters; "
+                    "call it with a progress token to receive it as a stream"
+                )
+            collected.append(chunk)
+    finally:
+        stream_stats.active -= 1
+        await stream.aclose()
+
+    summary = {"chunks": chunks, "chars": chars}
+    if ctx is not None:
+        return ToolResult(
+            content=f"[streamed {chunks} chunks, {chars} characters]",
+            meta={"streamed": summary},
+        )
+    return ToolResult(content="".join(collected), meta={"streamed": None})
+
+
+def streaming(
+    send_timeout: Optional[float] = 30,
+    max_bytes: int = 10 * 1024 * 1024,
+    name: Optional[str] = None,
+) -> Callable:
+    """
+    把异步生成器函数包装为分块输出的工具
+
+    Args:
+        send_timeout: 单块等待客户端接收的最长时间（秒），None表示不限制
+        max_bytes: 客户端不接收流时一次性返回的最大字符数
+        name: 工具名，默认使用函数名
+    """
+    def decorator(fn: Callable) -> Callable:
+        if not inspect.isasyncgenfunction(fn):
+            raise TypeError(f"@streaming only applies to async generator functions: {fn.__qualname__}")
+        tool_name = name or fn.__name__
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs) -> ToolResult:
+            return await _consume(fn(*args, **kwargs), tool_name, send_timeout, max_bytes)
+
+        wrapper.__signature__ = signature.replace(return_annotation=ToolResult)
+        wrapper.__annotations__ = {**fn.__annotations__, "return": ToolResult}
+        return wrapper
+    return decorator
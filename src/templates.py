@@ -0,0 +1,132 @@
+"""
+模板模块 - 预编译的提示词模板与渲染缓存
+
+模板在定义时解析一次，拆成字面量片段与参数字段；渲染时把各片段收集到列表里
+一次性 join，结果字符串只分配一次，参数中的大段输入（如几MB的代码）只被复制一次，
+不会像多层 f-string 拼接那样产生中间字符串。
+
+相同参数的渲染结果放在LRU缓存中，超过 max_bytes 的结果不缓存，
+避免大输入把缓存撑满。
+
+示例:
+    @mcp.prompt
+    @prompt_template('''Please summarize the following text in {max_length} words or less:
+
+    {text}
+    ''')
+    def summarize_text(text: str, max_length: int = 100) -> str:
+        '''Summarize the given text.'''
+"""
+
+import functools
+import inspect
+from collections import OrderedDict
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_formatter = Formatter()
+
+
+class CompiledTemplate:
+    """
+    预编译的 str.format 风格模板
+
+    只支持直接引用参数名的字段（{name}、{name!r}、{name:>10}），
+    不支持属性与下标访问。
+    """
+
+    def __init__(self, text: str, maxsize: int = 128, max_bytes: int = 1024 * 1024):
+        self.text = text
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        # (字面量, 字段名, 转换, 格式说明)，字段名为None表示只有字面量
+        self.parts: List[Tuple[str, Optional[str], Optional[str], str]] = []
+        for literal, field, spec, conversion in _formatter.parse(text):
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"Template field {{{field}}} must be a plain parameter name")
+            self.parts.append((literal, field, conversion, spec or ""))
+        self.fields = {field for _, field, _, _ in self.parts if field is not None}
+        self._key_fields = sorted(self.fields)
+        self._cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def render_uncached(self, values: Dict[str, Any]) -> str:
+        chunks = []
+        for literal, field, conversion, spec in self.parts:
+            if literal:
+                chunks.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion:
+                value = _formatter.convert_field(value, conversion)
+            chunks.append(value if type(value) is str and not spec else format(value, spec))
+        return "".join(chunks)
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """渲染模板，相同参数命中缓存"""
+        try:
+            # 带上类型：1、1.0、True 相等且哈希相同，渲染结果却不同
+            key = tuple((type(values[field]), values[field]) for field in self._key_fields)
+            hash(key)
+        except TypeError:
+            return self.render_uncached(values)
+
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = self.render_uncached(values)
+        size = len(result)
+        if size <= self.max_bytes:
+            self._cache[key] = result
+            self._bytes += size
+            while len(self._cache) > self.maxsize or self._bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._bytes -= len(evicted)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache), "bytes": self._bytes}
+
+
+# 已注册的模板，按提示词名
+templates: Dict[str, CompiledTemplate] = {}
+
+
+def prompt_template(
+    text: str,
+    maxsize: int = 128,
+    max_bytes: int = 1024 * 1024,
+    name: Optional[str] = None,
+) -> Callable:
+    """
+    用预编译模板实现提示词函数，函数体不再执行
+
+    Args:
+        text: str.format 风格的模板，字段必须是函数参数
+        maxsize: 渲染缓存的参数组合数
+        max_bytes: 渲染缓存占用的内存上限（字符数）
+        name: 提示词名，默认使用函数名
+    """
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+        template = CompiledTemplate(text, maxsize=maxsize, max_bytes=max_bytes)
+        unknown = template.fields - set(signature.parameters)
+        if unknown:
+            raise ValueError(f"Template for {fn.__name__!r} references unknown parameters: {sorted(unknown)}")
+        templates[name or fn.__name__] = template
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return template.render(bound.arguments)
+
+        wrapper.__template__ = template
+        return wrapper
+    return decorator
@@ -1,24 +1,36 @@
 """
 工具模块 - 在此目录下添加新的工具文件
 每个工具应该是一个函数，使用 @mcp.tool 装饰器
+结果只取决于参数的纯函数工具可以加上 @cacheable 启用结果缓存
+同步工具用 @execution 指定在事件循环、线程池或进程池中执行
+大段输出的工具可以写成异步生成器并加上 @streaming，分块发送给客户端
 """
 
+from ..cache import cacheable
+from ..execution import execution
 from ..server import mcp
+from ..streaming import streaming
 
 
 @mcp.tool
+@cacheable()
+@execution("inline")
 def add(a: int, b: int) -> int:
     """Add two numbers together."""
     return a + b
 
 
 @mcp.tool
+@cacheable()
+@execution("inline")
 def multiply(a: float, b: float) -> float:
     """Multiply two numbers."""
     return a * b
 
 
 @mcp.tool
+@cacheable(ttl=60)
+@execution("thread", timeout=10)
 def get_weather(city: str) -> dict:
     """Get weather information for a city."""
     return {
@@ -30,6 +42,18 @@ def get_weather(city: str) -> dict:
 
 
 @mcp.tool
+@cacheable()
+@execution("inline")
 def reverse_text(text: str) -> str:
     """Reverse the input text."""
     return text[::-1]
+
+
+@mcp.tool
+@streaming()
+async def stream_reverse_text(text: str, chunk_size: int = 4096):
+    """Reverse the input text, streaming the result in chunks."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    for end in range(len(text), 0, -chunk_size):
+        yield text[max(0, end - chunk_size):end][::-1]
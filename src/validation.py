@@ -0,0 +1,246 @@
+"""
+参数校验模块 - 按工具签名预编译的参数校验器
+
+FastMCP 每次调用工具都要重新查找函数的包装器与 TypeAdapter，再由 pydantic 按函数签名
+校验参数并调用函数；@execution 的包装器还要再按签名绑定一遍参数。
+add(a: int, b: int) 这样的小工具，校验的开销比工具本身还大。
+
+ArgumentValidators 在工具注册时把 FunctionTool 替换为 ValidatedTool，每个工具的
+校验器只编译一次：
+
+- 标量签名（参数都是 int/float/str/bool）：逐个参数检查类型，完全匹配时直接调用函数，
+  int 传给 float 参数时转为 float（与 pydantic 相同）。类型不符、缺少或多出参数时
+  交给 pydantic，按原有规则转换或返回校验错误，结果与 FastMCP 完全一致
+- 其他签名：包装函数与 TypeAdapter 在编译时准备好，调用时直接交给 pydantic 校验
+- 严格模式：不做类型转换，"10" 不会被当作整数 10。MCP_STRICT_ARGS=1（或 main.py 的
+  --strict-args）对整个服务器开启，@strict_arguments 只对单个工具开启
+
+ValidatedTool 依赖 FunctionTool 的内部接口（pyproject 中固定了测试过的 fastmcp 版本），
+缺少其中任何一个时 install() 不做替换，工具按 FastMCP 原有流程校验。
+
+示例:
+    @mcp.tool
+    @strict_arguments
+    def add(a: int, b: int) -> int:
+        ...
+"""
+
+import inspect
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple, get_type_hints
+
+import mcp_types
+from fastmcp.server.dependencies import without_injected_parameters
+from fastmcp.tools import FunctionTool, ToolResult
+from fastmcp.tools.base import InputRequiredToolResult
+from fastmcp.utilities.async_utils import call_sync_fn_in_threadpool, is_coroutine_function
+from fastmcp.utilities.types import get_cached_typeadapter
+from pydantic import PrivateAttr
+from pydantic import ValidationError as PydanticValidationError
+
+try:
+    from fastmcp.tools.function_tool import _ToolBodyError, _strict_input_validation, _wrap_body_errors
+except ImportError:
+    _ToolBodyError = _strict_input_validation = _wrap_body_errors = None
+
+logger = logging.getLogger(__name__)
+
+STRICT_ARGS_ENV = "MCP_STRICT_ARGS"
+
+_SCALARS = (int, float, str, bool)
+_KINDS = (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+
+# install() 使用的 LocalProvider 内部属性与 ValidatedTool 调用的 FunctionTool 内部方法
+_PROVIDER_HOOKS = ("_components", "_add_component")
+_TOOL_HOOKS = ("_run_body",)
+
+
+def _missing_internals(provider) -> List[str]:
+    """当前 fastmcp 中缺少的内部接口"""
+    missing = [name for name in _PROVIDER_HOOKS if not hasattr(provider, name)]
+    missing += [f"FunctionTool.{name}" for name in _TOOL_HOOKS if not hasattr(FunctionTool, name)]
+    if _wrap_body_errors is None:
+        missing.append("fastmcp.tools.function_tool._wrap_body_errors")
+    return missing
+
+
+def strict_arguments(fn: Callable) -> Callable:
+    """该工具的参数按严格模式校验，不做类型转换"""
+    fn.__strict_arguments__ = True
+    return fn
+
+
+def _scalar_fields(fn: Callable) -> Optional[Tuple[Tuple[str, type, bool], ...]]:
+    """参数都是标量类型时返回 (参数名, 类型, 是否必填)，否则返回 None"""
+    try:
+        hints = get_type_hints(fn, include_extras=True)
+        parameters = inspect.signature(fn).parameters.values()
+    except (NameError, TypeError, ValueError):
+        return None
+    fields = []
+    for parameter in parameters:
+        annotation = hints.get(parameter.name)
+        if parameter.kind not in _KINDS or annotation not in _SCALARS:
+            return None
+        fields.append((parameter.name, annotation, parameter.default is inspect.Parameter.empty))
+    return tuple(fields)
+
+
+class ArgumentValidator:
+    """
+    单个工具的预编译参数校验器
+
+    Args:
+        fn: 工具函数
+        run_in_thread: 同步函数是否在线程池中执行（FunctionTool.run_in_thread）
+    """
+
+    def __init__(self, fn: Callable, run_in_thread: bool = True):
+        self.fn = fn
+        self.strict = bool(getattr(fn, "__strict_arguments__", False))
+        # 与 FunctionTool.run 相同的包装，只在编译时做一次
+        self.body = _wrap_body_errors(fn, materialize_generators=True)
+        wrapper = without_injected_parameters(self.body, run_in_thread=run_in_thread)
+        self.adapter = get_cached_typeadapter(_wrap_body_errors(wrapper))
+        self.is_async = is_coroutine_function(wrapper)
+        self.in_thread = not self.is_async and run_in_thread
+        # 有注入参数（Context、Depends）时 wrapper 与 body 不同，只走 pydantic
+        self.fields = _scalar_fields(fn) if wrapper is self.body else None
+        self.types = None if self.fields is None else {name: annotation for name, annotation, _ in self.fields}
+        self.fast = 0
+        self.fallbacks = 0
+
+    def bind(self, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """标量签名的快速校验：参数完全匹配时返回调用参数，否则返回 None"""
+        types = self.types
+        if types is None or len(arguments) > len(types):
+            return None
+        # 常见情况：参数齐全且类型完全一致，原样使用
+        if len(arguments) == len(types):
+            for name, value in arguments.items():
+                if types.get(name) is not type(value):
+                    break
+            else:
+                return arguments
+        kwargs = {}
+        for name, annotation, required in self.fields:
+            if name in arguments:
+                value = arguments[name]
+                if type(value) is not annotation:
+                    if annotation is not float or type(value) is not int:
+                        return None
+                    value = float(value)
+                kwargs[name] = value
+            elif required:
+                return None
+        # 多出的参数由 pydantic 报错
+        return kwargs if len(kwargs) == len(arguments) else None
+
+    async def invoke(self, kwargs: Dict[str, Any]) -> Any:
+        """用已校验的参数调用工具函数（对应 FunctionTool._execute 中校验之后的部分）"""
+        try:
+            if self.in_thread:
+                result = await call_sync_fn_in_threadpool(self.body, **kwargs)
+            else:
+                result = self.body(**kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            if inspect.isasyncgen(result):
+                return [item async for item in result]
+            return result
+        except PydanticValidationError as e:
+            raise _ToolBodyError(str(e)) from e
+
+
+class ValidatedTool(FunctionTool):
+    """使用预编译参数校验器的 FunctionTool"""
+
+    _validator: Optional[ArgumentValidator] = PrivateAttr(default=None)
+
+    @classmethod
+    def from_tool(cls, tool: FunctionTool) -> "ValidatedTool":
+        """从已构建的 FunctionTool 创建，字段原样保留"""
+        fields = {name: getattr(tool, name) for name in FunctionTool.model_fields}
+        validated = cls.model_construct(_fields_set=set(tool.model_fields_set), **fields)
+        validated._validator = ArgumentValidator(tool.fn, tool.run_in_thread)
+        return validated
+
+    @property
+    def validator(self) -> ArgumentValidator:
+        """当前函数的校验器，函数被替换后重新编译"""
+        # 直接读写私有属性字典，pydantic 的属性访问在每次调用上开销明显
+        private = self.__pydantic_private__
+        validator = private["_validator"]
+        if validator is None or validator.fn is not self.fn:
+            previous = validator
+            validator = private["_validator"] = ArgumentValidator(self.fn, self.run_in_thread)
+            if previous is not None:
+                validator.fast, validator.fallbacks = previous.fast, previous.fallbacks
+        return validator
+
+    async def execute(self, arguments: Dict[str, Any]) -> Any:
+        """校验参数并执行工具函数，返回未转换的结果"""
+        validator = self.validator
+        # 设置了超时的工具需要 _run_body 的超时处理
+        kwargs = validator.bind(arguments) if self.timeout is None else None
+        if kwargs is not None:
+            validator.fast += 1
+            return await validator.invoke(kwargs)
+        validator.fallbacks += 1
+        strict = True if validator.strict else _strict_input_validation()
+        return await self._run_body(validator.adapter, validator.is_async, arguments, strict=strict)
+
+    async def run(self, arguments: Dict[str, Any]) -> ToolResult:
+        result = await self.execute(arguments)
+        if isinstance(result, mcp_types.InputRequiredResult):
+            return InputRequiredToolResult(result)
+        return self.convert_result(result)
+
+
+class ArgumentValidators:
+    """
+    把本地provider注册的 FunctionTool 替换为 ValidatedTool
+
+    需要在 OutputEncoders 之前安装，使校验器按替换后的最终函数编译。
+
+    Args:
+        provider: FastMCP 的 LocalProvider（server._local_provider）
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+
+    def install(self) -> "ArgumentValidators":
+        """替换已注册与之后注册的工具"""
+        provider = self.provider
+        missing = _missing_internals(provider)
+        if missing:
+            logger.warning("Argument validators disabled: fastmcp has no %s", ", ".join(missing))
+            return self
+        add = provider._add_component
+
+        def add_component(component):
+            return add(self.attach(component))
+
+        provider._add_component = add_component
+        for key, component in list(provider._components.items()):
+            provider._components[key] = self.attach(component)
+        return self
+
+    def attach(self, component):
+        """FunctionTool 返回对应的 ValidatedTool，其他组件原样返回"""
+        if type(component) is not FunctionTool:
+            return component
+        return ValidatedTool.from_tool(component)
+
+    def tools(self) -> Dict[str, ValidatedTool]:
+        return {key: c for key, c in self.provider._components.items() if isinstance(c, ValidatedTool)}
+
+    def stats(self) -> Dict[str, int]:
+        tools = self.tools().values()
+        return {
+            "tools": len(tools),
+            "scalar": sum(1 for t in tools if t.validator.fields is not None),
+            "fast": sum(t.validator.fast for t in tools),
+            "fallbacks": sum(t.validator.fallbacks for t in tools),
+        }
@@ -0,0 +1,371 @@
+"""
+多进程模块 - 多worker SSE/HTTP服务与会话路由
+
+主进程绑定监听端口后派生多个worker进程共享该端口，每个worker额外监听
+一个私有的Unix socket。会话归属记录在本地共享的会话表中（运行目录下
+每个session一个文件），收到不属于自己的 POST 时，worker 通过 Unix socket
+将请求转发给持有该 SSE/Streamable-HTTP 会话的 worker。
+"""
+
+import multiprocessing
+import os
+import re
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs
+
+import httpx
+
+from .auth import AuthConfig, AuthReloader
+
+
+FORWARDED_HEADER = b"x-mcp-forwarded"
+SESSION_HEADER = b"mcp-session-id"
+
+_SESSION_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+_SSE_ENDPOINT_RE = re.compile(rb"session_id=([A-Za-z0-9_-]+)")
+
+# 转发时不透传的逐跳头
+_HOP_HEADERS = {
+    b"connection", b"keep-alive", b"transfer-encoding", b"upgrade",
+    b"proxy-connection", b"te", b"trailer", b"host", b"content-length",
+}
+
+
+class SessionTable:
+    """
+    本地共享会话表
+
+    每个会话对应目录下的一个文件，内容为持有该会话的worker的socket路径。
+    写入使用 os.replace 保证原子性，多个进程可以并发读写。
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.join(directory, "sessions")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> Optional[str]:
+        if not _SESSION_ID_RE.match(session_id):
+            return None
+        return os.path.join(self.directory, session_id)
+
+    def register(self, session_id: str, owner: str):
+        """登记会话归属"""
+        path = self._path(session_id)
+        if path is None:
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(owner)
+        os.replace(tmp, path)
+
+    def unregister(self, session_id: str):
+        """删除会话记录"""
+        path = self._path(session_id)
+        if path is None:
+            return
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+    def lookup(self, session_id: str) -> Optional[str]:
+        """查询会话所属worker，未知会话返回None"""
+        path = self._path(session_id)
+        if path is None:
+            return None
+        try:
+            with open(path, "r") as f:
+                return f.read() or None
+        except FileNotFoundError:
+            return None
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.directory) if not name.endswith(".tmp"))
+
+
+def _session_id_from_scope(scope) -> Optional[str]:
+    """从请求中提取会话ID（SSE使用query参数，Streamable-HTTP使用请求头）"""
+    for key, value in scope.get("headers", []):
+        if key == SESSION_HEADER:
+            return value.decode("latin-1")
+    query = scope.get("query_string", b"")
+    if query:
+        values = parse_qs(query.decode("latin-1")).get("session_id")
+        if values:
+            return values[0]
+    return None
+
+
+class SessionRoutingMiddleware:
+    """
+    会话路由中间件（ASGI）
+
+    - 登记本worker创建的会话（SSE endpoint事件或 mcp-session-id 响应头）
+    - 将属于其他worker的请求通过Unix socket转发给会话持有者
+    """
+
+    def __init__(self, app, table: SessionTable, worker_socket: str):
+        self.app = app
+        self.table = table
+        self.worker_socket = worker_socket
+        self._owned: Set[str] = set()
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(scope, receive, send)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        session_id = _session_id_from_scope(scope)
+        if session_id and FORWARDED_HEADER not in headers:
+            owner = self.table.lookup(session_id)
+            if owner and owner != self.worker_socket:
+                await self._forward(owner, session_id, scope, receive, send)
+                return
+
+        await self._serve_local(scope, receive, send, session_id)
+
+    async def _serve_local(self, scope, receive, send, session_id: Optional[str]):
+        sniff_sse = scope["method"] == "GET" and session_id is None
+        created: List[str] = []
+
+        async def tracking_send(message):
+            if message["type"] == "http.response.start":
+                for key, value in message.get("headers", []):
+                    if key.lower() == SESSION_HEADER:
+                        self._register(value.decode("latin-1"), created)
+            elif sniff_sse and not created and message["type"] == "http.response.body":
+                match = _SSE_ENDPOINT_RE.search(message.get("body", b""))
+                if match:
+                    self._register(match.group(1).decode("latin-1"), created)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, tracking_send)
+        finally:
+            # SSE流结束即会话结束；Streamable-HTTP会话在DELETE时结束
+            if sniff_sse:
+                for sid in created:
+                    self._unregister(sid)
+            if scope["method"] == "DELETE" and session_id:
+                self._unregister(session_id)
+
+    def _register(self, session_id: str, created: List[str]):
+        if session_id in self._owned:
+            return
+        self.table.register(session_id, self.worker_socket)
+        self._owned.add(session_id)
+        created.append(session_id)
+
+    def _unregister(self, session_id: str):
+        if session_id in self._owned:
+            self._owned.discard(session_id)
+            self.table.unregister(session_id)
+
+    def _client(self, owner: str) -> httpx.AsyncClient:
+        client = self._clients.get(owner)
+        if client is None:
+            client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(uds=owner),
+                base_url="http://worker",
+                timeout=None,
+            )
+            self._clients[owner] = client
+        return client
+
+    async def _forward(self, owner: str, session_id: str, scope, receive, send):
+        """将请求原样转发给会话所属的worker，并流式回传响应"""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            body.extend(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+
+        headers = [
+            (key, value) for key, value in scope.get("headers", [])
+            if key.lower() not in _HOP_HEADERS
+        ]
+        headers.append((FORWARDED_HEADER, b"1"))
+        path = scope.get("root_path", "") + scope["path"]
+        if scope.get("query_string"):
+            path += "?" + scope["query_string"].decode("latin-1")
+
+        client = self._client(owner)
+        request = client.build_request(
+            scope["method"], path, headers=headers, content=bytes(body)
+        )
+        try:
+            response = await client.send(request, stream=True)
+        except httpx.TransportError:
+            # 持有者已退出，会话随之失效
+            self.table.unregister(session_id)
+            await send({
+                "type": "http.response.start",
+                "status": 404,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+            })
+            await send({"type": "http.response.body", "body": b"Could not find session"})
+            return
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (key, value) for key, value in response.headers.raw
+                    if key.lower() not in _HOP_HEADERS
+                ],
+            })
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+    async def _lifespan(self, scope, receive, send):
+        async def wrapped_send(message):
+            if message["type"] == "lifespan.shutdown.complete":
+                await self._shutdown()
+            await send(message)
+
+        await self.app(scope, receive, wrapped_send)
+
+    async def _shutdown(self):
+        for session_id in list(self._owned):
+            self._unregister(session_id)
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+def _build_app(transport: str):
+    """按传输模式构建ASGI应用"""
+    from .app import create_app, create_http_app
+    if transport == "sse":
+        return create_app()
+    return create_http_app()
+
+
+def _worker_main(
+    transport: str,
+    sock: socket.socket,
+    run_dir: str,
+    index: int,
+    auth_config: Optional[AuthConfig],
+    reloader: Optional[AuthReloader],
+):
+    """worker进程入口"""
+    import uvicorn
+    from .metrics import configure_peers
+    from .server import configure_auth
+
+    if auth_config is not None:
+        configure_auth(auth_config)
+    if reloader is not None:
+        reloader.start()
+        reloader.install_signal_handler()
+
+    worker_socket = os.path.join(run_dir, f"worker-{index}.sock")
+    if os.path.exists(worker_socket):
+        os.unlink(worker_socket)
+    unix_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    unix_sock.bind(worker_socket)
+    unix_sock.listen(2048)
+    configure_peers(run_dir, worker_socket)
+
+    app = SessionRoutingMiddleware(_build_app(transport), SessionTable(run_dir), worker_socket)
+    config = uvicorn.Config(app, lifespan="on")
+    server = uvicorn.Server(config)
+    try:
+        server.run(sockets=[sock, unix_sock])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        unix_sock.close()
+        if os.path.exists(worker_socket):
+            os.unlink(worker_socket)
+
+
+def run_workers(
+    transport: str,
+    host: str,
+    port: int,
+    workers: int,
+    auth_config: Optional[AuthConfig] = None,
+    reloader: Optional[AuthReloader] = None,
+):
+    """
+    以多进程模式运行服务
+
+    主进程只负责绑定端口与监督worker，worker异常退出时会被重新拉起。
+    每个worker各自监视认证配置文件，主进程收到的SIGHUP会转发给所有worker。
+    """
+    multiprocessing.allow_connection_pickling()
+    spawn = multiprocessing.get_context("spawn")
+
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    run_dir = tempfile.mkdtemp(prefix="fastapi-mcp-")
+    SessionTable(run_dir)
+
+    def start(index: int):
+        process = spawn.Process(
+            target=_worker_main,
+            args=(transport, sock, run_dir, index, auth_config, reloader),
+            daemon=False,
+        )
+        process.start()
+        return process
+
+    processes = [start(i) for i in range(workers)]
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signum)
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    if hasattr(signal, "SIGHUP"):
+        previous[signal.SIGHUP] = signal.signal(signal.SIGHUP, forward)
+    try:
+        while not stopping:
+            for index, process in enumerate(processes):
+                if not process.is_alive() and not stopping:
+                    print(f"Worker {index} exited with code {process.exitcode}, restarting")
+                    processes[index] = start(index)
+            time.sleep(0.5)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.kill()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        sock.close()
+        shutil.rmtree(run_dir, ignore_errors=True)
+
@@ -0,0 +1,220 @@
+"""
+准入控制测试
+"""
+
+import asyncio
+
+import json
+
+import httpx
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import MCPError
+from fastmcp.server.auth import AccessToken
+from mcp.server.auth.middleware.bearer_auth import AuthenticatedUser
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.batching import BatchMiddleware
+from src.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    Limit,
+    Overloaded,
+    TokenBucket,
+    ToolAdmissionMiddleware,
+    OVERLOADED_ERROR,
+    RATE_LIMIT_ENV,
+)
+
+
+class TestTokenBucket:
+    """令牌桶测试类"""
+
+    def test_burst_then_reject(self):
+        bucket = TokenBucket(rate=1, burst=3)
+        assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+        assert bucket.acquire() > 0
+
+    def test_refill(self):
+        bucket = TokenBucket(rate=1000, burst=1)
+        assert bucket.acquire() == 0
+        bucket.updated -= 0.01
+        assert bucket.acquire() == 0
+
+
+class TestAdmissionController:
+    """AdmissionController测试类"""
+
+    def test_token_limit_from_env(self, monkeypatch):
+        monkeypatch.setenv(RATE_LIMIT_ENV, "5")
+        assert AdmissionController().token_limit.rate == 5
+
+    def test_no_limit_by_default(self, monkeypatch):
+        monkeypatch.delenv(RATE_LIMIT_ENV, raising=False)
+        controller = AdmissionController()
+        assert controller.token_limit is None
+        controller.check_rate("token:a", None)
+
+    @pytest.mark.asyncio
+    async def test_queue_bounded(self):
+        """测试并发已满时排队，队列满时立即拒绝"""
+        controller = AdmissionController()
+        limit = Limit(max_in_flight=1, max_queue=1, queue_timeout=1)
+        gate = await controller.enter("k", limit)
+        waiting = asyncio.create_task(controller.enter("k", limit))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await controller.enter("k", limit)
+        gate.leave()
+        assert await waiting is gate
+        assert gate.in_flight == 1
+        gate.leave()
+        assert gate.in_flight == 0
+        assert controller.rejected == 1
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        controller = AdmissionController()
+        limit = Limit(max_in_flight=1, max_queue=1, queue_timeout=0.01)
+        await controller.enter("k", limit)
+        with pytest.raises(Overloaded):
+            await controller.enter("k", limit)
+
+
+def _authenticated(app, tokens):
+    """模拟认证中间件：已知token对应的client_id放入 scope["user"]"""
+    async def wrapper(scope, receive, send):
+        for key, value in scope.get("headers", []):
+            client_id = tokens.get(value.decode("latin-1")) if key == b"authorization" else None
+            if client_id:
+                scope = dict(scope, user=AuthenticatedUser(AccessToken(token=value.decode("latin-1"), client_id=client_id, scopes=[])))
+        await app(scope, receive, send)
+    return wrapper
+
+
+class TestAdmissionMiddleware:
+    """ASGI限速中间件测试"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_per_token(self):
+        """测试按已验证的token限速，不同token互不影响（即使client_id相同）"""
+        inner = Starlette(routes=[Route("/", lambda request: PlainTextResponse("ok"))])
+        controller = AdmissionController(Limit(rate=1, burst=2))
+        tokens = {"Bearer token-a": "shared", "Bearer token-b": "shared"}
+        app = _authenticated(AdmissionMiddleware(inner, controller), tokens)
+        transport = httpx.ASGITransport(app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            a = {"authorization": "Bearer token-a"}
+            statuses = [(await client.get("/", headers=a)).status_code for _ in range(3)]
+            rejected = await client.get("/", headers=a)
+            other = await client.get("/", headers={"authorization": "Bearer token-b"})
+        assert statuses == [200, 200, 429]
+        assert rejected.headers["retry-after"] == "1"
+        assert other.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_unverified_tokens_share_client_key(self):
+        """测试随机的未验证token不会产生新的令牌桶"""
+        inner = Starlette(routes=[Route("/", lambda request: PlainTextResponse("ok"))])
+        controller = AdmissionController(Limit(rate=1, burst=2))
+        transport = httpx.ASGITransport(AdmissionMiddleware(inner, controller))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses = [(await client.get("/", headers={"authorization": f"Bearer random-{i}"})).status_code
+                        for i in range(3)]
+        assert statuses == [200, 200, 429]
+        assert list(controller._buckets) == ["client:127.0.0.1"]
+
+    @pytest.mark.asyncio
+    async def test_batch_items_each_cost_a_token(self):
+        """测试批量请求中的每条消息各消耗一个令牌，超出的消息逐条返回错误"""
+        async def messages(scope, receive, send):
+            await receive()
+            await send({"type": "http.response.start", "status": 202, "headers": []})
+            await send({"type": "http.response.body", "body": b"Accepted"})
+
+        controller = AdmissionController(Limit(rate=1, burst=2))
+        app = BatchMiddleware(AdmissionMiddleware(messages, controller))
+        transport = httpx.ASGITransport(app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            batch = [{"jsonrpc": "2.0", "id": i, "method": "ping"} for i in range(5)]
+            response = await client.post("/messages/?session_id=abc", content=json.dumps(batch))
+        assert response.status_code == 202
+        errors = response.json()
+        assert len(errors) == 3
+        assert {e["error"]["data"]["status"] for e in errors} == {429}
+
+
+class TestKeyBounds:
+    """限速键数量上限测试"""
+
+    def test_idle_buckets_pruned_then_lru(self):
+        """超出上限时先清除已回满的令牌桶，再淘汰最久未使用的"""
+        controller = AdmissionController(max_keys=2)
+        limit = Limit(rate=1000, burst=1)
+        controller.check_rate("a", limit)
+        controller.check_rate("b", limit)
+        controller._buckets["a"].updated -= 1
+        # a 已回满，被清除；b 仍在计时中保留
+        controller.check_rate("c", limit)
+        assert list(controller._buckets) == ["b", "c"]
+        slow = Limit(rate=0.001, burst=1)
+        controller._buckets.clear()
+        for key in ("x", "y", "z"):
+            controller.check_rate(key, slow)
+        # 都未回满时淘汰最久未使用的
+        assert list(controller._buckets) == ["y", "z"]
+
+    @pytest.mark.asyncio
+    async def test_idle_gates_dropped(self):
+        """超出上限时丢弃没有执行中和等待中调用的gate"""
+        controller = AdmissionController(max_keys=2)
+        limit = Limit(max_in_flight=1)
+        busy = await controller.enter("busy", limit)
+        (await controller.enter("idle", limit)).leave()
+        await controller.enter("new", limit)
+        assert set(controller._gates) == {"busy", "new"}
+        busy.leave()
+
+
+class TestToolAdmissionMiddleware:
+    """工具并发限制集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_tool_in_flight_limit(self):
+        """测试工具并发超限时返回JSON-RPC错误"""
+        controller = AdmissionController(token_limit=None)
+        controller.tool_limits["slow"] = Limit(max_in_flight=1)
+        server = FastMCP("admission-test", middleware=[ToolAdmissionMiddleware(controller)])
+
+        @server.tool
+        async def slow() -> str:
+            await asyncio.sleep(0.2)
+            return "done"
+
+        async with Client(server) as client:
+            results = await asyncio.gather(
+                client.call_tool("slow", {}),
+                client.call_tool("slow", {}),
+                return_exceptions=True,
+            )
+        errors = [r for r in results if isinstance(r, Exception)]
+        assert len(errors) == 1
+        assert isinstance(errors[0], MCPError)
+        assert errors[0].error.code == OVERLOADED_ERROR
+        assert [r.data for r in results if not isinstance(r, Exception)] == ["done"]
+
+    @pytest.mark.asyncio
+    async def test_tokenless_caller_keyed_by_client(self):
+        """测试没有token的调用不共用 anonymous 键：stdio/进程内按本地客户端计"""
+        controller = AdmissionController(token_limit=Limit(max_in_flight=1))
+        server = FastMCP("admission-test", middleware=[ToolAdmissionMiddleware(controller)])
+
+        @server.tool
+        def ping() -> str:
+            return "pong"
+
+        async with Client(server) as client:
+            assert (await client.call_tool("ping", {})).data == "pong"
+        assert list(controller._gates) == ["client:local"]
@@ -3,9 +3,22 @@
 """
 
 import os
+import time
 import pytest
 import tempfile
-from src.auth import AuthConfig, create_auth, AUTH_TOKEN_ENV
+from types import SimpleNamespace
+from src.auth import (
+    AuthConfig,
+    AuthReloader,
+    BearerToken,
+    CachedTokenVerifier,
+    HashedTokenVerifier,
+    ScopeAuthMiddleware,
+    ToolScopeCheck,
+    create_auth,
+    hash_token,
+    AUTH_TOKEN_ENV,
+)
 
 
 class TestAuthConfig:
@@ -63,7 +76,7 @@ class TestAuthConfig:
         config = AuthConfig(enabled=True, tokens=["test-token"])
         auth = create_auth(config)
         assert auth is not None
-        assert auth.__class__.__name__ == "StaticTokenVerifier"
+        assert auth.__class__.__name__ == "HashedTokenVerifier"
     
     def test_create_auth_invalid(self):
         """测试创建无效认证"""
@@ -151,6 +164,257 @@ class TestCreateAuth:
         assert auth is not None
 
 
+class TestHashedTokenVerifier:
+    """HashedTokenVerifier测试类"""
+    
+    @pytest.mark.asyncio
+    async def test_scopes_preserved(self):
+        """测试add_token的scopes会传递到验证结果"""
+        config = AuthConfig(enabled=True)
+        config.add_token("s3cr3t", scopes=["read", "write"])
+        auth = create_auth(config)
+        access = await auth.verify_token("s3cr3t")
+        assert access is not None
+        assert access.scopes == ["read", "write"]
+        assert "s3cr3t" not in access.client_id
+    
+    def test_client_ids_unique(self):
+        """测试大量token的client_id互不相同"""
+        tokens = [BearerToken(f"token-{i}") for i in range(200000)]
+        index = HashedTokenVerifier._build_index(tokens)
+        assert len({entry.client_id for entry in index.values()}) == len(tokens)
+
+    @pytest.mark.asyncio
+    async def test_unknown_token(self):
+        """测试未知token"""
+        auth = HashedTokenVerifier([BearerToken("token")])
+        assert await auth.verify_token("other") is None
+    
+    @pytest.mark.asyncio
+    async def test_expired_token(self):
+        """测试过期token"""
+        auth = HashedTokenVerifier([
+            BearerToken("old", expires_at=time.time() - 1),
+            BearerToken("new", expires_at=time.time() + 60),
+        ])
+        assert await auth.verify_token("old") is None
+        assert await auth.verify_token("new") is not None
+    
+    @pytest.mark.asyncio
+    async def test_hashed_token_in_config(self):
+        """测试配置中只保存摘要"""
+        config = AuthConfig(enabled=True, tokens=[hash_token("secret")])
+        auth = create_auth(config)
+        assert await auth.verify_token("secret") is not None
+        assert await auth.verify_token(hash_token("secret")) is None
+    
+    @pytest.mark.asyncio
+    async def test_required_scopes(self):
+        """测试全局必需scope"""
+        auth = HashedTokenVerifier(
+            [BearerToken("reader", scopes=["read"]), BearerToken("admin", scopes=["read", "admin"])],
+            required_scopes=["admin"],
+        )
+        assert await auth.verify_token("reader") is None
+        assert await auth.verify_token("admin") is not None
+    
+    def test_from_file_with_scopes(self, tmp_path):
+        """测试从文件加载带scope的token并保存回文件"""
+        config = AuthConfig(enabled=True, tool_scopes={"add": ["math"]})
+        config.add_token("plain")
+        config.add_token("scoped", scopes=["math"], expires_at=4102444800)
+        path = str(tmp_path / "auth.json")
+        config.save_to_file(path)
+        
+        loaded = AuthConfig.from_file(path)
+        assert loaded.tokens == ["plain", "scoped"]
+        assert loaded.token_scopes == {"scoped": ["math"]}
+        assert loaded.token_expiry == {"scoped": 4102444800}
+        assert loaded.tool_scopes == {"add": ["math"]}
+
+
+class TestAuthReloader:
+    """认证配置热加载测试"""
+    
+    def _write(self, path, tokens):
+        AuthConfig(enabled=True, tokens=tokens).save_to_file(str(path))
+    
+    @pytest.mark.asyncio
+    async def test_update_in_place(self):
+        """测试验证器原子替换token集合"""
+        auth = HashedTokenVerifier([BearerToken("old")])
+        auth.update([BearerToken("new")])
+        assert await auth.verify_token("old") is None
+        assert await auth.verify_token("new") is not None
+        assert auth.version == 1
+    
+    def test_reload_from_file(self, tmp_path):
+        """测试从JSON文件重新加载"""
+        path = tmp_path / "auth.json"
+        self._write(path, ["token-a"])
+        applied = []
+        reloader = AuthReloader(str(path), on_change=applied.append)
+        self._write(path, ["token-b"])
+        assert reloader.reload() is True
+        assert applied[-1].tokens == ["token-b"]
+    
+    def test_reload_keeps_config_on_error(self, tmp_path):
+        """测试文件缺失或格式错误时保留原配置"""
+        path = tmp_path / "auth.json"
+        applied = []
+        reloader = AuthReloader(str(path), on_change=applied.append)
+        assert reloader.reload() is False
+        path.write_text("{not json")
+        assert reloader.reload() is False
+        assert applied == []
+    
+    def test_reload_from_env_file(self, tmp_path):
+        """测试从.env文件重新加载"""
+        path = tmp_path / ".env"
+        path.write_text('# comment\nMCP_AUTH_TOKEN="env-a"\nMCP_AUTH_TOKENS=env-b, env-c\n')
+        applied = []
+        reloader = AuthReloader(str(path), on_change=applied.append, env_file=True)
+        assert reloader.reload() is True
+        assert applied[-1].tokens == ["env-a", "env-b", "env-c"]
+    
+    def test_watch_file(self, tmp_path):
+        """测试文件变化时自动重新加载"""
+        path = tmp_path / "auth.json"
+        self._write(path, ["token-a"])
+        applied = []
+        reloader = AuthReloader(str(path), on_change=applied.append, interval=0.05)
+        reloader.start()
+        try:
+            time.sleep(0.1)
+            self._write(path, ["token-b"])
+            os.utime(path, (time.time() + 5, time.time() + 5))
+            deadline = time.time() + 5
+            while not applied and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            reloader.stop()
+        assert applied and applied[-1].tokens == ["token-b"]
+
+
+class CountingVerifier(HashedTokenVerifier):
+    """记录调用次数的验证器"""
+    
+    def __init__(self, tokens):
+        super().__init__(tokens)
+        self.calls = 0
+    
+    async def verify_token(self, token):
+        self.calls += 1
+        return await super().verify_token(token)
+
+
+class TestCachedTokenVerifier:
+    """验证结果缓存测试"""
+    
+    @pytest.mark.asyncio
+    async def test_hit_and_miss(self):
+        """测试命中缓存时不再调用内部验证器"""
+        inner = CountingVerifier([BearerToken("token", scopes=["read"])])
+        auth = CachedTokenVerifier(inner)
+        first = await auth.verify_token("token")
+        second = await auth.verify_token("token")
+        assert first is second
+        assert inner.calls == 1
+        assert auth.stats()["hits"] == 1
+        assert auth.stats()["misses"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_negative_cache(self):
+        """测试无效token的负缓存"""
+        inner = CountingVerifier([BearerToken("token")])
+        auth = CachedTokenVerifier(inner, negative_ttl=60)
+        assert await auth.verify_token("bad") is None
+        assert await auth.verify_token("bad") is None
+        assert inner.calls == 1
+    
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """测试缓存过期后重新验证"""
+        inner = CountingVerifier([BearerToken("token")])
+        auth = CachedTokenVerifier(inner, ttl=0.01)
+        await auth.verify_token("token")
+        time.sleep(0.02)
+        await auth.verify_token("token")
+        assert inner.calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        inner = CountingVerifier([BearerToken("a"), BearerToken("b"), BearerToken("c")])
+        auth = CachedTokenVerifier(inner, maxsize=2)
+        await auth.verify_token("a")
+        await auth.verify_token("b")
+        await auth.verify_token("a")
+        await auth.verify_token("c")
+        assert auth.stats()["evictions"] == 1
+        await auth.verify_token("a")
+        assert inner.calls == 3
+    
+    @pytest.mark.asyncio
+    async def test_invalidate_on_rotation(self):
+        """测试token轮换后缓存失效"""
+        inner = HashedTokenVerifier([BearerToken("old")])
+        auth = CachedTokenVerifier(inner, negative_ttl=60)
+        assert await auth.verify_token("old") is not None
+        assert await auth.verify_token("new") is None
+        inner.update([BearerToken("new")])
+        assert await auth.verify_token("old") is None
+        assert await auth.verify_token("new") is not None
+    
+    def test_create_auth_with_cache(self):
+        """测试配置cache_ttl时创建缓存验证器"""
+        config = AuthConfig(enabled=True, tokens=["token"], cache_ttl=30)
+        auth = create_auth(config)
+        assert isinstance(auth, CachedTokenVerifier)
+        assert auth.ttl == 30
+
+
+class TestToolScopeCheck:
+    """按工具校验scope测试"""
+    
+    def _ctx(self, tool_name, scopes):
+        from fastmcp.tools import Tool
+        tool = Tool.from_function(lambda: None, name=tool_name)
+        token = SimpleNamespace(scopes=scopes) if scopes is not None else None
+        return SimpleNamespace(tool=tool, token=token)
+    
+    def test_unrestricted_tool(self):
+        check = ToolScopeCheck({"add": ["math"]})
+        assert check(self._ctx("reverse_text", None)) is True
+    
+    def test_restricted_tool(self):
+        check = ToolScopeCheck({"add": ["math"]})
+        assert check(self._ctx("add", ["math", "read"])) is True
+        assert check(self._ctx("add", ["read"])) is False
+        assert check(self._ctx("add", None)) is False
+
+
+class TestScopeAuthMiddleware:
+    """授权中间件只在启用认证时生效"""
+
+    @pytest.mark.asyncio
+    async def test_not_found_error_without_auth(self):
+        """测试未启用认证时未知资源仍返回原有的未找到错误，启用后按授权检查处理"""
+        from fastmcp import Client, FastMCP
+        from fastmcp.exceptions import MCPError
+
+        server = FastMCP("scope-test", middleware=[ScopeAuthMiddleware(auth=ToolScopeCheck())])
+        async with Client(server) as client:
+            with pytest.raises(MCPError, match="Resource not found: 'nope://x'"):
+                await client.read_resource("nope://x")
+
+        # 之后开启认证（configure_auth 就地替换 auth）
+        server.auth = HashedTokenVerifier([BearerToken("token")])
+        async with Client(server) as client:
+            with pytest.raises(MCPError, match="Authorization failed"):
+                await client.read_resource("nope://x")
+
+
 class TestMainExit:
     """main.py退出行为测试"""
 
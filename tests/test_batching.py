@@ -0,0 +1,145 @@
+"""
+JSON-RPC batch 测试
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastmcp import FastMCP
+from starlette.middleware import Middleware
+
+from src.batching import BatchMiddleware, _parse_batch
+
+
+HEADERS = {
+    "accept": "application/json, text/event-stream",
+    "content-type": "application/json",
+}
+
+
+def _events(text: str) -> list:
+    return [json.loads(line[5:]) for line in text.splitlines() if line.startswith("data:")]
+
+
+class TestParseBatch:
+    """批量请求解析测试"""
+
+    def test_array(self):
+        batch = _parse_batch(b' [{"id": 1}, {"id": 2}]')
+        assert [json.loads(item) for item in batch] == [{"id": 1}, {"id": 2}]
+
+    def test_single_message(self):
+        assert _parse_batch(b'{"id": 1}') is None
+
+    def test_empty_or_invalid(self):
+        assert _parse_batch(b"[]") is None
+        assert _parse_batch(b"[not json") is None
+
+
+@pytest.fixture
+def server():
+    server = FastMCP("batch-test")
+
+    @server.tool
+    async def slow(x: int) -> int:
+        await asyncio.sleep(0.2)
+        return x
+
+    return server
+
+
+async def _initialize(client: httpx.AsyncClient) -> dict:
+    headers = dict(HEADERS)
+    response = await client.post("/mcp", headers=headers, json={
+        "jsonrpc": "2.0", "id": 0, "method": "initialize",
+        "params": {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "clientInfo": {"name": "batch-test", "version": "1.0.0"},
+        },
+    })
+    headers["mcp-session-id"] = response.headers["mcp-session-id"]
+    headers["mcp-protocol-version"] = "2025-06-18"
+    await client.post("/mcp", headers=headers, json={
+        "jsonrpc": "2.0", "method": "notifications/initialized",
+    })
+    return headers
+
+
+class TestBatchMiddleware:
+    """Streamable-HTTP 批量请求集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_batch_runs_concurrently(self, server):
+        """测试批量中的工具调用并发执行并逐条返回"""
+        app = server.http_app(transport="http", middleware=[Middleware(BatchMiddleware)])
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                headers = await _initialize(client)
+                batch = [
+                    {"jsonrpc": "2.0", "id": i, "method": "tools/call",
+                     "params": {"name": "slow", "arguments": {"x": i}}}
+                    for i in range(1, 11)
+                ]
+                start = time.perf_counter()
+                response = await client.post("/mcp", headers=headers, content=json.dumps(batch))
+                elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        results = {event["id"]: event["result"]["structuredContent"]["result"] for event in _events(response.text)}
+        assert results == {i: i for i in range(1, 11)}
+        assert elapsed < 1.5
+
+    @pytest.mark.asyncio
+    async def test_batch_size_limit(self, server):
+        """测试超过批量上限时拒绝"""
+        app = BatchMiddleware(server.http_app(transport="http"), max_batch_size=2)
+        transport = httpx.ASGITransport(app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            batch = [{"jsonrpc": "2.0", "id": i, "method": "ping"} for i in range(3)]
+            response = await client.post("/mcp", headers=HEADERS, content=json.dumps(batch))
+        assert response.status_code == 413
+
+
+class TestSSEBatch:
+    """SSE 批量请求的接受与逐条错误测试"""
+
+    @staticmethod
+    async def _messages_app(scope, receive, send):
+        """模拟SDK的消息端点：合法消息返回202，无法解析的返回400"""
+        body = (await receive())["body"]
+        status, text = (400, b"Could not parse message") if b"method" not in body else (202, b"Accepted")
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"text/plain; charset=utf-8")]})
+        await send({"type": "http.response.body", "body": text})
+
+    async def _post(self, batch: list) -> httpx.Response:
+        transport = httpx.ASGITransport(BatchMiddleware(self._messages_app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/messages/?session_id=abc", content=json.dumps(batch))
+
+    @pytest.mark.asyncio
+    async def test_partial_failure_reports_items(self):
+        response = await self._post([
+            {"jsonrpc": "2.0", "id": 1, "method": "ping"},
+            {"jsonrpc": "2.0", "id": 2},
+            {"jsonrpc": "2.0", "id": 3, "method": "ping"},
+        ])
+        assert response.status_code == 202
+        [error] = response.json()
+        assert error["id"] == 2
+        assert error["error"]["code"] == -32600
+        assert error["error"]["message"] == "Could not parse message"
+        assert error["error"]["data"] == {"index": 1, "status": 400}
+
+    @pytest.mark.asyncio
+    async def test_all_accepted_or_all_failed(self):
+        accepted = await self._post([{"jsonrpc": "2.0", "id": i, "method": "ping"} for i in range(2)])
+        assert accepted.status_code == 202 and accepted.text == "Accepted"
+        failed = await self._post([{"jsonrpc": "2.0", "id": i} for i in range(2)])
+        assert failed.status_code == 400
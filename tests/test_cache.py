@@ -0,0 +1,234 @@
+"""
+工具结果缓存与资源缓存测试
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.client.messages import MessageHandler
+from fastmcp.tools import ToolResult
+from mcp.server.subscriptions import ResourceUpdated
+
+from src.cache import (
+    CachePolicy,
+    ResourceCache,
+    ResourceCacheMiddleware,
+    ToolCacheMiddleware,
+    ToolResultCache,
+    resource_cache,
+    tool_cache,
+)
+from src.listing import ListingCache
+
+
+def _result(text: str) -> ToolResult:
+    return ToolResult(content=text)
+
+
+class TestToolResultCache:
+    """ToolResultCache测试类"""
+
+    def test_canonical_arguments(self):
+        """测试参数顺序不影响缓存键"""
+        cache = ToolResultCache()
+        cache.register("add", CachePolicy())
+        cache.put("add", {"a": 1, "b": 2}, _result("3"))
+        assert cache.get("add", {"b": 2, "a": 1}) is not None
+        assert cache.get("add", {"a": 2, "b": 1}) is None
+
+    def test_not_cacheable(self):
+        """测试未标记的工具不缓存"""
+        cache = ToolResultCache()
+        cache.put("other", {}, _result("x"))
+        assert cache.get("other", {}) is None
+        assert cache.stats() == {}
+
+    def test_ttl(self):
+        """测试TTL过期"""
+        cache = ToolResultCache()
+        cache.register("weather", CachePolicy(ttl=0.01))
+        cache.put("weather", {"city": "Beijing"}, _result("sunny"))
+        assert cache.get("weather", {"city": "Beijing"}) is not None
+        time.sleep(0.02)
+        assert cache.get("weather", {"city": "Beijing"}) is None
+
+    def test_lru_maxsize(self):
+        """测试超过条目上限时淘汰最久未使用的结果"""
+        cache = ToolResultCache()
+        cache.register("t", CachePolicy(maxsize=2))
+        for i in range(3):
+            cache.put("t", {"i": i}, _result(str(i)))
+        assert cache.get("t", {"i": 0}) is None
+        assert cache.get("t", {"i": 2}) is not None
+        assert cache.stats()["t"]["evictions"] == 1
+
+    def test_memory_cap(self):
+        """测试超过内存上限时淘汰"""
+        cache = ToolResultCache()
+        cache.register("t", CachePolicy(max_bytes=400))
+        cache.put("t", {"i": 0}, _result("x" * 100))
+        cache.put("t", {"i": 1}, _result("y" * 100))
+        cache.put("t", {"i": 2}, _result("z" * 1000))
+        stats = cache.stats()["t"]
+        assert stats["bytes"] <= 400
+        assert cache.get("t", {"i": 2}) is None
+
+    def test_error_results_not_cached(self):
+        """测试错误结果不缓存"""
+        cache = ToolResultCache()
+        cache.register("t", CachePolicy())
+        cache.put("t", {}, ToolResult(content="boom", is_error=True))
+        assert cache.get("t", {}) is None
+
+    def test_hit_ratio(self):
+        """测试命中率统计"""
+        cache = ToolResultCache()
+        cache.register("t", CachePolicy())
+        cache.get("t", {})
+        cache.put("t", {}, _result("x"))
+        cache.get("t", {})
+        cache.get("t", {})
+        stats = cache.stats()["t"]
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == pytest.approx(2 / 3)
+
+
+class TestToolCacheMiddleware:
+    """缓存中间件集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_cached_call_skips_execution(self):
+        """测试命中缓存时不再执行工具"""
+        cache = ToolResultCache()
+        cache.register("counter", CachePolicy())
+        server = FastMCP("cache-test", middleware=[ToolCacheMiddleware(cache)])
+        calls = []
+
+        @server.tool
+        def counter(x: int) -> int:
+            calls.append(x)
+            return x * 2
+
+        async with Client(server) as client:
+            first = await client.call_tool("counter", {"x": 2})
+            second = await client.call_tool("counter", {"x": 2})
+        assert first.data == second.data == 4
+        assert calls == [2]
+
+    def test_demo_tools_registered(self):
+        """测试示例工具已启用缓存"""
+        import src.tools  # noqa: F401
+        for name in ("add", "multiply", "get_weather", "reverse_text"):
+            assert tool_cache.is_cacheable(name)
+
+
+class _Updated(MessageHandler):
+    def __init__(self):
+        self.uris = []
+
+    async def on_resource_updated(self, message):
+        self.uris.append(str(message.params.uri))
+
+
+def _resource_server(ttl=None):
+    cache = ResourceCache()
+    cache.register("settings", CachePolicy(ttl=ttl))
+    server = FastMCP("resource-cache-test", middleware=[ResourceCacheMiddleware(cache)])
+    cache.notifier = ListingCache(server).install().notifier
+    state = {"reads": 0, "value": "a"}
+
+    @server.resource("config://settings")
+    def settings() -> str:
+        state["reads"] += 1
+        return state["value"]
+
+    @server.resource("config://plain")
+    def plain() -> str:
+        state["reads"] += 1
+        return "plain"
+
+    return server, cache, state
+
+
+async def _wait_for(predicate):
+    for _ in range(50):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+
+
+class TestResourceCache:
+    """资源缓存测试类"""
+
+    @pytest.mark.asyncio
+    async def test_cached_read_and_etag(self):
+        """测试按URI缓存，未标记的资源不缓存，etag未变化时不重复返回内容"""
+        server, cache, state = _resource_server()
+        async with Client(server) as client:
+            first = await client.read_resource_mcp("config://settings")
+            second = await client.read_resource_mcp("config://settings")
+            assert state["reads"] == 1
+            assert first.meta["etag"] == second.meta["etag"]
+
+            await client.read_resource_mcp("config://plain")
+            await client.read_resource_mcp("config://plain")
+            assert state["reads"] == 3
+
+            result = await client.session.read_resource(
+                "config://settings", meta={"ifNoneMatch": first.meta["etag"]}
+            )
+            assert result.contents == []
+            assert result.meta["notModified"] is True
+        assert cache.stats()["hits"] == 2
+
+    @pytest.mark.asyncio
+    @pytest.mark.filterwarnings("ignore:resources/.*subscribe is removed")
+    async def test_invalidate_notifies_subscribers(self):
+        """测试失效后通知订阅者，重新读取得到新内容"""
+        server, cache, state = _resource_server()
+        handler = _Updated()
+        events = []
+        cache.notifier.bus.subscribe(events.append)
+        async with Client(server, message_handler=handler, mode="legacy") as client:
+            await client.read_resource_mcp("config://settings")
+            await client.session.subscribe_resource("config://settings")
+
+            state["value"] = "b"
+            cache.invalidate("config://settings")
+            await _wait_for(lambda: handler.uris)
+            assert handler.uris == ["config://settings"]
+            assert events == [ResourceUpdated(uri="config://settings")]
+            result = await client.read_resource_mcp("config://settings")
+            assert result.contents[0].text == "b"
+
+            await client.session.unsubscribe_resource("config://settings")
+            cache.invalidate("config://settings")
+            await asyncio.sleep(0.05)
+            assert handler.uris == ["config://settings"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.filterwarnings("ignore:resources/.*subscribe is removed")
+    async def test_expired_change_notifies(self):
+        """测试过期后重新读取到不同内容时通知订阅者，内容相同时不通知"""
+        server, _, state = _resource_server(ttl=0.01)
+        handler = _Updated()
+        async with Client(server, message_handler=handler, mode="legacy") as client:
+            await client.session.subscribe_resource("config://settings")
+            await client.read_resource_mcp("config://settings")
+            await asyncio.sleep(0.02)
+            await client.read_resource_mcp("config://settings")
+            assert state["reads"] == 2
+
+            state["value"] = "c"
+            await asyncio.sleep(0.02)
+            await client.read_resource_mcp("config://settings")
+            await _wait_for(lambda: handler.uris)
+            assert handler.uris == ["config://settings"]
+
+    def test_demo_resources_registered(self):
+        """测试示例资源已启用缓存"""
+        import src.resources  # noqa: F401
+        assert "get_app_info" in resource_cache.policies
@@ -0,0 +1,122 @@
+"""
+测试客户端连接池
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+from mcp import StdioServerParameters
+from mcp.shared.exceptions import MCPError
+from mcp_types import CONNECTION_CLOSED, INVALID_REQUEST
+
+from src.client_pool import ClientPool, _disconnected, _expired
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "pool-token"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(transport: str, port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "main.py", "--transport", transport, "--token", TOKEN,
+         "--host", "127.0.0.1", "--port", str(port)],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise TimeoutError(f"server on port {port} did not start")
+
+
+def _stop_server(proc: subprocess.Popen):
+    proc.terminate()
+    proc.wait(timeout=15)
+
+
+class TestDisconnects:
+    """测试连接断开的判断"""
+
+    def test_classification(self):
+        expired = MCPError(code=INVALID_REQUEST, message="Session not found")
+        assert _expired(expired) and _disconnected(expired)
+        assert _disconnected(MCPError(code=CONNECTION_CLOSED, message="Connection closed"))
+        assert not _disconnected(MCPError(code=INVALID_REQUEST, message="Invalid params"))
+        assert not _disconnected(ValueError("boom"))
+
+
+class TestClientPool:
+    """测试连接池的会话复用与重连"""
+
+    @pytest.mark.parametrize("transport, path", [("http", "/mcp"), ("sse", "/mcp/sse")])
+    def test_reuses_and_reconnects(self, transport, path):
+        port = _free_port()
+        url = f"http://127.0.0.1:{port}{path}"
+        proc = _start_server(transport, port)
+        try:
+            async def run():
+                async with ClientPool(token=TOKEN) as pool:
+                    # 并发请求在同一个会话上多路复用
+                    results = await asyncio.gather(*[pool.call_tool(url, "add", {"a": i, "b": 1}) for i in range(10)])
+                    assert [r.structured_content["result"] for r in results] == list(range(1, 11))
+                    tools = await pool.list_tools(url)
+                    assert "add" in [t.name for t in tools.tools]
+                    assert pool.stats() == {"sessions": 1, "in_flight": 0, "connects": 1, "reconnects": 0}
+
+                    # 服务器重启后，下一次调用在新会话上重试
+                    nonlocal proc
+                    _stop_server(proc)
+                    proc = _start_server(transport, port)
+                    result = await pool.call_tool(url, "add", {"a": 2, "b": 3})
+                    assert result.structured_content["result"] == 5
+                    assert pool.stats()["connects"] == 2
+                    assert pool.stats()["reconnects"] == 1
+
+                    # token 不同的调用方使用各自的会话
+                    with pytest.raises(Exception):
+                        await pool.call_tool(url, "add", {"a": 1, "b": 1}, token="wrong")
+
+            asyncio.run(run())
+        finally:
+            _stop_server(proc)
+
+    def test_stdio_and_idle_timeout(self):
+        server = StdioServerParameters(command=sys.executable, args=["main.py", "--transport", "stdio", "--no-auth"], cwd=ROOT)
+
+        async def run():
+            async with ClientPool(idle_timeout=0.5) as pool:
+                for i in range(3):
+                    result = await pool.call_tool(server, "reverse_text", {"text": f"abc{i}"})
+                    assert result.content[0].text == f"{i}cba"
+                assert pool.stats()["connects"] == 1
+                # 空闲超时后会话关闭，再次使用时重新建立
+                for _ in range(50):
+                    if pool.stats()["sessions"] == 0:
+                        break
+                    await asyncio.sleep(0.1)
+                assert pool.stats()["sessions"] == 0
+                await pool.call_tool(server, "add", {"a": 1, "b": 2})
+                assert pool.stats()["connects"] == 2
+
+        asyncio.run(run())
+
+    @pytest.mark.asyncio
+    async def test_requires_context(self):
+        with pytest.raises(RuntimeError):
+            await ClientPool().call_tool("http://127.0.0.1:1/mcp", "add")
@@ -0,0 +1,116 @@
+"""
+工具执行策略测试
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+
+from src.execution import ExecutionPolicy, execution, tool_executor
+
+
+@execution("process", name="exec_pid")
+def current_pid() -> int:
+    return os.getpid()
+
+
+class TestExecutionPolicy:
+    """ExecutionPolicy测试类"""
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            ExecutionPolicy(mode="fiber")
+
+    def test_inline_timeout_rejected(self):
+        with pytest.raises(ValueError):
+            ExecutionPolicy(mode="inline", timeout=1)
+
+    def test_async_function_rejected(self):
+        with pytest.raises(TypeError):
+            @execution("thread")
+            async def tool():
+                pass
+
+
+class TestExecution:
+    """执行策略集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_thread_mode_keeps_loop_responsive(self):
+        """测试线程模式下阻塞工具不会阻塞事件循环"""
+        server = FastMCP("exec-test")
+
+        @server.tool
+        @execution("thread", name="exec_block")
+        def block(seconds: float) -> str:
+            time.sleep(seconds)
+            return threading.current_thread().name
+
+        ticks = 0
+
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(heartbeat())
+        async with Client(server) as client:
+            result = await client.call_tool("block", {"seconds": 0.3})
+        task.cancel()
+        assert result.data.startswith("mcp-tool")
+        assert ticks >= 10
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency(self):
+        """测试单个工具的并发上限"""
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        @execution("thread", max_concurrency=2, name="exec_limited")
+        def limited() -> None:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+
+        await asyncio.gather(*(limited() for _ in range(6)))
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """测试超时返回工具错误"""
+        @execution("thread", timeout=0.05, name="exec_slow")
+        def slow() -> None:
+            time.sleep(0.3)
+
+        with pytest.raises(ToolError, match="timed out"):
+            await slow()
+
+    @pytest.mark.asyncio
+    async def test_process_mode(self):
+        """测试进程模式在子进程中执行"""
+        try:
+            pid = await current_pid()
+        finally:
+            tool_executor.shutdown()
+        assert pid != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_demo_tools(self):
+        """测试示例工具经执行策略包装后仍可正常调用"""
+        from src.server import mcp
+        async with Client(mcp) as client:
+            result = await client.call_tool("add", {"a": 2, "b": 3})
+            weather = await client.call_tool("get_weather", {"city": "Beijing"})
+        assert result.data == 5
+        assert weather.data["city"] == "Beijing"
@@ -0,0 +1,246 @@
+"""
+懒加载测试
+"""
+
+import sys
+import types
+from collections import OrderedDict
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import MCPError
+
+from src import lazy
+from src.admission import ToolAdmissionMiddleware, admission
+from src.cache import tool_cache
+from src.lazy import MANIFEST_PATH, LazyProvider, load_manifest, save_manifest
+from src.plugins import discover, load
+
+MODULE = "lazy_demo_tools"
+
+SOURCE = '''
+from lazy_demo_host import server
+
+
+@server.tool
+def lazy_echo(text: str) -> str:
+    """Echo the text back."""
+    return text
+'''
+
+POLICY_SOURCE = '''
+from lazy_demo_host import server
+from src.admission import rate_limit
+from src.cache import cacheable
+
+
+@server.tool
+@rate_limit(rate=1, burst=1)
+@cacheable(ttl=30)
+def lazy_limited(text: str) -> str:
+    """Echo the text back, at most once per second."""
+    return text
+'''
+
+PLUGIN_SOURCE = '''
+def register(server):
+    @server.prompt
+    def lazy_greeting(name: str) -> str:
+        """Greet someone."""
+        return f"Hello, {name}"
+'''
+
+
+@pytest.fixture
+def demo(tmp_path, monkeypatch):
+    """在临时目录中准备组件模块，返回 (模块文件, 清单路径, 新建服务器的函数)"""
+    path = tmp_path / f"{MODULE}.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def new_server() -> FastMCP:
+        sys.modules.pop(MODULE, None)
+        server = FastMCP("lazy-test")
+        host = types.ModuleType("lazy_demo_host")
+        host.server = server
+        monkeypatch.setitem(sys.modules, "lazy_demo_host", host)
+        return server
+
+    # 组件模块不在随包发布的清单中，运行时生成的条目写入临时目录
+    monkeypatch.setenv(lazy.CACHE_DIR_ENV, str(tmp_path / "cache"))
+    yield path, tmp_path / "manifest.json", new_server
+    sys.modules.pop(MODULE, None)
+
+
+@pytest.fixture
+def plugin_package(tmp_path, monkeypatch):
+    """临时组件包：__init__ 与子模块各注册一个工具，另有插件式注册函数"""
+    package = tmp_path / "lazy_demo_pkg"
+    package.mkdir()
+    (package / "__init__.py").write_text(SOURCE, encoding="utf-8")
+    (package / "extra.py").write_text(SOURCE.replace("lazy_echo", "lazy_extra"), encoding="utf-8")
+    (package / "plugin.py").write_text(PLUGIN_SOURCE, encoding="utf-8")
+    (package / "_private.py").write_text("", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    server = FastMCP("plugin-test")
+    host = types.ModuleType("lazy_demo_host")
+    host.server = server
+    monkeypatch.setitem(sys.modules, "lazy_demo_host", host)
+    yield server, tmp_path / "manifest.json"
+    for name in [m for m in sys.modules if m.startswith("lazy_demo_pkg")]:
+        del sys.modules[name]
+
+
+class TestLazyProvider:
+    """LazyProvider测试类"""
+
+    @pytest.mark.asyncio
+    async def test_manifest_built_on_first_start(self, demo):
+        """测试清单缺失时直接导入模块并写入清单"""
+        _, manifest_path, new_server = demo
+        server = new_server()
+        LazyProvider.install(server, [MODULE], cache_path=manifest_path)
+
+        assert MODULE in sys.modules
+        entry = load_manifest(manifest_path)["modules"][MODULE]
+        assert [t["name"] for t in entry["tools"]] == ["lazy_echo"]
+        async with Client(server) as client:
+            assert [t.name for t in await client.list_tools()] == ["lazy_echo"]
+
+    @pytest.mark.asyncio
+    async def test_loaded_on_first_call(self, demo):
+        """测试清单有效时启动不导入模块，首次调用时才导入"""
+        _, manifest_path, new_server = demo
+        LazyProvider.install(new_server(), [MODULE], cache_path=manifest_path)
+
+        server = new_server()
+        LazyProvider.install(server, [MODULE], cache_path=manifest_path)
+        assert MODULE not in sys.modules
+
+        async with Client(server) as client:
+            tools = await client.list_tools()
+            assert [t.name for t in tools] == ["lazy_echo"]
+            assert tools[0].input_schema["required"] == ["text"]
+            assert MODULE not in sys.modules
+
+            result = await client.call_tool("lazy_echo", {"text": "hi"})
+            assert result.data == "hi"
+            assert MODULE in sys.modules
+            assert [t.name for t in await client.list_tools()] == ["lazy_echo"]
+
+    @pytest.mark.asyncio
+    async def test_stale_manifest_rebuilt(self, demo):
+        """测试源文件变化后启动时重新导入并更新清单"""
+        path, manifest_path, new_server = demo
+        LazyProvider.install(new_server(), [MODULE], cache_path=manifest_path)
+        old_hash = load_manifest(manifest_path)["modules"][MODULE]["sha256"]
+
+        path.write_text(SOURCE.replace("lazy_echo", "lazy_shout"), encoding="utf-8")
+        server = new_server()
+        LazyProvider.install(server, [MODULE], cache_path=manifest_path)
+
+        assert MODULE in sys.modules
+        entry = load_manifest(manifest_path)["modules"][MODULE]
+        assert entry["sha256"] != old_hash
+        assert [t["name"] for t in entry["tools"]] == ["lazy_shout"]
+        async with Client(server) as client:
+            assert [t.name for t in await client.list_tools()] == ["lazy_shout"]
+
+    @pytest.mark.asyncio
+    async def test_policies_applied_before_load(self, demo, monkeypatch):
+        """测试装饰器登记的策略记入清单，懒加载的模块导入前即生效"""
+        path, manifest_path, new_server = demo
+        path.write_text(POLICY_SOURCE, encoding="utf-8")
+        monkeypatch.setattr(admission, "tool_limits", {})
+        monkeypatch.setattr(tool_cache, "_tools", {})
+        monkeypatch.setattr(admission, "_buckets", OrderedDict())
+        LazyProvider.install(new_server(), [MODULE], cache_path=manifest_path)
+        entry = load_manifest(manifest_path)["modules"][MODULE]
+        assert entry["policies"]["cacheable"] == {"lazy_limited": {"maxsize": 256, "ttl": 30, "max_bytes": 1048576}}
+
+        admission.tool_limits.clear()
+        tool_cache._tools.clear()
+        server = new_server()
+        server.add_middleware(ToolAdmissionMiddleware())
+        LazyProvider.install(server, [MODULE], cache_path=manifest_path)
+        assert MODULE not in sys.modules
+        assert admission.tool_limits["lazy_limited"].rate == 1
+        assert tool_cache.is_cacheable("lazy_limited")
+
+        # 第一次调用（导入模块）就计入限额
+        async with Client(server) as client:
+            assert (await client.call_tool("lazy_limited", {"text": "a"})).data == "a"
+            with pytest.raises(MCPError, match="Rate limit"):
+                await client.call_tool("lazy_limited", {"text": "b"})
+
+    def test_packaged_manifest_read_only(self, demo, tmp_path):
+        """测试随包发布的清单过期时不被改写，新条目写入缓存清单"""
+        _, _, new_server = demo
+        packaged = tmp_path / "packaged.json"
+        save_manifest({"modules": {MODULE: {"sha256": "stale", "tools": []}}}, packaged)
+        before = packaged.read_bytes()
+        LazyProvider.install(new_server(), [MODULE], packaged)
+
+        assert packaged.read_bytes() == before
+        cached = load_manifest(lazy.cache_manifest_path())["modules"][MODULE]
+        assert [t["name"] for t in cached["tools"]] == ["lazy_echo"]
+
+        # 缓存清单中的条目有效时懒加载
+        LazyProvider.install(new_server(), [MODULE], packaged)
+        assert MODULE not in sys.modules
+
+    def test_packaged_manifest_current(self):
+        """测试随包发布的清单与组件模块一致（修改模块后需运行 python -m src.lazy）"""
+        for source, entry in load_manifest(MANIFEST_PATH)["modules"].items():
+            assert entry["sha256"] == lazy.source_hash(source), source
+
+
+class TestDiscovery:
+    """组件发现测试类"""
+
+    def test_submodules_discovered(self, plugin_package):
+        """测试包本身与子模块都被发现，且发现时不导入包"""
+        sources = discover(["lazy_demo_pkg"], plugins=False)
+        assert sources == ["lazy_demo_pkg", "lazy_demo_pkg.extra", "lazy_demo_pkg.plugin"]
+        assert "lazy_demo_pkg" not in sys.modules
+
+    @pytest.mark.asyncio
+    async def test_register_function(self, plugin_package):
+        """测试 module:register 形式的来源以服务器为参数注册组件"""
+        server, _ = plugin_package
+        load(server, "lazy_demo_pkg.plugin:register")
+        async with Client(server) as client:
+            result = await client.get_prompt("lazy_greeting", {"name": "Ada"})
+        assert "Hello, Ada" in result.messages[0].content.text
+
+    @pytest.mark.asyncio
+    async def test_submodule_entries(self, plugin_package):
+        """测试子模块的清单条目不包含父包注册的组件"""
+        server, manifest_path = plugin_package
+        sources = ["lazy_demo_pkg.extra", "lazy_demo_pkg", "lazy_demo_pkg.plugin:register"]
+        LazyProvider.install(server, sources, cache_path=manifest_path)
+
+        entries = load_manifest(manifest_path)["modules"]
+        assert [t["name"] for t in entries["lazy_demo_pkg.extra"]["tools"]] == ["lazy_extra"]
+        assert [p["name"] for p in entries["lazy_demo_pkg.plugin:register"]["prompts"]] == ["lazy_greeting"]
+        async with Client(server) as client:
+            assert sorted(t.name for t in await client.list_tools()) == ["lazy_echo", "lazy_extra"]
+
+    @pytest.mark.asyncio
+    async def test_plugin_loaded_on_demand(self, plugin_package):
+        """测试插件来源按需加载，删除的来源从清单中移除"""
+        server, manifest_path = plugin_package
+        save_manifest({"modules": {"removed_plugin:register": {"sha256": None}}}, manifest_path)
+        LazyProvider.install(server, ["lazy_demo_pkg.plugin:register"], cache_path=manifest_path)
+        del sys.modules["lazy_demo_pkg.plugin"]
+
+        fresh = FastMCP("plugin-test-2")
+        LazyProvider.install(fresh, ["lazy_demo_pkg.plugin:register"], cache_path=manifest_path)
+        assert "lazy_demo_pkg.plugin" not in sys.modules
+        assert list(load_manifest(manifest_path)["modules"]) == ["lazy_demo_pkg.plugin:register"]
+
+        async with Client(fresh) as client:
+            assert [p.name for p in await client.list_prompts()] == ["lazy_greeting"]
+            result = await client.get_prompt("lazy_greeting", {"name": "Ada"})
+            assert "Hello, Ada" in result.messages[0].content.text
+            assert [p.name for p in await client.list_prompts()] == ["lazy_greeting"]
@@ -0,0 +1,143 @@
+"""
+组件列表缓存测试
+"""
+
+import asyncio
+
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.client.messages import MessageHandler
+from mcp.server.subscriptions import ToolsListChanged
+from mcp_types import PaginatedRequestParams
+
+from src.listing import ListingCache
+
+
+def _server():
+    server = FastMCP("listing-test")
+
+    @server.tool
+    def listed(x: int) -> int:
+        return x
+
+    return server, ListingCache(server).install()
+
+
+class _ListChanged(MessageHandler):
+    def __init__(self):
+        self.tools = 0
+
+    async def on_tool_list_changed(self, message):
+        self.tools += 1
+
+
+class TestListingCache:
+    """ListingCache测试类"""
+
+    @pytest.mark.asyncio
+    async def test_cached_until_registration_changes(self):
+        """测试列表响应被缓存，注册新工具后失效"""
+        server, listing = _server()
+        async with Client(server) as client:
+            first = await client.list_tools_mcp()
+            second = await client.list_tools_mcp()
+            assert listing.stats()["hits"] == 1
+            assert first.meta["etag"] == second.meta["etag"]
+
+            server.tool(lambda y: y, name="added")
+            third = await client.list_tools_mcp()
+            assert sorted(t.name for t in third.tools) == ["added", "listed"]
+            assert third.meta["etag"] != first.meta["etag"]
+
+    @pytest.mark.asyncio
+    async def test_if_none_match(self):
+        """测试etag未变化时不重复返回列表"""
+        server, _ = _server()
+        async with Client(server) as client:
+            tag = (await client.list_tools_mcp()).meta["etag"]
+            result = await client.session.list_tools(params=PaginatedRequestParams(_meta={"ifNoneMatch": tag}))
+            assert result.tools == []
+            assert result.meta["etag"] == tag
+            assert result.meta["notModified"] is True
+
+            stale = await client.session.list_tools(params=PaginatedRequestParams(_meta={"ifNoneMatch": "old"}))
+            assert [t.name for t in stale.tools] == ["listed"]
+
+    @pytest.mark.asyncio
+    async def test_list_changed_notification(self):
+        """测试注册变化时通知已获取列表的会话，内容不变时不通知"""
+        server, listing = _server()
+        handler = _ListChanged()
+        events = []
+        listing.notifier.bus.subscribe(events.append)
+        async with Client(server, message_handler=handler, mode="legacy") as client:
+            await client.list_tools()
+
+            listing.invalidate()
+            await asyncio.sleep(0.05)
+            assert handler.tools == 0
+
+            server.tool(lambda y: y, name="added")
+            for _ in range(50):
+                if handler.tools:
+                    break
+                await asyncio.sleep(0.01)
+            assert handler.tools == 1
+            assert events == [ToolsListChanged()]
+
+
+def _catalog_server(count: int):
+    server = FastMCP("catalog-test")
+    for i in range(count):
+        server.tool(lambda x: x, name=f"{'math' if i % 2 else 'text'}_{i:03d}", tags={"even"} if i % 2 == 0 else set())
+    return server, ListingCache(server, page_size=10).install()
+
+
+class TestPagination:
+    """分页与过滤测试类"""
+
+    @pytest.mark.asyncio
+    async def test_cursor_pages(self):
+        """测试按游标翻页，客户端自动翻页得到完整列表"""
+        server, _ = _catalog_server(25)
+        async with Client(server) as client:
+            first = await client.list_tools_mcp()
+            assert len(first.tools) == 10
+            assert first.meta["total"] == 25
+            second = await client.list_tools_mcp(cursor=first.next_cursor)
+            assert second.tools[0].name == "text_010"
+            names = [t.name for t in await client.list_tools()]
+        assert len(names) == 25
+        assert len(set(names)) == 25
+
+    @pytest.mark.asyncio
+    async def test_prefix_and_tags(self):
+        """测试前缀与标签过滤，翻页时保持过滤条件"""
+        server, _ = _catalog_server(25)
+        async with Client(server) as client:
+            meta = {"prefix": "math_"}
+            page = await client.session.list_tools(params=PaginatedRequestParams(_meta=meta))
+            names = [t.name for t in page.tools]
+            while page.next_cursor:
+                page = await client.session.list_tools(
+                    params=PaginatedRequestParams(cursor=page.next_cursor, _meta=meta)
+                )
+                names += [t.name for t in page.tools]
+            assert names == [f"math_{i:03d}" for i in range(1, 25, 2)]
+
+            tagged = await client.session.list_tools(params=PaginatedRequestParams(_meta={"tags": ["even"]}))
+            assert tagged.meta["total"] == 13
+            assert all(t.name.startswith("text_") for t in tagged.tools)
+
+            none = await client.session.list_tools(
+                params=PaginatedRequestParams(_meta={"prefix": "math_", "tags": ["even"]})
+            )
+            assert none.tools == [] and none.next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor(self):
+        """测试无效游标返回参数错误"""
+        server, _ = _catalog_server(3)
+        async with Client(server) as client:
+            with pytest.raises(Exception):
+                await client.list_tools_mcp(cursor="not-a-cursor")
@@ -0,0 +1,135 @@
+"""
+监控指标测试
+"""
+
+import httpx
+import pytest
+from fastmcp import Client, FastMCP
+
+from src.metrics import (
+    Counter,
+    Histogram,
+    MAX_SERIES,
+    OVERFLOW_LABEL,
+    RequestMetricsMiddleware,
+    merge_snapshots,
+    render,
+    request_duration,
+    requests_total,
+)
+
+
+class TestMetricTypes:
+    """指标类型测试类"""
+
+    def test_histogram_buckets(self):
+        histogram = Histogram("latency", "help", ("tool",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "a")
+        histogram.observe(0.1, "a")
+        histogram.observe(5, "a")
+        text = render({"latency": histogram.snapshot()})
+        assert 'latency_bucket{tool="a",le="0.1"} 2' in text
+        assert 'latency_bucket{tool="a",le="1"} 2' in text
+        assert 'latency_bucket{tool="a",le="+Inf"} 3' in text
+        assert 'latency_count{tool="a"} 3' in text
+
+    def test_series_cap(self):
+        counter = Counter("c", "help", ("uri",))
+        for i in range(MAX_SERIES + 5):
+            counter.inc(f"res://{i}")
+        assert len(counter.values) == MAX_SERIES + 1
+        assert counter.values[(OVERFLOW_LABEL,)] == 5
+
+    def test_label_escaping(self):
+        counter = Counter("c", "help", ("name",))
+        counter.inc('a"b')
+        assert 'c{name="a\\"b"} 1' in render({"c": counter.snapshot()})
+
+    def test_merge_snapshots(self):
+        """测试多worker快照合并"""
+        a, b = Counter("c", "help", ("t",)), Counter("c", "help", ("t",))
+        a.inc("x")
+        b.inc("x", amount=2)
+        b.inc("y")
+        ha, hb = Histogram("h", "help"), Histogram("h", "help")
+        ha.observe(0.001)
+        hb.observe(100)
+        merged = merge_snapshots([
+            {"c": a.snapshot(), "h": ha.snapshot()},
+            {"c": b.snapshot(), "h": hb.snapshot()},
+        ])
+        assert dict((tuple(k), v) for k, v in merged["c"]["values"]) == {("x",): 3, ("y",): 1}
+        assert merged["h"]["values"][0][1][-1] == 2
+
+
+class TestRequestMetrics:
+    """请求指标集成测试"""
+
+    @pytest.mark.asyncio
+    async def test_tool_calls_recorded(self):
+        server = FastMCP("metrics-test", middleware=[RequestMetricsMiddleware()])
+
+        @server.tool
+        def metrics_ok() -> int:
+            return 1
+
+        @server.tool
+        def metrics_fail() -> int:
+            raise ValueError("boom")
+
+        async with Client(server) as client:
+            await client.call_tool("metrics_ok", {})
+            with pytest.raises(Exception):
+                await client.call_tool("metrics_fail", {})
+
+        assert requests_total.values[("tool", "metrics_ok", "ok")] >= 1
+        assert requests_total.values[("tool", "metrics_fail", "error")] >= 1
+        assert request_duration.values[("tool", "metrics_ok")][-1] >= 1
+
+    @pytest.mark.asyncio
+    async def test_resources_labeled_by_name(self):
+        """测试资源按资源名或模板名记录，不为每个URI产生新的时间序列"""
+        server = FastMCP("metrics-test", middleware=[RequestMetricsMiddleware()])
+
+        @server.resource("metrics-users://{user_id}")
+        def metrics_user(user_id: str) -> str:
+            return user_id
+
+        async with Client(server) as client:
+            for i in range(3):
+                await client.read_resource(f"metrics-users://{i}")
+            with pytest.raises(Exception):
+                await client.read_resource("metrics-nope://x")
+
+        assert requests_total.values[("resource", "metrics_user", "ok")] >= 3
+        assert requests_total.values[("resource", "unknown", "error")] >= 1
+        assert not [key for key in requests_total.values if "metrics-users://" in key[1]]
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint_requires_token(self, monkeypatch):
+        """测试启用认证时 /metrics 需要有效的Bearer token"""
+        from src.app import create_app
+        from src.auth import BearerToken, HashedTokenVerifier
+        from src.server import mcp
+        monkeypatch.setattr(mcp, "auth", HashedTokenVerifier([BearerToken("metrics-token")]))
+        transport = httpx.ASGITransport(create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert (await client.get("/metrics")).status_code == 401
+            response = await client.get("/metrics", headers={"Authorization": "Bearer metrics-token"})
+        assert response.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self):
+        """测试 /metrics 端点输出Prometheus文本格式"""
+        from src.app import create_app
+        app = create_app()
+        transport = httpx.ASGITransport(app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/metrics")
+            local = await client.get("/metrics", params={"local": "1"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE mcp_request_duration_seconds histogram" in response.text
+        assert "mcp_sse_sessions_active" in response.text
+        assert "mcp_tool_cache_hits_total" in response.text
+        assert local.json()["mcp_requests_total"]["type"] == "counter"
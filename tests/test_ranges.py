@@ -0,0 +1,90 @@
+"""
+分段读取资源测试
+"""
+
+import base64
+
+import httpx
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ResourceError
+
+from src.ranges import ranged, read_range, safe_path
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(bytes(range(256)) * 1024)
+    return path
+
+
+class TestRangedResource:
+    """ranged装饰器测试类"""
+
+    def test_read_range(self, data_file):
+        """测试读取不从分配粒度对齐处开始的窗口"""
+        data, size = read_range(data_file, 70000, 10)
+        assert size == 256 * 1024
+        assert data == (bytes(range(256)) * 1024)[70000:70010]
+        assert read_range(data_file, size, 10) == (b"", size)
+        with pytest.raises(ResourceError):
+            read_range(data_file, size + 1, 10)
+
+    def test_safe_path(self, tmp_path):
+        """测试拒绝跳出根目录的名称"""
+        assert safe_path(tmp_path, "a.log") == (tmp_path / "a.log").resolve()
+        for name in ("..", "../etc/passwd", "/etc/passwd"):
+            with pytest.raises(ResourceError):
+                safe_path(tmp_path, name)
+
+    @pytest.mark.asyncio
+    async def test_read_through_server(self, data_file):
+        """测试通过MCP按 offset/length 读取，单次不超过 max_length"""
+        server = FastMCP("ranges-test")
+
+        @server.resource("files://{name}{?offset,length}")
+        @ranged(max_length=1000)
+        def files(name: str):
+            return safe_path(data_file.parent, name)
+
+        async with Client(server) as client:
+            result = await client.read_resource_mcp("files://data.bin?offset=300&length=4")
+            content = result.contents[0]
+            assert base64.b64decode(content.blob) == bytes([44, 45, 46, 47])
+            assert content.meta["nextOffset"] == 304
+
+            whole = (await client.read_resource_mcp("files://data.bin")).contents[0]
+            assert whole.meta["length"] == 1000
+            assert whole.meta["size"] == 256 * 1024
+
+    @pytest.mark.asyncio
+    async def test_raw_endpoint_range(self, data_file, monkeypatch):
+        """测试HTTP端点支持 Range 请求头"""
+        monkeypatch.setenv("MCP_LOG_DIR", str(data_file.parent))
+        from src.app import create_app
+        transport = httpx.ASGITransport(create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(
+                "/resources/raw", params={"uri": "logs://data.bin"}, headers={"Range": "bytes=256-259"}
+            )
+            missing = await client.get("/resources/raw", params={"uri": "logs://missing.log"})
+            unknown = await client.get("/resources/raw", params={"uri": "config://app-info"})
+        assert response.status_code == 206
+        assert response.content == bytes([0, 1, 2, 3])
+        assert response.headers["content-type"].startswith("text/plain")
+        assert missing.status_code == 404
+        assert unknown.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_raw_endpoint_rate_limited(self, data_file, monkeypatch):
+        """测试HTTP端点与 /mcp 共用按token的限速"""
+        from src.admission import Limit, admission
+        from src.app import create_app
+        monkeypatch.setenv("MCP_LOG_DIR", str(data_file.parent))
+        monkeypatch.setattr(admission, "token_limit", Limit(rate=1, burst=1))
+        transport = httpx.ASGITransport(create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            statuses = [(await client.get("/resources/raw", params={"uri": "logs://data.bin"})).status_code
+                        for _ in range(2)]
+        assert statuses == [200, 429]
@@ -0,0 +1,113 @@
+"""
+资源URI索引测试
+"""
+
+import json
+
+import pytest
+from fastmcp import Client, FastMCP
+
+from src import routing
+from src.routing import ResourceIndex, TemplateTrie
+
+
+def _server():
+    server = FastMCP("routing-test")
+    templates = [
+        ("data://{table}/{id}", lambda table, id: f"{table}/{id}"),
+        ("data://users/{id}", lambda id: id),
+        ("data://{table}/{id}/history", lambda table, id: f"{table}/{id}/history"),
+        ("files://{path*}", lambda path: path),
+        ("files://docs/{name}.md", lambda name: name),
+        ("docs://café/{page}", lambda page: page),
+        ("report://{year}-{month}", lambda year, month: f"{year}-{month}"),
+        ("logs://{name}{?offset,length}", lambda name, offset=None, length=None: name),
+    ]
+    for i, (template, fn) in enumerate(templates):
+        server.resource(template, name=f"t{i}")(fn)
+    server.resource("config://static", name="static")(lambda: "static")
+    return server, ResourceIndex(server._local_provider).install()
+
+
+URIS = [
+    "data://users/1",
+    "data://orders/7",
+    "data://orders/7/history",
+    "data://orders",
+    "files://a/b/c.txt",
+    "files://docs/readme.md",
+    "docs://café/intro",
+    "docs://caf%C3%A9/intro",
+    "report://2024-05",
+    "logs://app.log?offset=10",
+    "config://static",
+    "unknown://x",
+]
+
+
+class TestResourceIndex:
+    """ResourceIndex测试类"""
+
+    @pytest.mark.asyncio
+    async def test_same_result_as_linear_scan(self):
+        """测试索引查找与原始遍历查找结果一致"""
+        server, index = _server()
+        provider = server._local_provider
+        for uri in URIS:
+            expected = await type(provider)._get_resource_template(provider, uri)
+            assert await index.get_resource_template(uri) is expected, uri
+            expected = await type(provider)._get_resource(provider, uri)
+            assert await index.get_resource(uri) is expected, uri
+        assert (await index.get_resource_template("docs://caf%C3%A9/intro")).name == "t5"
+        assert (await index.get_resource_template("files://a/b/c.txt")).name == "t3"
+
+    def test_candidates_are_narrowed(self):
+        """测试前缀树只返回可能匹配的模板"""
+        server, _ = _server()
+        templates = [c for c in server._local_provider._components.values() if hasattr(c, "uri_template")]
+        trie = TemplateTrie(templates)
+        names = [templates[i].name for i in trie.candidates("data://orders/7")]
+        assert names == ["t0"]
+        assert [templates[i].name for i in trie.candidates("files://docs/readme.md")] == ["t3", "t4"]
+
+    @pytest.mark.asyncio
+    async def test_invalidated_on_registration(self):
+        """测试注册新模板后重新建立索引"""
+        server, index = _server()
+        async with Client(server) as client:
+            assert (await client.read_resource_mcp("data://orders/7")).contents[0].text
+            assert (await index.get_resource_template("data://orders/7")).name == "t0"
+            server.resource("data://orders/{id}", name="orders")(lambda id: id)
+            assert (await index.get_resource_template("data://orders/7")).name in ("t0", "orders")
+            result = await client.read_resource_mcp("data://orders/7")
+            assert result.contents[0].text
+        assert index.stats()["hits"] >= 1
+
+    def test_version_mixing_still_rejected(self):
+        """测试版本混用检查仍然生效"""
+        server, _ = _server()
+        server.resource("v://{id}", name="v1", version="1")(lambda id: id)
+        server.resource("v://{id}", name="v2", version="2")(lambda id: id)
+        with pytest.raises(ValueError, match="unversioned"):
+            server.resource("v://{id}", name="v0")(lambda id: id)
+
+    @pytest.mark.asyncio
+    async def test_missing_internals_fall_back(self, monkeypatch):
+        """测试 fastmcp 缺少所需的内部方法时不替换查找，读取仍然正常"""
+        server = FastMCP("routing-test")
+        provider = server._local_provider
+        monkeypatch.setattr(routing, "_PROVIDER_HOOKS", routing._PROVIDER_HOOKS + ("_renamed_hook",))
+        original = provider._get_resource_template
+        ResourceIndex(provider).install()
+        assert provider._get_resource_template == original
+        server.resource("data://{table}/{id}", name="rows")(lambda table, id: f"{table}/{id}")
+        async with Client(server) as client:
+            assert (await client.read_resource_mcp("data://users/1")).contents[0].text == "users/1"
+
+    @pytest.mark.asyncio
+    async def test_demo_data_resource(self):
+        """测试示例 data://{table}/{id} 资源"""
+        from src.server import mcp
+        async with Client(mcp) as client:
+            result = await client.read_resource_mcp("data://users/1")
+        assert json.loads(result.contents[0].text)["name"] == "Alice"
@@ -0,0 +1,174 @@
+"""
+测试JSON后端与组件输出编码器
+"""
+
+import datetime
+import json
+from typing import Dict, List
+
+import mcp_types as types
+import pytest
+from fastmcp import Client, FastMCP
+from fastmcp.tools import Tool
+from pydantic import BaseModel
+
+from src import serialization
+from src.serialization import (
+    OutputEncoders,
+    ToolOutputEncoder,
+    decode_message,
+    encode_message,
+    encode_message_into,
+    load_backend,
+    set_backend,
+)
+
+
+class Reading(BaseModel):
+    value: float
+    at: datetime.datetime
+
+
+@pytest.fixture
+def backend():
+    yield
+    set_backend(None)
+
+
+class TestSerialization:
+    """测试JSON后端"""
+
+    @pytest.mark.parametrize("name", ["json", "orjson"])
+    def test_round_trip(self, backend, name):
+        pytest.importorskip(name)
+        set_backend(name)
+        line = b'{"jsonrpc":"2.0","id":7,"method":"tools/call","params":{"name":"echo","arguments":{"text":"h\xc3\xa9llo \xe2\x9c\x93"}}}'
+        message = decode_message(line)
+        assert isinstance(message, types.JSONRPCRequest)
+        assert message.params["arguments"]["text"] == "héllo ✓"
+        assert json.loads(encode_message(message)) == json.loads(line)
+
+    def test_matches_sdk_encoding(self, backend):
+        pytest.importorskip("orjson")
+        set_backend("orjson")
+        message = types.JSONRPCResponse(jsonrpc="2.0", id=1, result={"content": [{"type": "text", "text": "ok"}]})
+        expected = message.model_dump_json(by_alias=True, exclude_unset=True)
+        assert json.loads(encode_message(message)) == json.loads(expected)
+
+    def test_fallback_when_not_installed(self, monkeypatch):
+        def missing():
+            raise ImportError("msgspec")
+
+        monkeypatch.setitem(serialization._FACTORIES, "msgspec", missing)
+        assert load_backend("msgspec").name in ("orjson", "json")
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            load_backend("yaml")
+
+    def test_invalid_message(self, backend):
+        set_backend("auto")
+        with pytest.raises(Exception):
+            decode_message(b"not json")
+        with pytest.raises(Exception):
+            decode_message(b'{"jsonrpc":"2.0","id":1}')
+
+
+    def test_encode_into_reused_buffer(self, backend):
+        set_backend("auto")
+        buffer = bytearray(b"x" * 1000)
+        end = encode_message_into(types.JSONRPCResponse(jsonrpc="2.0", id=1, result={}), buffer, 0)
+        end = encode_message_into(types.JSONRPCResponse(jsonrpc="2.0", id=2, result={"a": "✓"}), buffer, end)
+        lines = bytes(buffer[:end]).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [1, 2]
+        assert json.loads(lines[1])["result"] == {"a": "✓"}
+
+
+def _compare(fn, value):
+    """编码器的结果与 FastMCP 通用转换一致"""
+    tool = Tool.from_function(fn)
+    encoder = ToolOutputEncoder(serialization._return_annotation(fn), tool.output_schema)
+    encoded = encoder.encode(value)
+    assert encoded is not None
+    expected = tool.convert_result(value).to_mcp_result()
+    actual = encoded.to_mcp_result()
+    assert str(actual) == str(expected)
+
+
+class TestOutputEncoders:
+    """测试按返回类型注解预编译的输出编码器"""
+
+    @pytest.mark.parametrize("name", ["json", "orjson"])
+    def test_matches_fastmcp(self, backend, name):
+        pytest.importorskip(name)
+        set_backend(name)
+
+        def weather() -> dict: ...
+        def total() -> int: ...
+        def text() -> str: ...
+        def items() -> List[int]: ...
+        def readings() -> List[Reading]: ...
+        def untyped(): ...
+
+        _compare(weather, {"city": "Beijing", "temperature": 22.5, "tags": ["✓", None]})
+        _compare(total, 3)
+        _compare(text, "héllo")
+        _compare(items, [1, 2, 3])
+        _compare(items, [])
+        _compare(readings, [Reading(value=1.5, at=datetime.datetime(2024, 1, 2, 3, 4, 5))])
+        _compare(untyped, {"a": 1})
+        _compare(untyped, [1, "a"])
+
+    def test_falls_back_when_pydantic_converts(self, backend):
+        """标量注解下类型不一致的值（pydantic 会转换）交给 FastMCP"""
+        set_backend("auto")
+
+        def ratio() -> float: ...
+
+        tool = Tool.from_function(ratio)
+        encoder = ToolOutputEncoder(float, tool.output_schema)
+        assert encoder.encode(3) is None
+        assert encoder.encode(True) is None
+        assert encoder.encode(0.5) is not None
+        assert encoder.fallbacks == 2
+
+    def test_schema_mismatch_falls_back(self, backend):
+        set_backend("auto")
+
+        def info() -> Dict[str, int]: ...
+
+        tool = Tool.from_function(info)
+        encoder = ToolOutputEncoder(Dict[str, int], tool.output_schema)
+        assert encoder.adapter is not None
+        assert encoder.encode([1, 2]) is None
+
+    @pytest.mark.asyncio
+    async def test_installed_on_server(self, backend):
+        set_backend("auto")
+        server = FastMCP("encoders")
+        encoders = OutputEncoders(server._local_provider).install()
+
+        @server.tool
+        def weather(city: str) -> dict:
+            return {"city": city, "temperature": 22}
+
+        @server.tool
+        def image() -> bytes:
+            return b"\x89PNG"
+
+        @server.resource("config://settings")
+        def settings() -> dict:
+            return {"debug": False, "name": "✓"}
+
+        async with Client(server) as client:
+            result = await client.call_tool("weather", {"city": "Paris"})
+            assert result.structured_content == {"city": "Paris", "temperature": 22}
+            assert json.loads(result.content[0].text) == {"city": "Paris", "temperature": 22}
+            contents = await client.read_resource("config://settings")
+            assert json.loads(contents[0].text) == {"debug": False, "name": "✓"}
+            # 资源JSON为紧凑格式，非ASCII字符不转义（FastMCP 为 '{"debug": false, "name": "\\u2713"}'）
+            assert contents[0].text == '{"debug":false,"name":"✓"}'
+
+        # bytes 返回值由 FastMCP 处理，不安装编码器
+        assert set(encoders.encoders) == {"tool:weather@", "resource:config://settings@"}
+        assert encoders.stats() == {"components": 2, "encoded": 2, "fallbacks": 0}
@@ -103,3 +103,44 @@ class TestAuthIntegration:
         
         server = get_server()
         assert server.auth is not None
+    
+    @pytest.mark.asyncio
+    async def test_rotate_tokens_without_rebuild(self):
+        """测试更换token时不重建服务器实例"""
+        configure_auth(AuthConfig(enabled=True, tokens=["old-token"]))
+        server = get_server()
+        verifier = server.auth
+        
+        configure_auth(AuthConfig(enabled=True, tokens=["new-token"]))
+        assert get_server() is server
+        assert server.auth is verifier
+        assert await verifier.verify_token("old-token") is None
+        assert await verifier.verify_token("new-token") is not None
+        
+        tools = await server.list_tools()
+        assert "add" in [t.name for t in tools]
+
+
+class TestApp:
+    """FastAPI应用测试"""
+    
+    @pytest.mark.asyncio
+    async def test_lifespan_runs_mcp_lifespan(self, monkeypatch):
+        """测试只构建一次SSE子应用，且其lifespan随FastAPI应用执行"""
+        from src import app as app_module
+        
+        calls = []
+        original = mcp.http_app
+        
+        def counting_http_app(*args, **kwargs):
+            calls.append(kwargs.get("transport"))
+            return original(*args, **kwargs)
+        
+        monkeypatch.setattr(mcp, "http_app", counting_http_app)
+        app = app_module.create_app()
+        
+        async with app.router.lifespan_context(app):
+            assert mcp._lifespan_result_set
+            assert app.state.mcp_app is not None
+        assert not mcp._lifespan_result_set
+        assert calls == ["sse"]
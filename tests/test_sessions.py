@@ -0,0 +1,291 @@
+"""
+测试SSE会话管理
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import anyio
+import httpx
+import pytest
+
+from src import sessions
+from src.sessions import (
+    IDLE_TIMEOUT_ENV,
+    MAX_SESSIONS_ENV,
+    QUEUE_POLICY_ENV,
+    SEND_TIMEOUT_ENV,
+    SessionLimits,
+    SessionManager,
+    SessionMiddleware,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSION_ID = "0123456789abcdef0123456789abcdef"
+
+
+def _sse_app(messages: int = 0):
+    """模拟SDK的SSE端点：endpoint事件、若干消息，然后一直保持连接"""
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream; charset=utf-8")]})
+        endpoint = f"event: endpoint\r\ndata: /messages/?session_id={SESSION_ID}\r\n\r\n"
+        await send({"type": "http.response.body", "body": endpoint.encode(), "more_body": True})
+        for i in range(messages):
+            await send({"type": "http.response.body", "body": f"event: message\r\ndata: {i}\r\n\r\n".encode(),
+                        "more_body": True})
+        await anyio.sleep_forever()
+    return app
+
+
+async def _receive():
+    await anyio.sleep_forever()
+
+
+def _scope(method: str = "GET", path: str = "/sse", query: bytes = b"") -> dict:
+    return {"type": "http", "method": method, "path": path, "query_string": query,
+            "headers": [], "client": ("127.0.0.1", 5000)}
+
+
+class _Client:
+    """记录收到的响应；stalled 时 send 不返回，模拟不再读取的客户端"""
+
+    def __init__(self, stalled: bool = False, delay: float = 0):
+        self.messages = []
+        self.stalled = stalled
+        self.delay = delay
+
+    async def send(self, message):
+        if self.stalled and message["type"] == "http.response.body" and self.messages:
+            await anyio.sleep_forever()
+        if self.delay:
+            await anyio.sleep(self.delay)
+        self.messages.append(message)
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(m.get("body", b"") for m in self.messages if m["type"] == "http.response.body")
+
+
+class TestSessionLimits:
+    """测试会话限制的配置"""
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv(MAX_SESSIONS_ENV, "0")
+        monkeypatch.setenv(IDLE_TIMEOUT_ENV, "30")
+        monkeypatch.setenv(QUEUE_POLICY_ENV, "drop")
+        monkeypatch.setenv(SEND_TIMEOUT_ENV, "0")
+        limits = SessionLimits.from_env()
+        assert limits.max_sessions is None
+        assert limits.idle_timeout == 30.0
+        assert limits.queue_policy == "drop"
+        assert limits.send_timeout is None
+        assert limits.ping_interval == SessionLimits().ping_interval
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            SessionLimits(queue_policy="block")
+
+
+class TestSessionMiddleware:
+    """测试会话中间件"""
+
+    @pytest.mark.asyncio
+    async def test_idle_session_closed_with_pings(self):
+        manager = SessionManager(SessionLimits(idle_timeout=0.5, ping_interval=0.1))
+        middleware = SessionMiddleware(_sse_app(), manager)
+        client = _Client()
+        with anyio.fail_after(5):
+            await middleware(_scope(), _receive, client.send)
+
+        assert client.body.count(b": ping\r\n\r\n") >= 3
+        assert client.messages[-1] == {"type": "http.response.body", "body": b"", "more_body": False}
+        assert manager.closed == {"idle": 1}
+        assert manager.sessions == {} and manager.open == 0
+
+    @pytest.mark.asyncio
+    async def test_stalled_client_closed_when_idle(self, monkeypatch):
+        """客户端不再读取时写出被阻塞，会话仍在空闲超时后关闭"""
+        monkeypatch.setattr(sessions, "CLOSE_TIMEOUT", 0.1)
+        manager = SessionManager(SessionLimits(idle_timeout=0.3, ping_interval=0.1))
+        middleware = SessionMiddleware(_sse_app(), manager)
+        with anyio.fail_after(5):
+            await middleware(_scope(), _receive, _Client(stalled=True).send)
+        assert manager.closed == {"idle": 1}
+        assert manager.sessions == {} and manager.open == 0
+
+    @pytest.mark.asyncio
+    async def test_admin_close_and_listing(self):
+        manager = SessionManager(SessionLimits(idle_timeout=None, ping_interval=None))
+        middleware = SessionMiddleware(_sse_app(messages=2), manager)
+        client = _Client()
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(middleware, _scope(), _receive, client.send)
+            while SESSION_ID not in manager.sessions:
+                await anyio.sleep(0.01)
+            await anyio.sleep(0.05)
+            [info] = manager.list()
+            assert info["session_id"] == SESSION_ID
+            assert info["messages_out"] == 2 and info["queued"] == 0
+            assert info["bytes_out"] == len(client.body) and info["peak_buffered_bytes"] > 0
+            assert not manager.close("ffff")
+            assert manager.close(SESSION_ID.upper())
+        assert manager.closed == {"admin": 1}
+        assert manager.sessions == {}
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("policy", ["disconnect", "drop"])
+    async def test_stalled_client_queue_bound(self, policy, monkeypatch):
+        """客户端不再读取、写出阻塞超过 send_timeout 后按 queue_policy 丢弃消息或断开"""
+        monkeypatch.setattr(sessions, "CLOSE_TIMEOUT", 0.1)
+        limits = SessionLimits(idle_timeout=None, ping_interval=None, queue_size=4, queue_policy=policy, send_timeout=0.1)
+        manager = SessionManager(limits)
+        middleware = SessionMiddleware(_sse_app(messages=20), manager)
+        client = _Client(stalled=True)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(middleware, _scope(), _receive, client.send)
+            await anyio.sleep(0.3)
+            if policy == "drop":
+                # 新消息被丢弃，排队的消息不超过上限
+                session = manager.sessions[SESSION_ID]
+                assert len(session.queue) == 4 and session.dropped == 16
+                assert session.buffered_bytes == sum(len(m["body"]) for m in session.queue)
+                session.close("admin")
+        # 断开时丢弃排队的消息；写出被阻塞的结束消息在 CLOSE_TIMEOUT 后放弃
+        assert manager.closed == {"overflow" if policy == "disconnect" else "admin": 1}
+        assert manager.dropped == (1 if policy == "disconnect" else 16)
+        assert manager.open == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_client_receives_every_message(self):
+        """读得慢的客户端使发送等待队列腾出空间，收到全部消息，会话不被关闭"""
+        manager = SessionManager(SessionLimits(idle_timeout=None, ping_interval=None, queue_size=4, send_timeout=1.0))
+        middleware = SessionMiddleware(_sse_app(messages=1000), manager)
+        client = _Client(delay=0.001)
+        with anyio.fail_after(30):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(middleware, _scope(), _receive, client.send)
+                while client.body.count(b"event: message") < 1000:
+                    await anyio.sleep(0.05)
+                session = manager.sessions[SESSION_ID]
+                assert session.dropped == 0 and session.messages_out == 1000
+                tg.cancel_scope.cancel()
+        assert [int(line[6:]) for line in client.body.split(b"\r\n") if line.startswith(b"data: ") and b"session_id" not in line] == list(range(1000))
+        assert manager.closed == {} and manager.dropped == 0
+
+    @pytest.mark.asyncio
+    async def test_max_sessions(self):
+        manager = SessionManager(SessionLimits(max_sessions=1, idle_timeout=None, ping_interval=None))
+        middleware = SessionMiddleware(_sse_app(), manager)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(middleware, _scope(), _receive, _Client().send)
+            await anyio.sleep(0.05)
+            rejected = _Client()
+            await middleware(_scope(), _receive, rejected.send)
+            assert rejected.messages[0]["status"] == 503
+            assert manager.rejected == 1
+            tg.cancel_scope.cancel()
+
+    @pytest.mark.asyncio
+    async def test_post_accounting(self):
+        manager = SessionManager(SessionLimits(idle_timeout=None, ping_interval=None))
+        received = []
+
+        async def app(scope, receive, send):
+            if scope["method"] == "GET":
+                await _sse_app()(scope, receive, send)
+                return
+            received.append(await receive())
+            await send({"type": "http.response.start", "status": 202, "headers": []})
+            await send({"type": "http.response.body", "body": b"Accepted"})
+
+        middleware = SessionMiddleware(app, manager)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(middleware, _scope(), _receive, _Client().send)
+            while SESSION_ID not in manager.sessions:
+                await anyio.sleep(0.01)
+            session = manager.sessions[SESSION_ID]
+            session.last_activity -= 10
+
+            async def receive():
+                return {"type": "http.request", "body": b'{"jsonrpc": "2.0"}', "more_body": False}
+
+            post = _Client()
+            await middleware(_scope("POST", "/messages/", f"session_id={SESSION_ID}".encode()), receive, post.send)
+            assert post.messages[0]["status"] == 202
+            assert session.posts == 1 and session.bytes_in == 18
+            assert session.info()["idle"] < 1
+            tg.cancel_scope.cancel()
+        assert len(received) == 1
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestSessionEndpoints:
+    """SSE服务器上的会话管理集成测试"""
+
+    def test_admin_endpoints_and_limits(self, tmp_path):
+        port = _free_port()
+        env = dict(os.environ, **{MAX_SESSIONS_ENV: "2", IDLE_TIMEOUT_ENV: "1"})
+        auth_file = tmp_path / "auth.json"
+        auth_file.write_text(json.dumps({"tokens": [{"token": "sessions-token", "scopes": ["admin"]}, "other-token"]}))
+        proc = subprocess.Popen(
+            [sys.executable, "main.py", "--transport", "sse", "--auth-file", str(auth_file),
+             "--host", "127.0.0.1", "--port", str(port)],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base = f"http://127.0.0.1:{port}"
+        headers = {"Authorization": "Bearer sessions-token"}
+        try:
+            deadline = time.time() + 30
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+                    break
+                except OSError:
+                    if time.time() > deadline:
+                        raise
+                    time.sleep(0.2)
+
+            async def run():
+                async with httpx.AsyncClient(base_url=base, headers=headers) as client:
+                    assert (await client.get("/admin/sessions", headers={"Authorization": ""})).status_code == 401
+                    async with client.stream("GET", "/mcp/sse") as first, client.stream("GET", "/mcp/sse") as second:
+                        # 收到 endpoint 事件后会话已登记；保留迭代器，避免被回收时关闭流
+                        streams = [first.aiter_bytes(), second.aiter_bytes()]
+                        for stream in streams:
+                            await stream.__anext__()
+                        assert (await client.get("/mcp/sse")).status_code == 503
+                        listing = (await client.get("/admin/sessions")).json()
+                        assert listing["sessions"] == 2 and listing["max_sessions"] == 2
+                        session_id = listing["items"][0]["session_id"]
+                        # 没有 admin scope 的token看不到也关不掉其他token的会话
+                        other = {"Authorization": "Bearer other-token"}
+                        assert (await client.get("/admin/sessions", headers=other)).json() == {"sessions": 0, "items": []}
+                        assert (await client.delete(f"/admin/sessions/{session_id}", headers=other)).status_code == 404
+                        assert (await client.delete(f"/admin/sessions/{session_id}")).status_code == 204
+                        assert (await client.delete(f"/admin/sessions/{session_id}")).status_code == 404
+                        # 剩下的会话在空闲超时后被关闭
+                        for _ in range(50):
+                            if (await client.get("/admin/sessions")).json()["sessions"] == 0:
+                                break
+                            await asyncio.sleep(0.1)
+                    listing = (await client.get("/admin/sessions")).json()
+                    assert listing["sessions"] == 0 and listing["rejected"] == 1
+                    assert listing["closed"]["admin"] == 1 and listing["closed"]["idle"] >= 1
+                    metrics = (await client.get("/metrics")).text
+                    assert 'mcp_sse_sessions_closed_total{reason="admin"} 1' in metrics
+
+            asyncio.run(run())
+        finally:
+            proc.terminate()
+            proc.wait(timeout=15)
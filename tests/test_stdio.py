@@ -0,0 +1,84 @@
+"""
+测试stdio传输
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import mcp_types as types
+import pytest
+from mcp.shared.message import SessionMessage
+
+from src.stdio import stdio_server
+
+ROOT = Path(__file__).parent.parent
+
+
+def _ping(id: int) -> bytes:
+    return json.dumps({"jsonrpc": "2.0", "id": id, "method": "ping"}).encode()
+
+
+class TestStdioServer:
+    """测试批量读写的stdio传输"""
+
+    @pytest.mark.asyncio
+    async def test_batched_read_and_write(self):
+        in_r, in_w = os.pipe()
+        out_r, out_w = os.pipe()
+        stdin = os.fdopen(in_r, "rb")
+        stdout = os.fdopen(out_w, "wb")
+        # 一次写入多条消息、空行、非法行，最后一条消息跨两次写入
+        os.write(in_w, _ping(1) + b"\n\n" + _ping(2) + b"\nnot json\n" + _ping(3)[:10])
+        async with stdio_server(stdin, stdout) as (read_stream, write_stream):
+            received = [await read_stream.receive() for _ in range(3)]
+            os.write(in_w, _ping(3)[10:] + b"\n")
+            os.close(in_w)
+            received.append(await read_stream.receive())
+
+            assert [m.message.id for m in received if isinstance(m, SessionMessage)] == [1, 2, 3]
+            assert isinstance(received[2], Exception)
+
+            for id in (1, 2, 3):
+                await write_stream.send(SessionMessage(types.JSONRPCResponse(jsonrpc="2.0", id=id, result={})))
+            await write_stream.aclose()
+        stdin.close()
+        stdout.close()
+
+        with os.fdopen(out_r, "rb") as f:
+            lines = f.read().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+
+    @pytest.mark.parametrize("mode", [None, "fast"])
+    def test_main_serves_stdio(self, mode):
+        """main.py 默认使用 SDK 的传输，--stdio-mode fast 使用批量读写的传输"""
+        initialize = {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {"protocolVersion": "2025-06-18", "capabilities": {}, "clientInfo": {"name": "t", "version": "1"}},
+        }
+        stdin = b"\n".join([
+            json.dumps(initialize).encode(),
+            b'{"jsonrpc":"2.0","method":"notifications/initialized"}',
+            _ping(2),
+        ]) + b"\n"
+        proc = subprocess.Popen(
+            [sys.executable, "main.py", "--transport", "stdio", "--no-auth"] + (["--stdio-mode", mode] if mode else []),
+            cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        try:
+            proc.stdin.write(stdin)
+            proc.stdin.flush()
+            # 读到全部响应后才关闭 stdin，避免EOF先于响应结束服务
+            lines = []
+            while len([line for line in lines if line.startswith(b"{")]) < 2:
+                line = proc.stdout.readline()
+                assert line, "server exited early"
+                lines.append(line)
+        finally:
+            proc.stdin.close()
+            proc.wait(timeout=30)
+        responses = [json.loads(line) for line in lines if line.startswith(b"{")]
+        assert [r["id"] for r in responses] == [1, 2]
+        assert any(f"({mode or 'sdk'})".encode() in line for line in lines)
@@ -0,0 +1,166 @@
+"""
+流式工具测试
+"""
+
+import asyncio
+import socket
+
+import pytest
+import uvicorn
+from fastmcp import Client, FastMCP
+from fastmcp.exceptions import ToolError
+from starlette.middleware import Middleware
+
+from src import streaming as streaming_module
+from src.sessions import SessionLimits, SessionManager, SessionMiddleware
+from src.streaming import stream_stats, streaming
+
+
+class _SlowWrites:
+    """每次写出响应数据前等待，模拟读得慢的SSE连接"""
+
+    def __init__(self, app, delay: float):
+        self.app = app
+        self.delay = delay
+
+    async def __call__(self, scope, receive, send):
+        async def slow_send(message):
+            if message["type"] == "http.response.body":
+                await asyncio.sleep(self.delay)
+            await send(message)
+
+        await self.app(scope, receive, slow_send)
+
+
+def _server(**options):
+    server = FastMCP("streaming-test")
+
+    @server.tool
+    @streaming(**options)
+    async def count(n: int):
+        """Count to n."""
+        for i in range(n):
+            yield f"{i},"
+
+    return server
+
+
+class TestStreaming:
+    """streaming装饰器测试类"""
+
+    @pytest.mark.asyncio
+    async def test_chunks_sent_as_progress(self):
+        """测试每块作为进度通知发送，结果只包含摘要"""
+        received = []
+
+        async def on_progress(progress, total, message):
+            received.append((progress, message))
+
+        async with Client(_server(), progress_handler=on_progress) as client:
+            result = await client.call_tool("count", {"n": 3})
+        assert received == [(2, "0,"), (4, "1,"), (6, "2,")]
+        assert result.meta["streamed"] == {"chunks": 3, "chars": 6}
+
+    @pytest.mark.asyncio
+    async def test_collected_without_progress_token(self):
+        """测试不接收流时收集为完整结果"""
+        @streaming()
+        async def letters():
+            for c in "abc":
+                yield c
+
+        result = await letters()
+        assert result.content[0].text == "abc"
+
+    @pytest.mark.asyncio
+    async def test_collected_size_limit(self):
+        """测试不接收流时超过大小上限返回工具错误"""
+        @streaming(max_bytes=4)
+        async def letters():
+            for c in "abcdef":
+                yield c
+
+        with pytest.raises(ToolError):
+            await letters()
+
+    @pytest.mark.asyncio
+    async def test_slow_client_aborts(self, monkeypatch):
+        """测试发送长时间未完成时中止并关闭生成器"""
+        class SlowContext:
+            sent = 0
+
+            async def report_progress(self, progress, total=None, message=None):
+                self.sent += 1
+                await asyncio.sleep(1)
+
+        ctx = SlowContext()
+        closed = []
+        monkeypatch.setattr("src.streaming._progress_context", lambda: ctx)
+
+        @streaming(send_timeout=0.05)
+        async def endless():
+            try:
+                while True:
+                    yield "x" * 1024
+            finally:
+                closed.append(True)
+
+        with pytest.raises(ToolError):
+            await endless()
+        assert ctx.sent == 1
+        assert closed == [True]
+        assert stream_stats.active == 0
+
+    def test_requires_async_generator(self):
+        """测试只能装饰异步生成器函数"""
+        with pytest.raises(TypeError):
+            streaming()(lambda: None)
+
+    @pytest.mark.asyncio
+    async def test_collected_outside_request(self):
+        """测试没有请求上下文时（直接调用）收集全部输出"""
+        async def letters():
+            yield "a"
+            yield "b"
+
+        assert streaming_module._progress_context() is None
+        result = await streaming_module._consume(letters(), "letters", None, 100)
+        assert result.content[0].text == "ab"
+
+    @pytest.mark.asyncio
+    async def test_every_chunk_over_sse_session(self):
+        """测试经过SSE会话中间件时，读得慢的客户端也收到全部块，结果只包含摘要"""
+        server = _server()
+        chunk = "x" * 16 * 1024
+
+        @server.tool
+        @streaming()
+        async def blocks(n: int):
+            for i in range(n):
+                yield f"{i:04d}{chunk}"
+
+        manager = SessionManager(SessionLimits(idle_timeout=None, ping_interval=None, queue_size=2, send_timeout=5))
+        middleware = [Middleware(_SlowWrites, delay=0.002), Middleware(SessionMiddleware, manager=manager)]
+        app = server.http_app(transport="sse", middleware=middleware)
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        uvicorn_server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+        serving = asyncio.create_task(uvicorn_server.serve())
+        received = []
+
+        async def on_progress(progress, total, message):
+            received.append(message)
+
+        try:
+            while not uvicorn_server.started:
+                await asyncio.sleep(0.01)
+            async with Client(f"http://127.0.0.1:{port}/sse", progress_handler=on_progress) as client:
+                result = await client.call_tool("blocks", {"n": 300})
+        finally:
+            uvicorn_server.should_exit = True
+            await serving
+        assert [int(message[:4]) for message in received] == list(range(300))
+        assert all(len(message) == len(chunk) + 4 for message in received)
+        assert result.content[0].text == "[streamed 300 chunks, 4916400 characters]"
+        assert manager.dropped == 0 and manager.closed == {}
@@ -0,0 +1,78 @@
+"""
+提示词模板测试
+"""
+
+import pytest
+from fastmcp import Client, FastMCP
+
+from src.templates import CompiledTemplate, prompt_template
+
+
+class TestCompiledTemplate:
+    """CompiledTemplate测试类"""
+
+    def test_matches_str_format(self):
+        """测试渲染结果与 str.format 一致"""
+        text = "Hello {name!r}, you are {age:>4} years old. {{literal}} {name}"
+        template = CompiledTemplate(text)
+        values = {"name": "Ada", "age": 36}
+        assert template.render(values) == text.format(**values)
+
+    def test_render_cache(self):
+        """测试相同参数命中缓存"""
+        template = CompiledTemplate("{a}-{b}")
+        assert template.render({"a": 1, "b": 2}) == "1-2"
+        assert template.render({"b": 2, "a": 1}) == "1-2"
+        assert template.render({"a": 2, "b": 2}) == "2-2"
+        assert template.stats()["hits"] == 1
+        assert template.stats()["misses"] == 2
+
+    def test_equal_values_of_different_types(self):
+        """测试相等但类型不同的参数不共用缓存"""
+        template = CompiledTemplate("{x}")
+        assert [template.render({"x": v}) for v in (1, 1.0, True)] == ["1", "1.0", "True"]
+        assert template.stats()["hits"] == 0
+
+    def test_large_results_not_cached(self):
+        """测试超过 max_bytes 的结果不进入缓存"""
+        template = CompiledTemplate("<{code}>", max_bytes=100)
+        template.render({"code": "x" * 1000})
+        assert template.stats()["size"] == 0
+        template.render({"code": "x"})
+        assert template.stats()["bytes"] == 3
+
+    def test_unhashable_arguments(self):
+        """测试不可哈希的参数直接渲染"""
+        template = CompiledTemplate("{items}")
+        assert template.render({"items": [1, 2]}) == "[1, 2]"
+        assert template.stats()["misses"] == 0
+
+    def test_invalid_fields(self):
+        """测试拒绝属性访问字段与未知参数"""
+        with pytest.raises(ValueError):
+            CompiledTemplate("{user.name}")
+        with pytest.raises(ValueError):
+            @prompt_template("{missing}")
+            def prompt(text: str) -> str:
+                """Prompt."""
+
+
+class TestPromptTemplate:
+    """@prompt_template 测试类"""
+
+    @pytest.mark.asyncio
+    async def test_prompt_uses_defaults(self):
+        """测试经过FastMCP渲染，默认参数生效"""
+        server = FastMCP("template-test")
+
+        @server.prompt
+        @prompt_template("Translate to {target}:\n\n{text}")
+        def translate(text: str, target: str = "English") -> str:
+            """Translate text."""
+
+        async with Client(server) as client:
+            prompts = await client.list_prompts()
+            result = await client.get_prompt("translate", {"text": "你好"})
+        assert [a.name for a in prompts[0].arguments] == ["text", "target"]
+        assert prompts[0].description == "Translate text."
+        assert result.messages[0].content.text == "Translate to English:\n\n你好"
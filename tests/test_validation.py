@@ -0,0 +1,141 @@
+"""
+测试预编译的参数校验器
+"""
+
+from typing import Annotated, Dict, List
+
+import pytest
+from fastmcp import Client, Context, FastMCP
+from fastmcp.exceptions import ValidationError
+from fastmcp.tools import FunctionTool, Tool
+from pydantic import Field
+
+from src import validation
+from src.serialization import OutputEncoders
+from src.validation import ArgumentValidator, ArgumentValidators, ValidatedTool, strict_arguments
+
+
+def add(a: int, b: int = 2) -> int:
+    return a + b
+
+
+def multiply(a: float, b: float) -> float:
+    return a * b
+
+
+async def _run(tool, arguments):
+    try:
+        result = await tool.run(arguments)
+    except ValidationError as e:
+        return "error", str(e).splitlines()[1:]
+    return result.structured_content, [block.text for block in result.content]
+
+
+class TestArgumentValidator:
+    """测试按签名编译的校验器"""
+
+    def test_scalar_fast_path(self):
+        validator = ArgumentValidator(add, run_in_thread=False)
+        assert validator.bind({"a": 1, "b": 5}) == {"a": 1, "b": 5}
+        assert validator.bind({"a": 1}) == {"a": 1}
+        # 类型不符、缺少或多出参数时交给 pydantic
+        assert validator.bind({"a": "1"}) is None
+        assert validator.bind({"a": True}) is None
+        assert validator.bind({"b": 1}) is None
+        assert validator.bind({"a": 1, "c": 1}) is None
+
+        converted = ArgumentValidator(multiply).bind({"a": 2, "b": 0.5})
+        assert converted == {"a": 2.0, "b": 0.5} and type(converted["a"]) is float
+
+    def test_non_scalar_signatures(self):
+        def tags(items: List[str]) -> int: ...
+        def positive(n: Annotated[int, Field(gt=0)]) -> int: ...
+        def with_context(a: int, ctx: Context) -> int: ...
+
+        for fn in (tags, positive, with_context):
+            validator = ArgumentValidator(fn)
+            assert validator.fields is None
+            assert validator.adapter is not None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("fn, arguments", [
+        (add, {"a": 1, "b": 2}),
+        (add, {"a": 1}),
+        (add, {"a": "10", "b": 1.0}),
+        (add, {"a": True}),
+        (add, {"a": "x"}),
+        (add, {"b": 1}),
+        (add, {"a": 1, "c": 1}),
+        (multiply, {"a": 2, "b": 3}),
+        (multiply, {"a": "2.5", "b": 2}),
+    ])
+    async def test_matches_fastmcp(self, fn, arguments):
+        tool = Tool.from_function(fn)
+        assert await _run(ValidatedTool.from_tool(tool), arguments) == await _run(tool, arguments)
+
+    @pytest.mark.asyncio
+    async def test_strict_arguments(self):
+        @strict_arguments
+        def strict_add(a: int, b: int) -> int:
+            return a + b
+
+        tool = ValidatedTool.from_tool(Tool.from_function(strict_add))
+        assert (await tool.run({"a": 1, "b": 2})).structured_content == {"result": 3}
+        with pytest.raises(ValidationError):
+            await tool.run({"a": "10", "b": 2})
+
+    @pytest.mark.asyncio
+    async def test_body_errors(self):
+        async def fetch(count: int) -> Dict[str, int]:
+            if count < 0:
+                raise ValueError("count must be positive")
+            return {"count": count}
+
+        tool = ValidatedTool.from_tool(Tool.from_function(fetch))
+        assert (await tool.run({"count": 3})).structured_content == {"count": 3}
+        with pytest.raises(ValueError):
+            await tool.run({"count": -1})
+
+
+class TestArgumentValidators:
+    """测试在服务器上安装校验器"""
+
+    @pytest.mark.asyncio
+    async def test_installed_on_server(self):
+        server = FastMCP("validators", strict_input_validation=True)
+        validators = ArgumentValidators(server._local_provider).install()
+        OutputEncoders(server._local_provider).install()
+
+        @server.tool
+        def total(a: int, b: int) -> int:
+            return a + b
+
+        @server.tool
+        def echo(text: str, ctx: Context) -> str:
+            return text
+
+        assert isinstance(await server.get_tool("total"), ValidatedTool)
+        async with Client(server) as client:
+            assert (await client.call_tool("total", {"a": 1, "b": 2})).structured_content == {"result": 3}
+            assert (await client.call_tool("echo", {"text": "hi"})).content[0].text == "hi"
+            # 服务器开启严格模式时不做类型转换
+            result = await client.call_tool("total", {"a": "1", "b": 2}, raise_on_error=False)
+            assert result.is_error
+
+        assert validators.stats() == {"tools": 2, "scalar": 1, "fast": 1, "fallbacks": 2}
+
+    @pytest.mark.asyncio
+    async def test_missing_internals_keep_stock_tools(self, monkeypatch):
+        """测试 fastmcp 缺少所需的内部接口时保留原有的 FunctionTool"""
+        monkeypatch.setattr(validation, "_TOOL_HOOKS", ("_renamed_hook",))
+        server = FastMCP("validators")
+        validators = ArgumentValidators(server._local_provider).install()
+
+        @server.tool
+        def total(a: int, b: int) -> int:
+            return a + b
+
+        assert type(await server.get_tool("total")) is FunctionTool
+        async with Client(server) as client:
+            assert (await client.call_tool("total", {"a": 1, "b": "2"})).structured_content == {"result": 3}
+        assert validators.stats()["tools"] == 0
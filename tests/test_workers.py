@@ -0,0 +1,110 @@
+"""
+多进程会话路由测试
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+from fastmcp import Client
+
+from src.workers import SessionTable, _session_id_from_scope
+
+
+class TestSessionTable:
+    """SessionTable测试类"""
+
+    def test_register_and_lookup(self, tmp_path):
+        """测试登记与查询会话"""
+        table = SessionTable(str(tmp_path))
+        table.register("abc123", "/tmp/worker-0.sock")
+        assert table.lookup("abc123") == "/tmp/worker-0.sock"
+        assert len(table) == 1
+
+    def test_shared_between_instances(self, tmp_path):
+        """测试不同实例（进程）共享同一会话表"""
+        SessionTable(str(tmp_path)).register("abc123", "/tmp/worker-1.sock")
+        assert SessionTable(str(tmp_path)).lookup("abc123") == "/tmp/worker-1.sock"
+
+    def test_unregister(self, tmp_path):
+        """测试删除会话"""
+        table = SessionTable(str(tmp_path))
+        table.register("abc123", "/tmp/worker-0.sock")
+        table.unregister("abc123")
+        table.unregister("abc123")
+        assert table.lookup("abc123") is None
+
+    def test_rejects_unsafe_session_id(self, tmp_path):
+        """测试拒绝非法会话ID"""
+        table = SessionTable(str(tmp_path))
+        table.register("../escape", "/tmp/worker-0.sock")
+        assert table.lookup("../escape") is None
+        assert len(table) == 0
+
+
+class TestSessionIdExtraction:
+    """会话ID提取测试"""
+
+    def test_from_query(self):
+        scope = {"headers": [], "query_string": b"session_id=deadbeef"}
+        assert _session_id_from_scope(scope) == "deadbeef"
+
+    def test_from_header(self):
+        scope = {"headers": [(b"mcp-session-id", b"cafe")], "query_string": b""}
+        assert _session_id_from_scope(scope) == "cafe"
+
+    def test_missing(self):
+        assert _session_id_from_scope({"headers": [], "query_string": b""}) is None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"server on port {port} did not start")
+
+
+class TestMultiWorker:
+    """多worker集成测试"""
+
+    def test_sse_sessions_across_workers(self):
+        """测试多worker下每个SSE会话的POST都能路由到持有者"""
+        port = _free_port()
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        proc = subprocess.Popen(
+            [sys.executable, "main.py", "--transport", "sse", "--no-auth",
+             "--host", "127.0.0.1", "--port", str(port), "--workers", "2"],
+            cwd=root,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            _wait_for_port(port)
+
+            async def session(i: int):
+                async with Client(f"http://127.0.0.1:{port}/mcp/sse") as client:
+                    for j in range(3):
+                        result = await client.call_tool("add", {"a": i, "b": j})
+                        assert result.data == i + j
+
+            async def run():
+                await asyncio.gather(*[session(i) for i in range(8)])
+
+            asyncio.run(run())
+        finally:
+            proc.terminate()
+            proc.wait(timeout=15)